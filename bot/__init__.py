@@ -14,6 +14,10 @@ from database import (
     mark_trial_reminder_sent, mark_paid_reminder_sent, get_all_members
 )
 from plexhelper import PlexHelper
+from bot.aio import AsyncPlex, db, has_server_access
+from bot.guild_cache import cache as guild_cache
+from bot.role_transitions import transition
+from bot import member_cache
 
 # ─────────────────────────────
 # Load configuration safely
@@ -34,6 +38,8 @@ PAYER_ROLE = config["Discord"].get("PayerRole", "Payer")
 LIFETIME_ROLE = config["Discord"].get("LifetimeRole", "Lifetime")
 ADMIN_ROLE = config["Discord"].get("AdminRole", "Admin")
 ADMIN_CHANNEL_ID = int(config["Discord"].get("AdminChannelID", "0") or 0)
+SHARDED = config["Discord"].getboolean("Sharded", False)
+SHARD_COUNT = int(config["Discord"].get("ShardCount", "0") or 0) or None  # None → Discord's recommendation
 
 # Messages
 WELCOME_MESSAGE = config["Messages"].get(
@@ -94,6 +100,9 @@ except Exception as e:
     logger.error(f"⚠️ Failed to connect to Plex: {type(e).__name__}: {e}")
     logger.warning("Continuing without active Plex connection. Some features will be limited.")
 
+# Coroutines use this instead of `plex` so Plex API calls never block the loop
+aplex = AsyncPlex(plex)
+
 # ─────────────────────────────
 # Discord Bot Initialization
 # ─────────────────────────────
@@ -102,9 +111,16 @@ intents.members = True
 intents.guilds = True
 intents.message_content = True
 
-class CasharrBot(discord.Client):
+# [Discord] Sharded = true switches to one gateway connection per shard
+_ClientBase = discord.AutoShardedClient if SHARDED else discord.Client
+
+class CasharrBot(_ClientBase):
     def __init__(self):
-        super().__init__(intents=intents)
+        kwargs = member_cache.client_kwargs(intents)
+        if SHARDED:
+            kwargs["shard_count"] = SHARD_COUNT
+        # [Discord] MemberCache = full | lazy (see bot/member_cache.py)
+        super().__init__(intents=intents, **kwargs)
         self.tree = app_commands.CommandTree(self)
 
 client = CasharrBot()
@@ -145,32 +161,24 @@ async def send_admin(message: str):
 
 async def check_and_upgrade_after_invite(member: discord.Member, email: str):
     """Check Plex server access and upgrade Discord role accordingly."""
-    if plex is None:
+    if not aplex.available:
         logger.warning("Skipping Plex invite check (no active connection).")
         return
 
     try:
-        server_name = plex.plex.friendlyName
-        has_access = False
-
-        for u in plex.account.users():
-            if not u.email:
-                continue
-            if email.lower() == u.email.lower() and any(server_name in str(s) for s in u.servers):
-                has_access = True
-                break
+        server_name = aplex.server_name
+        plex_user = (await aplex.users_by_email()).get(email.lower())
+        has_access = bool(plex_user and has_server_access(plex_user, server_name))
 
         guild = member.guild
-        trial_role = discord.utils.get(guild.roles, name=TRIAL_ROLE)
-        payer_role = discord.utils.get(guild.roles, name=PAYER_ROLE)
-        no_access_role = discord.utils.get(guild.roles, name=INITIAL_ROLE)
+        trial_role, payer_role, no_access_role = guild_cache.roles(
+            guild, TRIAL_ROLE, PAYER_ROLE, INITIAL_ROLE
+        )
 
         if has_access:
             if no_access_role in member.roles and payer_role not in member.roles:
-                await member.remove_roles(no_access_role)
-                if trial_role:
-                    await member.add_roles(trial_role)
-                start_trial(member.id, TRIAL_DAYS)
+                await transition(member, add=[trial_role], remove=[no_access_role])
+                await db.start_trial(member.id, TRIAL_DAYS)
                 await send_admin(
                     f"🎉 {member.mention} has active Plex access. Trial started ({TRIAL_DAYS} days)."
                 )
@@ -183,4 +191,4 @@ async def check_and_upgrade_after_invite(member: discord.Member, email: str):
     except Exception as e:
         logger.error("Plex invite acceptance check failed for %s: %s", email, e)
 
-__all__ = ["client", "bot", "TOKEN", "LIFETIME_ROLE"]
+__all__ = ["client", "bot", "TOKEN", "LIFETIME_ROLE", "aplex", "guild_cache"]
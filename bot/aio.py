@@ -0,0 +1,109 @@
+# bot/aio.py
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+from helpers.emailer import send_email
+from helpers.sms import send_sms
+
+# ─────────────────────────────
+# Shared I/O pool
+# ─────────────────────────────
+# Every blocking call made from a bot coroutine (sqlite, Plex, SMTP, SMS,
+# file writes, PDF builds) goes through this pool so the gateway heartbeat
+# and other commands never wait on it.
+IO_WORKERS = int(os.environ.get("CASHARR_IO_WORKERS", "8"))
+_io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="casharr-io")
+
+
+async def run_blocking(func, /, *args, **kwargs):
+    """Run a blocking callable on the I/O pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_pool, functools.partial(func, *args, **kwargs))
+
+
+class AsyncFacade:
+    """Awaitable view of a module: each callable attribute runs on the I/O pool."""
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def _offloaded(*args, **kwargs):
+            return await run_blocking(attr, *args, **kwargs)
+
+        return _offloaded
+
+
+# Data layer: `await db.get_member(id)` instead of `get_member(id)`
+db = AsyncFacade(database)
+
+
+# ─────────────────────────────
+# Notifiers
+# ─────────────────────────────
+async def send_email_async(subject, body, to=None):
+    return await run_blocking(send_email, subject, body, to=to)
+
+
+async def send_sms_async(to_number: str, message: str):
+    return await run_blocking(send_sms, to_number, message)
+
+
+# ─────────────────────────────
+# Plex client
+# ─────────────────────────────
+def _normalize_server(name) -> str:
+    return str(name or "").lower().replace(" ", "").replace("-", "")
+
+
+def has_server_access(plex_user, server_name: str) -> bool:
+    """True if a MyPlexUser has a share on the given server (name-normalized)."""
+    target = _normalize_server(server_name)
+    for s in getattr(plex_user, "servers", []) or []:
+        if (
+            target in _normalize_server(s)
+            or target in _normalize_server(getattr(s, "name", ""))
+            or target in _normalize_server(getattr(s, "title", ""))
+        ):
+            return True
+    return False
+
+
+class AsyncPlex:
+    """Executor-backed wrapper around PlexHelper for use inside coroutines."""
+
+    def __init__(self, helper):
+        self.helper = helper
+
+    @property
+    def available(self) -> bool:
+        return self.helper is not None
+
+    @property
+    def server_name(self) -> str:
+        # friendlyName is parsed when PlexServer connects; reading it is not I/O
+        return self.helper.plex.friendlyName
+
+    async def users(self):
+        return await run_blocking(self.helper.account.users)
+
+    async def users_by_email(self) -> dict:
+        users = await self.users()
+        return {u.email.lower(): u for u in users if u.email}
+
+    async def invite_user(self, email):
+        return await run_blocking(self.helper.invite_user, email)
+
+    async def remove_user(self, email):
+        return await run_blocking(self.helper.remove_user, email)
+
+    async def test_connection(self) -> bool:
+        return await run_blocking(self.helper.test_connection)
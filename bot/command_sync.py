@@ -0,0 +1,89 @@
+# bot/command_sync.py
+import hashlib
+import json
+import os
+
+import discord
+from loghelper import logger
+from bot.aio import run_blocking
+
+# ─────────────────────────────
+# Slash command sync, only when the tree changed
+# ─────────────────────────────
+# tree.sync() is a rate-limited bulk overwrite. Instead of calling it on
+# every connect, hash the serialized command payload (global, and per guild
+# for guild-scoped commands) and remember it in STATE_FILE keyed by
+# application id. Unchanged scopes are skipped.
+#
+# Force a full resync with `python run.py --sync-commands` or
+# CASHARR_FORCE_SYNC=1.
+
+STATE_FILE = os.path.join("data", "command_sync.json")
+FORCE = os.environ.get("CASHARR_FORCE_SYNC", "").strip().lower() in ("1", "true", "yes")
+
+
+def _load_state() -> dict:
+    try:
+        with open(STATE_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state: dict):
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, STATE_FILE)
+
+
+def _payload(tree: discord.app_commands.CommandTree, guild=None) -> list[dict]:
+    out = []
+    for cmd in tree.get_commands(guild=guild):
+        try:
+            out.append(cmd.to_dict(tree))
+        except TypeError:  # discord.py < 2.4
+            out.append(cmd.to_dict())
+    return sorted(out, key=lambda c: (c.get("type", 1), c.get("name", "")))
+
+
+def tree_hash(tree, guild=None) -> str:
+    blob = json.dumps(_payload(tree, guild), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+async def sync_if_changed(bot: discord.Client, force: bool | None = None) -> dict:
+    """Sync each command scope whose hash moved. Returns {scope: synced count or None if skipped}."""
+    global FORCE
+    force = FORCE if force is None else force
+    tree = bot.tree
+    state = await run_blocking(_load_state)
+    prefix = f"{bot.application_id}:"
+
+    # Global scope, every guild with guild-scoped commands, and any guild we
+    # synced before (so removing its last command still clears it remotely)
+    guild_ids = {g.id for g in bot.guilds if tree.get_commands(guild=g)}
+    guild_ids.update(int(k.rsplit(":", 1)[1]) for k in state if k.startswith(prefix + "guild:"))
+    scopes = [(prefix + "global", None)] + [
+        (f"{prefix}guild:{gid}", discord.Object(id=gid)) for gid in sorted(guild_ids)
+    ]
+
+    results = {}
+    for key, guild in scopes:
+        digest = tree_hash(tree, guild)
+        if not force and state.get(key) == digest:
+            results[key] = None
+            continue
+        synced = await tree.sync(guild=guild)
+        state[key] = digest
+        await run_blocking(_save_state, dict(state))
+        results[key] = len(synced)
+        logger.info("✅ Synced %d slash command(s) (%s).", len(synced), key.split(":", 1)[1])
+        for cmd in synced:
+            logger.info(f"🔹 Synced: /{cmd.name}")
+
+    FORCE = False  # a forced resync applies to the first connect only
+    skipped = sum(1 for v in results.values() if v is None)
+    if skipped == len(results):
+        logger.info("⚙️ Slash commands unchanged — sync skipped.")
+    return results
@@ -4,32 +4,16 @@ from discord import app_commands
 from datetime import datetime, timezone, timedelta
 from bot import (
     bot, ADMIN_ROLE, INITIAL_ROLE, TRIAL_ROLE, PAYER_ROLE, LIFETIME_ROLE, send_admin,
-    get_member, save_member, get_all_members, pay_page, DB_PATH, EXPORTS_DIR, plex, config
+    pay_page, DB_PATH, EXPORTS_DIR, aplex, guild_cache, config
 )
-from database import is_promo_eligible, has_used_promo
-
-# ───────────────────────────────
-# Persistent pending DM tracking
-# ───────────────────────────────
-PENDING_FILE = "data/pending_details.json"
-os.makedirs("data", exist_ok=True)
-if not os.path.exists(PENDING_FILE):
-    with open(PENDING_FILE, "w") as f:
-        json.dump({}, f)
-
-def load_pending():
-    try:
-        with open(PENDING_FILE, "r") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-def save_pending(data):
-    with open(PENDING_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+from bot.aio import db, run_blocking, has_server_access
+from bot.role_transitions import transition
+from bot import onboarding, jobs, member_cache
+from bot.onboarding import serialize_roles as _serialize_roles
 
-def _serialize_roles(member: discord.Member) -> str:
-    return ", ".join(role.name for role in member.roles if role.name != "@everyone")
+def _read_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
 
 def _needs_contact(record) -> bool:
     if not record:
@@ -41,122 +25,28 @@ def _needs_contact(record) -> bool:
     return False
 
 
-async def _collect_member_details(member: discord.Member, resume_stage: int = 0):
-    """Interactively collect missing details from a member via DM (persistent)."""
-    record = get_member(member.id)
-    first = record[2] if record and len(record) > 2 else ""
-    last = record[3] if record and len(record) > 3 else ""
-    email = record[4] if record and len(record) > 4 else ""
-    mobile = record[5] if record and len(record) > 5 else ""
-
-    try:
-        dm = await member.create_dm()
-    except Exception as e:
-        await send_admin(f"⚠️ Couldn’t DM {member.mention} for details: {e}")
-        return False
-
-    await dm.send(
-        "👋 Thanks for helping update your profile."
-        "\nYou can reply anytime — this chat stays open until all details are received."
-        "\nReply with `skip` to keep any existing value."
-    )
-
-    def check(message: discord.Message) -> bool:
-        return message.author == member and isinstance(message.channel, discord.DMChannel)
-
-    questions = [
-        ("first_name", "What is your **first name**?", first),
-        ("last_name", "What is your **last name**?", last),
-        ("email", "What is the **email you use for Plex**?", email),
-        ("mobile", "What is your **mobile number**?", mobile),
-    ]
-    answers: dict[str, str] = {}
-
-    # Load pending progress
-    pending = load_pending()
-    stage = resume_stage
-    pending[str(member.id)] = stage
-    save_pending(pending)
-
-    while stage < len(questions):
-        key, question, current = questions[stage]
-        prompt = question
-        if current:
-            prompt += f"\nCurrent: `{current}`\nType `skip` to keep it."
-        else:
-            prompt += "\n(Type `skip` to leave blank.)"
-        await dm.send(prompt)
-
-        reply = await bot.wait_for("message", check=check)
-        response = reply.content.strip()
-        if response.lower() == "skip":
-            answers[key] = current or ""
-        else:
-            answers[key] = response
-
-        stage += 1
-        pending[str(member.id)] = stage
-        save_pending(pending)
-
-    cleaned_first = answers.get("first_name", first).strip()
-    cleaned_last = answers.get("last_name", last).strip()
-    cleaned_email = answers.get("email", email).strip()
-    cleaned_mobile = answers.get("mobile", mobile).strip()
-
-    tag = f"{member.name}#{member.discriminator}" if member.discriminator else member.name
-    origin = record[17] if record and len(record) > 17 and record[17] else "sync"
-    roles_snapshot = _serialize_roles(member)
-
-    save_member(
-        member.id,
-        cleaned_first,
-        cleaned_last,
-        cleaned_email,
-        cleaned_mobile,
-        discord_tag=tag,
-        origin=origin,
-        roles=roles_snapshot,
-    )
-
-    await dm.send("✅ Thanks! Your details have been updated and saved.")
-    await send_admin(f"✅ Saved updated details for {member.mention} ({cleaned_email or 'no email supplied'}).")
-
-    # Remove from pending
-    pending.pop(str(member.id), None)
-    save_pending(pending)
-    return True
-
-
-# ────────────────────────────────
-# /sync_members COMMAND
-# ────────────────────────────────
-@bot.tree.command(name="sync_members", description="Admins only: Sync existing members into the database.")
-async def sync_members(interaction: discord.Interaction):
-    admin_role = discord.utils.get(interaction.guild.roles, name=ADMIN_ROLE)
-    if admin_role not in interaction.user.roles:
-        await interaction.response.send_message("❌ You don’t have permission to do this.", ephemeral=True)
-        return
+def _sync_member_rows(snapshot, job=None):
+    """Blocking half of /sync_members: upsert (id, tag, roles) rows; returns counters."""
+    from database import get_member, save_member
 
     count_new = 0
     count_backfill = 0
     roles_updated = 0
-    for member in interaction.guild.members:
-        if member.bot:
-            continue
-        record = get_member(member.id)
-        tag = f"{member.name}#{member.discriminator}" if member.discriminator else member.name
-        roles_snapshot = _serialize_roles(member)
+    for i, (member_id, tag, roles_snapshot) in enumerate(snapshot, 1):
+        if job and i % 50 == 0:
+            job.progress = f"{i}/{len(snapshot)} members synced…"
+        record = get_member(member_id)
         origin = record[17] if record and len(record) > 17 and record[17] else "sync"
 
         if not record:
-            save_member(member.id, "", "", "", "", discord_tag=tag, origin=origin, roles=roles_snapshot)
+            save_member(member_id, "", "", "", "", discord_tag=tag, origin=origin, roles=roles_snapshot)
             count_new += 1
             roles_updated += 1
             continue
 
         stored_roles = (record[18] if len(record) > 18 else None) or ""
         save_member(
-            member.id,
+            member_id,
             record[2] or "",
             record[3] or "",
             record[4] or "",
@@ -172,27 +62,57 @@ async def sync_members(interaction: discord.Interaction):
         if roles_snapshot != stored_roles:
             roles_updated += 1
 
-    await interaction.response.send_message(
-        f"✅ Synced {count_new} new members; backfilled tags for {count_backfill} member(s);"
-        f" captured roles for {roles_updated} member(s).",
-        ephemeral=True
-    )
-    await send_admin(
-        f"🔄 Sync complete — {count_new} new member(s), {count_backfill} tag backfill(s),"
-        f" {roles_updated} role snapshot(s) updated."
-    )
+    return count_new, count_backfill, roles_updated
+
+
+# ────────────────────────────────
+# /sync_members COMMAND
+# ────────────────────────────────
+@bot.tree.command(name="sync_members", description="Admins only: Sync existing members into the database.")
+async def sync_members(interaction: discord.Interaction):
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
+    if admin_role not in interaction.user.roles:
+        await interaction.response.send_message("❌ You don’t have permission to do this.", ephemeral=True)
+        return
+
+    async def work(job):
+        job.progress = "Loading guild members…"
+        await member_cache.ensure_full(interaction.guild)
+        # Snapshot member data on the loop, then do every DB round trip on the I/O pool
+        snapshot = [
+            (
+                member.id,
+                f"{member.name}#{member.discriminator}" if member.discriminator else member.name,
+                _serialize_roles(member),
+            )
+            for member in interaction.guild.members
+            if not member.bot
+        ]
+        job.progress = f"0/{len(snapshot)} members synced…"
+        count_new, count_backfill, roles_updated = await run_blocking(_sync_member_rows, snapshot, job)
+        await send_admin(
+            f"🔄 Sync complete — {count_new} new member(s), {count_backfill} tag backfill(s),"
+            f" {roles_updated} role snapshot(s) updated."
+        )
+        return (
+            f"Synced {count_new} new members; backfilled tags for {count_backfill} member(s);"
+            f" captured roles for {roles_updated} member(s)."
+        )
+
+    await jobs.start_job(interaction, "Sync members", work)
 
 # ────────────────────────────────
 # /request_details COMMAND
 # ────────────────────────────────
 @bot.tree.command(name="request_details", description="Admins only: DM members to request missing details.")
 async def request_details(interaction: discord.Interaction):
-    admin_role = discord.utils.get(interaction.guild.roles, name=ADMIN_ROLE)
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
     if admin_role not in interaction.user.roles:
         await interaction.response.send_message("❌ You don’t have permission to do this.", ephemeral=True)
         return
 
     await interaction.response.send_message("📨 Checking for members missing details...", ephemeral=True)
+    await member_cache.ensure_full(interaction.guild)
 
     started = 0
     for member in interaction.guild.members:
@@ -203,7 +123,7 @@ async def request_details(interaction: discord.Interaction):
         if admin_role and admin_role in member.roles:
             continue
 
-        record = get_member(member.id)
+        record = await db.get_member(member.id)
         if not _needs_contact(record):
             continue
 
@@ -217,7 +137,7 @@ async def request_details(interaction: discord.Interaction):
         existing_email = record[4] if record and len(record) > 4 else ""
         existing_mobile = record[5] if record and len(record) > 5 else ""
 
-        save_member(
+        await db.save_member(
             member.id,
             existing_first or "",
             existing_last or "",
@@ -228,8 +148,8 @@ async def request_details(interaction: discord.Interaction):
             roles=roles_snapshot,
         )
 
-        asyncio.create_task(_collect_member_details(member))
-        started += 1
+        if await onboarding.start(member, "details"):
+            started += 1
 
     if started == 0:
         await interaction.followup.send("✅ Everyone already has full details on file.", ephemeral=True)
@@ -246,26 +166,31 @@ async def request_details(interaction: discord.Interaction):
 # ────────────────────────────────
 @bot.tree.command(name="renew_all", description="Admins only: Ask all trial and payer members to renew.")
 async def renew_all(interaction: discord.Interaction):
-    admin_role = discord.utils.get(interaction.guild.roles, name=ADMIN_ROLE)
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
     if admin_role not in interaction.user.roles:
         await interaction.response.send_message("❌ You don’t have permission to do this.", ephemeral=True)
         return
 
-    await interaction.response.send_message("🔁 Sending renewal messages...", ephemeral=True)
     guild = interaction.guild
-    sent = 0
 
     # ✅ Load config for pricing and promo
     cfg = config
     promo_enabled = cfg.has_section("Promo") and cfg["Promo"].getboolean("Enabled", False)
 
-    for member in guild.members:
-        if member.bot:
-            continue
+    trial_role, payer_role = guild_cache.roles(guild, TRIAL_ROLE, PAYER_ROLE)
+
+    async def work(job):
+        await member_cache.ensure_full(guild)
         # Target users in trial or paid roles
-        if discord.utils.get(member.roles, name=TRIAL_ROLE) or discord.utils.get(member.roles, name=PAYER_ROLE):
+        targets = [
+            m for m in guild.members
+            if not m.bot and ((trial_role and trial_role in m.roles) or (payer_role and payer_role in m.roles))
+        ]
+        sent = 0
+        for i, member in enumerate(targets, 1):
+            job.progress = f"{i}/{len(targets)} — messaged {sent}"
             try:
-                eligible_for_promo = promo_enabled and is_promo_eligible(member.id)
+                eligible_for_promo = promo_enabled and await db.is_promo_eligible(member.id)
                 note = ""
                 if eligible_for_promo:
                     # Apply promo prices
@@ -297,14 +222,17 @@ async def renew_all(interaction: discord.Interaction):
             except Exception as e:
                 print(f"⚠️ Couldn’t message {member.name}: {e}")
 
-    await send_admin(f"💬 Renewal messages sent to {sent} member(s).")
+        await send_admin(f"💬 Renewal messages sent to {sent} member(s).")
+        return f"Renewal messages sent to {sent} of {len(targets)} member(s)."
+
+    await jobs.start_job(interaction, "Renew all", work)
 
 # ────────────────────────────────
 # /backup_db COMMAND
 # ────────────────────────────────
 @bot.tree.command(name="backup_db", description="Admins only: Create a backup of members.db into /exports.")
 async def backup_db(interaction: discord.Interaction):
-    admin_role = discord.utils.get(interaction.guild.roles, name=ADMIN_ROLE)
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
     if admin_role not in interaction.user.roles:
         await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
         return
@@ -313,12 +241,59 @@ async def backup_db(interaction: discord.Interaction):
         await interaction.response.send_message("⚠️ Database not found!", ephemeral=True)
         return
 
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    backup_path = os.path.join(EXPORTS_DIR, f"members_backup_{timestamp}.db")
-    shutil.copy2(DB_PATH, backup_path)
+    from helpers.backups import create_backup
 
-    await interaction.response.send_message("✅ Database backup created.", ephemeral=True)
-    await send_admin(f"💾 Database backup created: `{backup_path}`")
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    try:
+        backup = await run_blocking(create_backup, "discord")
+    except Exception as e:
+        await interaction.followup.send(f"⚠️ Backup failed: {e}", ephemeral=True)
+        return
+
+    if backup["duplicate"]:
+        await interaction.followup.send(f"✅ No changes since the last backup (`{backup['file']}`).", ephemeral=True)
+        return
+    await interaction.followup.send("✅ Database backup created.", ephemeral=True)
+    await send_admin(f"💾 Database backup created: `{backup['path']}` ({backup['stored_bytes'] / 1024:.0f} KB compressed, quick_check ok)")
+
+
+# ────────────────────────────────
+# /export COMMAND
+# ────────────────────────────────
+EXPORT_ATTACH_LIMIT = 8 * 1024 * 1024  # attach to the reply below this size, else just report the path
+
+@bot.tree.command(name="export", description="Admins only: Export members or payments as CSV/NDJSON into /exports.")
+@app_commands.describe(
+    dataset="What to export",
+    fmt="File format",
+    status="Only members with this status (members export only)",
+    compress="gzip the file",
+)
+@app_commands.choices(
+    dataset=[app_commands.Choice(name=n, value=n) for n in ("members", "payments")],
+    fmt=[app_commands.Choice(name=n, value=n) for n in ("csv", "ndjson")],
+)
+async def export(interaction: discord.Interaction, dataset: str, fmt: str = "csv",
+                 status: str | None = None, compress: bool = False):
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
+    if admin_role not in interaction.user.roles:
+        await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
+        return
+
+    from helpers.exports import export_stream, write_export
+
+    async def work(job):
+        filters = {"status": status, "default_status": INITIAL_ROLE} if dataset == "members" else {}
+        name = f"{dataset}_{datetime.now():%Y-%m-%d_%H-%M-%S}.{fmt}" + (".gz" if compress else "")
+        path = os.path.join(EXPORTS_DIR, name)
+        job.progress = f"Streaming {dataset} to `{name}`…"
+        size = await run_blocking(write_export, path, export_stream(dataset, fmt, compress=compress, **filters))
+        if size <= EXPORT_ATTACH_LIMIT:
+            await interaction.followup.send(file=discord.File(path), ephemeral=True)
+        await send_admin(f"📤 Export created: `{path}` ({size / 1024:.0f} KB)")
+        return f"Exported {dataset} to `/exports/{name}` ({size / 1024:.0f} KB)."
+
+    await jobs.start_job(interaction, "Export", work)
 
 
 # ────────────────────────────────
@@ -342,13 +317,13 @@ async def add_member(
     email: str = "",
     mobile: str = ""
 ):
-    admin_role = discord.utils.get(interaction.guild.roles, name=ADMIN_ROLE)
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
     if admin_role not in interaction.user.roles:
         await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
         return
 
     try:
-        save_member(discord_id, first_name, last_name, email, mobile, discord_tag)
+        await db.save_member(discord_id, first_name, last_name, email, mobile, discord_tag)
         embed = discord.Embed(title="✅ Member Added / Updated", color=discord.Color.green())
         embed.add_field(name="Discord ID", value=discord_id, inline=False)
         embed.add_field(name="Discord Tag", value=discord_tag or "-", inline=True)
@@ -362,13 +337,26 @@ async def add_member(
         await interaction.response.send_message(f"⚠️ Failed to add/update member: {e}", ephemeral=True)
 
 
+def _write_access_mode(mode: str):
+    CONFIG_PATH = os.path.join("config", "config.ini")
+    config = configparser.ConfigParser()
+    config.read(CONFIG_PATH)
+
+    if "AccessMode" not in config:
+        config["AccessMode"] = {}
+    config["AccessMode"]["Mode"] = mode
+
+    with open(CONFIG_PATH, "w") as f:
+        config.write(f)
+
+
 # ────────────────────────────────
 # /set_mode COMMAND (Auto / Manual)
 # ────────────────────────────────
 @bot.tree.command(name="set_mode", description="Admins only: Switch between Manual or Auto enforcement mode.")
 @app_commands.describe(mode="Choose 'Manual' or 'Auto'")
 async def set_mode(interaction: discord.Interaction, mode: str):
-    admin_role = discord.utils.get(interaction.guild.roles, name=ADMIN_ROLE)
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
     if admin_role not in interaction.user.roles:
         await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
         return
@@ -378,16 +366,7 @@ async def set_mode(interaction: discord.Interaction, mode: str):
         await interaction.response.send_message("❌ Mode must be 'Manual' or 'Auto'.", ephemeral=True)
         return
 
-    CONFIG_PATH = os.path.join("config", "config.ini")
-    config = configparser.ConfigParser()
-    config.read(CONFIG_PATH)
-
-    if "AccessMode" not in config:
-        config["AccessMode"] = {}
-    config["AccessMode"]["Mode"] = mode
-
-    with open(CONFIG_PATH, "w") as f:
-        config.write(f)
+    await run_blocking(_write_access_mode, mode)
 
     await interaction.response.send_message(f"✅ Access mode set to **{mode}**.", ephemeral=True)
     await send_admin(f"🔧 Access mode changed to **{mode}** by {interaction.user.mention}.")
@@ -398,7 +377,7 @@ async def set_mode(interaction: discord.Interaction, mode: str):
 # ────────────────────────────────
 @bot.tree.command(name="view_skips", description="Admins only: View members currently deferred (skip list).")
 async def view_skips(interaction: discord.Interaction):
-    admin_role = discord.utils.get(interaction.guild.roles, name=ADMIN_ROLE)
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
     if admin_role not in interaction.user.roles:
         await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
         return
@@ -409,8 +388,7 @@ async def view_skips(interaction: discord.Interaction):
         return
 
     try:
-        with open(skip_file, "r") as f:
-            skips = json.load(f)
+        skips = await run_blocking(_read_json, skip_file)
     except Exception as e:
         await interaction.response.send_message(f"⚠️ Failed to read skip file: {e}", ephemeral=True)
         return
@@ -425,7 +403,7 @@ async def view_skips(interaction: discord.Interaction):
         try:
             last_skip = datetime.fromisoformat(ts)
             expires = last_skip + timedelta(days=7)
-            member = interaction.guild.get_member(int(discord_id))
+            member = await member_cache.resolve(interaction.guild, discord_id)
             name = member.display_name if member else f"UserID {discord_id}"
             lines.append(f"• **{name}** — expires <t:{int(expires.timestamp())}:R> ({expires.date()})")
         except Exception:
@@ -451,24 +429,19 @@ async def view_skips(interaction: discord.Interaction):
     months="Number of months to extend access (default 1)"
 )
 async def mark_paid(interaction: discord.Interaction, member: discord.Member, months: int = 1):
-    admin_role = discord.utils.get(interaction.guild.roles, name=ADMIN_ROLE)
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
     if admin_role not in interaction.user.roles:
         await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
         return
 
-    from database import update_payment, clear_trial_after_payment
-
     try:
-        update_payment(member.id, months)
-        clear_trial_after_payment(member.id)
+        await db.update_payment(member.id, months)
+        await db.clear_trial_after_payment(member.id)
 
-        payer_role = discord.utils.get(interaction.guild.roles, name=PAYER_ROLE)
-        trial_role = discord.utils.get(interaction.guild.roles, name=TRIAL_ROLE)
+        payer_role = guild_cache.role(interaction.guild, PAYER_ROLE)
+        trial_role = guild_cache.role(interaction.guild, TRIAL_ROLE)
 
-        if trial_role in member.roles:
-            await member.remove_roles(trial_role)
-        if payer_role and payer_role not in member.roles:
-            await member.add_roles(payer_role)
+        await transition(member, add=[payer_role], remove=[trial_role])
 
         await interaction.response.send_message(
             f"✅ {member.display_name} marked as paid for {months} month(s).",
@@ -487,43 +460,28 @@ async def mark_paid(interaction: discord.Interaction, member: discord.Member, mo
 @bot.tree.command(name="mark_lifetime", description="Admins only: Grant a member permanent lifetime access.")
 @app_commands.describe(member="The Discord member to grant Lifetime access to.")
 async def mark_lifetime(interaction: discord.Interaction, member: discord.Member):
-    admin_role = discord.utils.get(interaction.guild.roles, name=ADMIN_ROLE)
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
     if admin_role not in interaction.user.roles:
         await interaction.response.send_message("❌ You don’t have permission to do this.", ephemeral=True)
         return
 
-    lifetime_role = discord.utils.get(interaction.guild.roles, name=LIFETIME_ROLE)
+    lifetime_role = guild_cache.role(interaction.guild, LIFETIME_ROLE)
     if not lifetime_role:
         await interaction.response.send_message("⚠️ Lifetime role not found! Please create it in Discord.", ephemeral=True)
         return
 
-    await member.add_roles(lifetime_role)
-
-    # Remove trial/payer roles
-    trial_role = discord.utils.get(interaction.guild.roles, name=TRIAL_ROLE)
-    payer_role = discord.utils.get(interaction.guild.roles, name=PAYER_ROLE)
-    if trial_role in member.roles:
-        await member.remove_roles(trial_role)
-    if payer_role in member.roles:
-        await member.remove_roles(payer_role)
+    # Grant Lifetime and drop trial/payer in one edit
+    trial_role, payer_role = guild_cache.roles(interaction.guild, TRIAL_ROLE, PAYER_ROLE)
+    await transition(member, add=[lifetime_role], remove=[trial_role, payer_role])
 
     # Plex invite check
-    record = get_member(member.id)
+    record = await db.get_member(member.id)
     if record and record[4]:
         email = record[4]
         try:
-            server_name = plex.plex.friendlyName
-            normalized_server_name = server_name.lower().replace(" ", "").replace("-", "")
-            plex_user = next((u for u in plex.account.users() if u.email and u.email.lower() == email.lower()), None)
-            has_access = False
-
-            if plex_user:
-                for s in plex_user.servers:
-                    s_str = str(s).lower().replace(" ", "").replace("-", "")
-                    s_name = str(getattr(s, "name", "")).lower().replace(" ", "").replace("-", "")
-                    if normalized_server_name in s_str or normalized_server_name in s_name:
-                        has_access = True
-                        break
+            server_name = aplex.server_name
+            plex_user = (await aplex.users_by_email()).get(email.lower())
+            has_access = bool(plex_user and has_server_access(plex_user, server_name))
 
             if has_access:
                 await send_admin(f"🏅 {member.mention} marked as Lifetime — already has Plex access.")
@@ -532,7 +490,7 @@ async def mark_lifetime(interaction: discord.Interaction, member: discord.Member
                     ephemeral=True
                 )
             else:
-                result = plex.invite_user(email)
+                result = await aplex.invite_user(email)
                 if result == "sent":
                     await send_admin(f"🏅 {member.mention} marked as Lifetime — Plex invite sent to {email}.")
                     await interaction.response.send_message(
@@ -583,7 +541,7 @@ async def dm_all(
     image_url: str = "",
     footer: str = ""
 ):
-    admin_role = discord.utils.get(interaction.guild.roles, name=ADMIN_ROLE)
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
     if admin_role not in interaction.user.roles:
         await interaction.response.send_message("❌ You don’t have permission to do this.", ephemeral=True)
         return
@@ -593,6 +551,7 @@ async def dm_all(
     failed = 0
 
     await interaction.response.send_message("📨 Sending messages safely (this may take a while)...", ephemeral=True)
+    await member_cache.ensure_full(guild)
 
     # Prepare embed if required
     embed = None
@@ -637,17 +596,28 @@ async def dm_all(
 # ────────────────────────────────
 @bot.tree.command(name="maintenance", description="Admins only: cleanup expired data and compact DB.")
 async def maintenance(interaction: discord.Interaction):
-    """Remove expired members, compact DB, and archive logs."""
-    import sqlite3, shutil, datetime
-    from database import DB_PATH
-    admin_role = discord.utils.get(interaction.guild.roles, name=ADMIN_ROLE)
+    """Compact the DB and archive logs."""
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
     if admin_role not in interaction.user.roles:
         await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
         return
 
+    async def work(job):
+        job.progress = "Compacting the database and archiving logs…"
+        await run_blocking(_run_maintenance)
+        return "Maintenance complete — compacted DB and archived logs."
+
+    await jobs.start_job(interaction, "Maintenance", work)
+
+
+def _run_maintenance():
+    """Blocking half of /maintenance: VACUUM the DB and zip the logs."""
+    import sqlite3, shutil, datetime
+    from database import DB_PATH
+
+    # No member pruning here: rows without dates include lifetime members,
+    # sync/import placeholders and people mid-onboarding.
     conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("DELETE FROM members WHERE paid_until IS NULL AND trial_end IS NULL")
     conn.execute("VACUUM")
     conn.close()
 
@@ -655,4 +625,29 @@ async def maintenance(interaction: discord.Interaction):
     stamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     shutil.make_archive(f"exports/logs_backup_{stamp}", "zip", "logs")
 
-    await interaction.response.send_message("🧹 Maintenance complete — cleaned DB and archived logs.", ephemeral=True)
\ No newline at end of file
+
+# ────────────────────────────────
+# /jobs COMMAND
+# ────────────────────────────────
+@bot.tree.command(name="jobs", description="Admins only: List running and recently finished background jobs.")
+async def jobs_command(interaction: discord.Interaction):
+    admin_role = guild_cache.role(interaction.guild, ADMIN_ROLE)
+    if admin_role not in interaction.user.roles:
+        await interaction.response.send_message("❌ You don’t have permission.", ephemeral=True)
+        return
+
+    recent = jobs.snapshot()[:15]
+    if not recent:
+        await interaction.response.send_message("📭 No background jobs have run yet.", ephemeral=True)
+        return
+
+    icons = {"running": "⏳", "done": "✅", "failed": "⚠️"}
+    embed = discord.Embed(title="🧾 Background Jobs", color=discord.Color.blurple())
+    for j in recent:
+        detail = j["progress"] if j["status"] == "running" else (j["error"] or j["result"] or "")
+        embed.add_field(
+            name=f"{icons.get(j['status'], '•')} #{j['id']} {j['name']} — {j['elapsed']}s",
+            value=f"{detail[:200] or '-'}\nby {j['requested_by']} at {j['started_at']}",
+            inline=False,
+        )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -4,9 +4,10 @@ from discord import app_commands
 from bot import (
     client as bot,
     ADMIN_ROLE, INITIAL_ROLE, TRIAL_ROLE, PAYER_ROLE, LIFETIME_ROLE,
-    get_member, plex, send_admin, config
+    aplex, guild_cache, send_admin, config, member_cache
 )
-from database import is_promo_eligible, has_used_promo, get_referrals, get_referrer
+from bot.aio import db, run_blocking, has_server_access
+from bot.invite_tracker import tracker as invite_tracker
 
 import configparser
 
@@ -22,7 +23,7 @@ def get_server_name():
 async def status(interaction: discord.Interaction, member: discord.Member | None = None):
     requester = interaction.user
     guild = interaction.guild
-    admin_role = discord.utils.get(guild.roles, name=ADMIN_ROLE)
+    admin_role = guild_cache.role(guild, ADMIN_ROLE)
     target = member or requester
     is_admin = admin_role in requester.roles if admin_role else False
 
@@ -30,7 +31,7 @@ async def status(interaction: discord.Interaction, member: discord.Member | None
         await interaction.response.send_message("❌ You don't have permission to view others.", ephemeral=True)
         return
 
-    record = get_member(target.id)
+    record = await db.get_member(target.id)
     if not record:
         await interaction.response.send_message("⚠️ No record found for this member.", ephemeral=True)
         return
@@ -49,16 +50,11 @@ async def status(interaction: discord.Interaction, member: discord.Member | None
     plex_status = "❌ Not Invited"
     if email:
         try:
-            server_name = plex.plex.friendlyName
-            normalized_server_name = server_name.lower().replace(" ", "").replace("-", "")
-            plex_user = next((u for u in plex.account.users() if u.email and u.email.lower() == email.lower()), None)
+            server_name = aplex.server_name
+            plex_user = (await aplex.users_by_email()).get(email.lower())
 
             if plex_user:
-                has_access = any(
-                    normalized_server_name in str(getattr(s, "name", "")).lower().replace(" ", "").replace("-", "")
-                    or normalized_server_name in str(getattr(s, "title", "")).lower().replace(" ", "").replace("-", "")
-                    for s in getattr(plex_user, "servers", [])
-                )
+                has_access = has_server_access(plex_user, server_name)
                 plex_status = "✅ Active" if has_access else "🕓 Pending"
             else:
                 plex_status = "❌ Not Found"
@@ -70,7 +66,7 @@ async def status(interaction: discord.Interaction, member: discord.Member | None
     # ─────────────────────────────
     role_display = "Unknown"
     for r in [INITIAL_ROLE, TRIAL_ROLE, PAYER_ROLE, ADMIN_ROLE, LIFETIME_ROLE]:
-        if discord.utils.get(guild.roles, name=r) in target.roles:
+        if guild_cache.role(guild, r) in target.roles:
             role_display = r
             break
 
@@ -81,18 +77,18 @@ async def status(interaction: discord.Interaction, member: discord.Member | None
     # ─────────────────────────────
     # Promo & referral info
     # ─────────────────────────────
-    promo_used = "✅ Used" if has_used_promo(target.id) else "❌ Not Used"
-    eligible_promo = "✅ Eligible" if is_promo_eligible(target.id) else "❌ Not Eligible"
+    promo_used = "✅ Used" if await db.has_used_promo(target.id) else "❌ Not Used"
+    eligible_promo = "✅ Eligible" if await db.is_promo_eligible(target.id) else "❌ Not Eligible"
 
-    referrer_id = get_referrer(target.id)
-    referrals = get_referrals(target.id)
+    referrer_id = await db.get_referrer(target.id)
+    referrals = await db.get_referrals(target.id)
     referral_count = len(referrals)
     is_referrer = bool(record[15]) if len(record) > 15 else False
     referral_paid = "✅ Paid" if (len(record) > 16 and int(record[16]) == 1) else "💸 Awaiting"
 
     referrer_tag = "-"
     if referrer_id:
-        ref_member = guild.get_member(int(referrer_id))
+        ref_member = await member_cache.resolve(guild, referrer_id)
         referrer_tag = ref_member.display_name if ref_member else f"ID {referrer_id}"
 
     # ─────────────────────────────
@@ -133,7 +129,7 @@ async def status(interaction: discord.Interaction, member: discord.Member | None
 async def paylink(interaction: discord.Interaction, months: int, member: discord.Member | None = None):
     requester = interaction.user
     guild = interaction.guild
-    admin_role = discord.utils.get(guild.roles, name=ADMIN_ROLE)
+    admin_role = guild_cache.role(guild, ADMIN_ROLE)
     is_admin = admin_role in requester.roles if admin_role else False
 
     if months not in [1, 3, 6, 12]:
@@ -145,7 +141,7 @@ async def paylink(interaction: discord.Interaction, months: int, member: discord
         await interaction.response.send_message("❌ You can’t generate links for others.", ephemeral=True)
         return
 
-    record = get_member(target.id)
+    record = await db.get_member(target.id)
     if not record or not record[4]:
         await interaction.response.send_message(
             f"⚠️ No email found for {target.mention}. They must complete onboarding first.",
@@ -168,7 +164,7 @@ async def paylink(interaction: discord.Interaction, months: int, member: discord
     # Promo logic
     # ─────────────────────────────
     promo_enabled = cfg.has_section("Promo") and cfg["Promo"].getboolean("Enabled", False)
-    eligible_for_promo = promo_enabled and is_promo_eligible(target.id)
+    eligible_for_promo = promo_enabled and await db.is_promo_eligible(target.id)
     note = ""
     if eligible_for_promo:
         promo_key = f"Discount{months}Month" if months == 1 else f"Discount{months}Months"
@@ -195,7 +191,7 @@ async def paylink(interaction: discord.Interaction, months: int, member: discord
     # ─────────────────────────────
     try:
         dm = await target.create_dm()
-        SERVER_NAME = get_server_name()
+        SERVER_NAME = await run_blocking(get_server_name)
         embed = discord.Embed(title=f"💳 {SERVER_NAME} — Payment Link", color=discord.Color.gold())
         embed.add_field(name="Duration", value=f"{months} month(s)", inline=True)
         embed.add_field(name="Price", value=f"{price} {currency}", inline=True)
@@ -221,13 +217,18 @@ async def paylink(interaction: discord.Interaction, months: int, member: discord
             ephemeral=True
         )
 
+def _write_qr(url: str, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    qrcode.make(url).save(path)
+
+
 # ────────────────────────────────
 # /referral COMMAND (channel-restricted + DM delivery)
 # ────────────────────────────────
 @bot.tree.command(name="referral", description="Generate your personal one-time referral invite (sent via DM).")
 async def referral(interaction: discord.Interaction):
-    SERVER_NAME = get_server_name()
     """Allow members to request their referral link only in the designated channel, then DM it to them."""
+    SERVER_NAME = await run_blocking(get_server_name)
     user = interaction.user
     guild = interaction.guild or bot.guilds[0]
 
@@ -243,12 +244,11 @@ async def referral(interaction: discord.Interaction):
 
     await interaction.response.defer(ephemeral=True)
 
-    # Check for existing valid invite
-    existing_invites = await guild.invites()
-    existing = next((i for i in existing_invites if i.inviter and i.inviter.id == user.id), None)
+    # Check for existing valid invite (tracked in memory, no REST call)
+    existing = invite_tracker.invite_for(guild.id, user.id)
 
     if existing:
-        invite_url = existing.url
+        invite_url = existing["url"]
     else:
         # Default to first text channel if not specified
         target_channel = guild.get_channel(allowed_channel_id) or guild.text_channels[0]
@@ -257,14 +257,12 @@ async def referral(interaction: discord.Interaction):
             unique=True,
             reason=f"Referral invite by {user.name} ({user.id})"
         )
+        invite_tracker.add(invite)
         invite_url = invite.url
 
     # Generate QR for the invite link
-    os.makedirs("exports", exist_ok=True)
     qr_path = f"exports/referral_{user.id}.png"
-    qrcode.make(invite_url).save(qr_path)
-
-    SERVER_NAME = get_server_name()
+    await run_blocking(_write_qr, invite_url, qr_path)
 
     embed = discord.Embed(
     title=f"🤝 Your {SERVER_NAME} Referral Invite",
@@ -5,11 +5,14 @@ from loghelper import logger
 
 # Optional import: only if bot is running
 try:
-    from bot import bot
+    from bot import bot, guild_cache, member_cache
+    from bot.role_transitions import set_access_role
     import discord
 except Exception:
     bot = None
     discord = None
+    guild_cache = None
+    member_cache = None
 
 CONFIG_PATH = os.path.join("config", "config.ini")
 config = configparser.ConfigParser()
@@ -57,24 +60,16 @@ async def _update_role_async(member, role_name: str):
     initial, trial, payer, lifetime = _get_config_roles()
     all_names = [initial, trial, payer, lifetime]
 
-    # Build list of existing access roles to remove
-    roles_to_remove = [
-        discord.utils.get(member.guild.roles, name=rname)
-        for rname in all_names
-    ]
-    roles_to_remove = [r for r in roles_to_remove if r and r in member.roles]
-
-    # Remove old access roles
-    if roles_to_remove:
-        await member.remove_roles(*roles_to_remove, reason="Casharr status update")
-
-    # Add new role
-    new_role = discord.utils.get(member.guild.roles, name=role_name)
-    if new_role:
-        await member.add_roles(new_role, reason="Casharr status update")
-        logger.info(f"✅ Updated Discord role → {role_name} for {member.display_name}")
-    else:
+    # Resolve the access roles (cached per guild)
+    access_roles = guild_cache.roles(member.guild, *all_names)
+    new_role = guild_cache.role(member.guild, role_name)
+
+    # Swap access roles in a single edit (no-op if already correct)
+    changed = await set_access_role(member, new_role, access_roles)
+    if not new_role:
         logger.warning(f"⚠️ Role '{role_name}' not found in Discord.")
+    elif changed:
+        logger.info(f"✅ Updated Discord role → {role_name} for {member.display_name}")
 
 
 def apply_role(discord_id: int, role_name: str):
@@ -82,16 +77,11 @@ def apply_role(discord_id: int, role_name: str):
     if not is_enabled() or not bot:
         return
     try:
-        member = None
-        for g in bot.guilds:
-            member = g.get_member(int(discord_id))
+        async def _apply():
+            _, member = await member_cache.find(discord_id, bot.guilds)
             if member:
-                break
-        if member:
-            asyncio.run_coroutine_threadsafe(
-                _update_role_async(member, role_name),
-                bot.loop
-            )
+                await _update_role_async(member, role_name)
+        asyncio.run_coroutine_threadsafe(_apply(), bot.loop)
     except Exception as e:
         logger.error(f"⚠️ Failed to apply Discord role: {e}")
 
@@ -101,15 +91,13 @@ def dm(discord_id: int, message: str):
         return
     try:
         async def _dm():
-            for g in bot.guilds:
-                member = g.get_member(int(discord_id))
-                if member:
-                    try:
-                        await member.send(message)
-                        logger.info(f"✉️ DM sent to {member.display_name}")
-                    except Exception as err:
-                        logger.warning(f"⚠️ Couldn’t DM {member}: {err}")
-                    break
+            _, member = await member_cache.find(discord_id, bot.guilds)
+            if member:
+                try:
+                    await member.send(message)
+                    logger.info(f"✉️ DM sent to {member.display_name}")
+                except Exception as err:
+                    logger.warning(f"⚠️ Couldn’t DM {member}: {err}")
         asyncio.run_coroutine_threadsafe(_dm(), bot.loop)
     except Exception as e:
         logger.error(f"⚠️ DM send failed: {e}")
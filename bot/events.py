@@ -6,17 +6,14 @@ import traceback
 from ipnserver import app
 from loghelper import logger
 from bot import (
-    bot, plex, WELCOME_MESSAGE, INITIAL_ROLE, TRIAL_DAYS,
-    send_admin, save_member, start_trial, check_and_upgrade_after_invite,
-    REMINDERS_ENABLED, config
+    bot, INITIAL_ROLE, send_admin,
+    REMINDERS_ENABLED, guild_cache, config
 )
-from database import get_member, set_referrer
-
-
-# ─────────────────────────────
-# Cache of invites for referral tracking
-# ─────────────────────────────
-invite_cache: dict[int, list[discord.Invite]] = {}
+from bot.aio import db
+from bot import loop_monitor
+from bot.invite_tracker import tracker as invite_tracker
+from bot.role_transitions import transition
+from bot import onboarding, member_sync, member_cache, command_sync
 
 
 @bot.event
@@ -24,6 +21,27 @@ async def on_ready():
     """Run startup routines once the bot is connected."""
     logger.info("✅ Logged in as %s", bot.user)
 
+    # Loop-lag watchdog (no-op on reconnects / when disabled)
+    loop_monitor.start()
+
+    # Lazy member cache: pull in only DB-linked members / open onboarding sessions
+    member_cache.mark_ready()
+    if member_cache.LAZY:
+        linked = set(await db.get_member_snapshots())
+        linked.update(str(r["discord_id"]) for r in await db.get_onboarding_sessions())
+        await member_cache.warm(bot.guilds, linked)
+
+    # Role / member lookup cache (rebuilt on every (re)connect)
+    for g in bot.guilds:
+        guild_cache.index_guild(g)
+    member_cache.finish_startup(bot.guilds)
+
+    # Reload open onboarding sessions (first connect only)
+    await onboarding.load()
+
+    # Incremental discord_tag / discord_roles snapshots
+    member_sync.start()
+
 
 
 
@@ -44,24 +62,19 @@ async def on_ready():
         await send_admin("✅ PayPal IPN listener started automatically.")
 
     # ─────────────────────────────
-    # Cache current invites for referral tracking
+    # Snapshot current invites for referral tracking
     # ─────────────────────────────
     for g in bot.guilds:
         try:
-            invite_cache[g.id] = await g.invites()
-            logger.info("📨 Cached invites for %s", g.name)
+            await invite_tracker.load(g)
         except Exception as e:
             logger.warning("⚠️ Could not cache invites for %s: %s", g.name, e)
 
     # ─────────────────────────────
-    # Sync slash commands (verbose debug)
+    # Sync slash commands (only scopes whose command hash changed)
     # ─────────────────────────────
-    logger.info("⚙️ Starting slash command sync...")
     try:
-        synced = await bot.tree.sync()
-        logger.info("✅ Slash commands synced successfully: %d commands.", len(synced))
-        for cmd in synced:
-            logger.info(f"🔹 Synced: /{cmd.name}")
+        await command_sync.sync_if_changed(bot)
     except Exception as e:
         tb = "".join(traceback.format_exception(type(e), e, e.__traceback__))
         logger.error(f"❌ Slash command sync failed:\n{tb}")
@@ -79,6 +92,89 @@ async def on_ready():
 
 
 
+# ─────────────────────────────
+# Shard lifecycle (AutoSharded mode only)
+# ─────────────────────────────
+@bot.event
+async def on_shard_ready(shard_id: int):
+    logger.info("🧩 Shard %d ready.", shard_id)
+
+
+@bot.event
+async def on_shard_disconnect(shard_id: int):
+    logger.warning("⚠️ Shard %d disconnected.", shard_id)
+
+
+# ─────────────────────────────
+# Invite tracking
+# ─────────────────────────────
+@bot.event
+async def on_invite_create(invite: discord.Invite):
+    invite_tracker.add(invite)
+
+
+@bot.event
+async def on_invite_delete(invite: discord.Invite):
+    invite_tracker.remove(invite)
+
+
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    guild_cache.index_guild(guild)
+    try:
+        await invite_tracker.load(guild)
+    except Exception as e:
+        logger.warning("⚠️ Could not cache invites for %s: %s", guild.name, e)
+
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    invite_tracker.forget_guild(guild.id)
+    guild_cache.forget_guild(guild.id)
+
+
+# ─────────────────────────────
+# Role / member cache upkeep
+# ─────────────────────────────
+@bot.event
+async def on_guild_role_create(role: discord.Role):
+    guild_cache.index_roles(role.guild)
+
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    guild_cache.index_roles(role.guild)
+
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    if before.name != after.name:
+        guild_cache.index_roles(after.guild)
+
+
+@bot.event
+async def on_member_update(before: discord.Member, after: discord.Member):
+    guild_cache.add_member(after)
+    if before.roles != after.roles:
+        member_sync.note(after)
+
+
+@bot.event
+async def on_user_update(before: discord.User, after: discord.User):
+    if before.name != after.name or before.discriminator != after.discriminator:
+        _, member = guild_cache.find_member(after.id)
+        if member:
+            member_sync.note(member)
+
+
+@bot.event
+async def on_member_remove(member: discord.Member):
+    guild_cache.remove_member(member, bot.guilds)
+    member_sync.note(member, removed=True)
+    if not member.bot:
+        await db.record_event("discord_leave", member.id, f"{member} left {member.guild.name}")
+
+
 @bot.event
 async def on_member_join(member: discord.Member):
     """Automatic onboarding, referral detection, and trial start for new users."""
@@ -87,39 +183,33 @@ async def on_member_join(member: discord.Member):
 
     logger.info("👋 Member joined: %s (%s)", member.name, member.id)
     guild = member.guild
+    await db.record_event("discord_join", member.id, f"{member} joined {guild.name}")
+    guild_cache.add_member(member)
+    member_sync.note(member)
 
     # Assign initial role
-    initial_role = discord.utils.get(guild.roles, name=INITIAL_ROLE)
+    initial_role = guild_cache.role(guild, INITIAL_ROLE)
     if initial_role:
-        await member.add_roles(initial_role)
+        await transition(member, add=[initial_role])
         logger.info("✅ Assigned initial role '%s' to %s", INITIAL_ROLE, member.name)
 
     # ─────────────────────────────
     # Detect referral invite usage
     # ─────────────────────────────
     referrer_id = None
-    used_invite = None
     try:
-        invites_before = invite_cache.get(guild.id, [])
-        invites_after = await guild.invites()
-        for inv in invites_before:
-            after_inv = next((x for x in invites_after if x.code == inv.code), None)
-            if after_inv and inv.uses < after_inv.uses:
-                used_invite = inv
-                break
-        invite_cache[guild.id] = invites_after  # refresh cache
-
-        if used_invite and used_invite.inviter:
-            referrer_id = str(used_invite.inviter.id)
-            await send_admin(f"🤝 {member.mention} joined using {used_invite.inviter.mention}'s referral invite.")
-            set_referrer(member.id, referrer_id)
+        used_invite = await invite_tracker.resolve_join(guild)
+        if used_invite and used_invite["inviter_id"]:
+            referrer_id = str(used_invite["inviter_id"])
+            await send_admin(f"🤝 {member.mention} joined using <@{referrer_id}>'s referral invite.")
+            await db.set_referrer(member.id, referrer_id)
     except Exception as e:
         logger.error("⚠️ Referral invite check failed for %s: %s", member.name, e)
 
     # ─────────────────────────────
     # Skip trial for returning members
     # ─────────────────────────────
-    existing = get_member(member.id)
+    existing = await db.get_member(member.id)
     if existing:
         await send_admin(f"ℹ️ {member.mention} rejoined; existing DB record found. No new trial started.")
         return
@@ -127,75 +217,13 @@ async def on_member_join(member: discord.Member):
     # ─────────────────────────────
     # Onboard user via DM (new members only)
     # ─────────────────────────────
-    try:
-        dm = await member.create_dm()
-        await dm.send(WELCOME_MESSAGE.format(user=member.name))
-        logger.info("💬 Sent welcome message to %s", member.name)
-
-        questions = [
-            "What is your **first name**?",
-            "What is your **last name**?",
-            "What is the **email you used for Plex**?",
-            "What is your **mobile number**?"
-        ]
-        answers = []
-
-        for q in questions:
-            await dm.send(q)
-
-            def check(m):
-                return m.author == member and isinstance(m.channel, discord.DMChannel)
-
-            msg = await bot.wait_for("message", check=check, timeout=300)
-            answers.append(msg.content.strip())
-
-        first, last, email, mobile = answers
-        tag = f"{member.name}#{member.discriminator}" if member.discriminator else member.name
-
-        save_member(member.id, first, last, email, mobile, discord_tag=tag)
-        logger.info("💾 Saved new member info for %s (email: %s)", member.name, email)
+    await onboarding.start(member, "join", referrer_id=referrer_id)
 
-        # Referral acknowledgment
-        if referrer_id:
-            await dm.send(
-                "🎁 You joined via a referral invite! Your referrer will earn bonus days when you subscribe."
-            )
-
-        # Plex Invite + Trial Setup
-        logger.info("📨 Inviting %s to Plex", email)
-        try:
-            plex.invite_user(email)
-        except Exception as e:
-            logger.warning("⚠️ Could not send Plex invite to %s: %s", email, e)
-
-        await asyncio.sleep(5)
-        await check_and_upgrade_after_invite(member, email)
-
-        logger.info("🧪 Starting %d-day trial for %s", TRIAL_DAYS, member.name)
-        start_trial(member.id, TRIAL_DAYS)
-
-        await dm.send("✅ Your details are saved and a Plex invite has been sent.")
-        await send_admin(f"🧪 Trial started for {member.mention} ({email}).")
-
-    except asyncio.TimeoutError:
-        logger.warning("⏳ %s did not answer onboarding questions in time.", member.name)
-        await send_admin(f"⚠️ {member.mention} did not complete onboarding questions.")
-    except Exception as e:
-        logger.error("⚠️ Onboarding failed for %s: %s", member.name, e)
-        await send_admin(f"⚠️ Onboarding failed for {member.mention}: {type(e).__name__}: {e}")
-try:
-    from bot.commands.admin_commands import load_pending, _collect_member_details
-except Exception:
-    pass  # prevent duplicate command registration
 
 @bot.event
 async def on_message(message: discord.Message):
-    """Handle late replies for persistent /request_details sessions."""
+    """Route DM replies into the sender's onboarding session (join or /request_details)."""
     if message.author.bot or not isinstance(message.channel, discord.DMChannel):
         return
 
-    pending = load_pending()
-    user_id = str(message.author.id)
-    if user_id in pending:
-        stage = pending[user_id]
-        await _collect_member_details(message.author, resume_stage=stage)
+    await onboarding.handle_dm(message)
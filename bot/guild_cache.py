@@ -0,0 +1,81 @@
+# bot/guild_cache.py
+import discord
+
+# ─────────────────────────────
+# Role / member resolution cache
+# ─────────────────────────────
+# role name -> Role per guild, and member id -> (guild, member) across all
+# guilds. Rebuilt from the on_guild_role_* / on_member_* events in
+# bot/events.py so hot paths (enforcement, audit, WebUI) never scan
+# guild.roles or loop over bot.guilds. Read from the Flask threads too;
+# updates only replace whole dict entries so readers never see a partial map.
+
+
+class GuildCache:
+    def __init__(self):
+        self._roles: dict[int, dict[str, discord.Role]] = {}
+        self._members: dict[int, tuple[discord.Guild, discord.Member]] = {}
+
+    # ─────────────────────────────
+    # Roles
+    # ─────────────────────────────
+    def index_roles(self, guild: discord.Guild):
+        self._roles[guild.id] = {r.name: r for r in guild.roles}
+
+    def role(self, guild: discord.Guild | None, name: str) -> discord.Role | None:
+        if guild is None:
+            return None
+        by_name = self._roles.get(guild.id)
+        if by_name is None:
+            self.index_roles(guild)
+            by_name = self._roles[guild.id]
+        return by_name.get(name)
+
+    def roles(self, guild: discord.Guild | None, *names: str) -> tuple:
+        return tuple(self.role(guild, n) for n in names)
+
+    # ─────────────────────────────
+    # Members
+    # ─────────────────────────────
+    def add_member(self, member: discord.Member):
+        if member.bot:
+            return
+        current = self._members.get(member.id)
+        # Keep the first guild we saw the member in; refresh its Member object
+        if current is None or current[0].id == member.guild.id:
+            self._members[member.id] = (member.guild, member)
+
+    def remove_member(self, member: discord.Member, guilds=()):
+        current = self._members.get(member.id)
+        if current is None or current[0].id != member.guild.id:
+            return
+        del self._members[member.id]
+        # Still in another guild? (rare; only on multi-guild installs)
+        for g in guilds:
+            other = g.get_member(member.id) if g.id != member.guild.id else None
+            if other:
+                self._members[member.id] = (g, other)
+                break
+
+    def find_member(self, discord_id) -> tuple:
+        """(guild, member) for a Discord id, or (None, None)."""
+        try:
+            return self._members.get(int(discord_id), (None, None))
+        except (TypeError, ValueError):
+            return None, None
+
+    # ─────────────────────────────
+    # Whole-guild (re)builds
+    # ─────────────────────────────
+    def index_guild(self, guild: discord.Guild):
+        self.index_roles(guild)
+        for m in guild.members:
+            self.add_member(m)
+
+    def forget_guild(self, guild_id: int):
+        self._roles.pop(guild_id, None)
+        for member_id in [mid for mid, (g, _) in self._members.items() if g.id == guild_id]:
+            del self._members[member_id]
+
+
+cache = GuildCache()
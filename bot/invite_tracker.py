@@ -0,0 +1,179 @@
+# bot/invite_tracker.py
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import discord
+from loghelper import logger
+
+# ─────────────────────────────
+# Invite tracker (referral attribution)
+# ─────────────────────────────
+# Per guild we keep {code: entry} plus an inviter -> codes index, updated by
+# on_invite_create / on_invite_delete. A join fetches the guild's invites
+# once and compares use counts by code, under a per-guild lock so
+# concurrent joins are attributed one at a time against the state the
+# previous join left behind.
+#
+# One-use referral invites are deleted by Discord as soon as they are used,
+# so a deleted invite is kept as a short-lived tombstone and can still be
+# matched to the join that exhausted it.
+
+TOMBSTONE_TTL = 120  # seconds a deleted invite stays attributable
+
+
+def _entry(invite: discord.Invite) -> dict:
+    return {
+        "code": invite.code,
+        "uses": invite.uses or 0,
+        "max_uses": invite.max_uses or 0,
+        "inviter_id": invite.inviter.id if invite.inviter else None,
+        "url": invite.url,
+        "expires_at": invite.expires_at,
+    }
+
+
+def _usable(entry: dict) -> bool:
+    if entry["max_uses"] and entry["uses"] >= entry["max_uses"]:
+        return False
+    expires = entry["expires_at"]
+    return not expires or expires > datetime.now(timezone.utc)
+
+
+class InviteTracker:
+    def __init__(self):
+        self._invites: dict[int, dict[str, dict]] = {}
+        self._by_inviter: dict[int, dict[int, set[str]]] = {}
+        self._tombstones: dict[int, dict[str, tuple[dict, float]]] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+        self._loaded: set[int] = set()  # guilds with a complete snapshot from load()
+
+    def _lock(self, guild_id: int) -> asyncio.Lock:
+        lock = self._locks.get(guild_id)
+        if lock is None:
+            lock = self._locks[guild_id] = asyncio.Lock()
+        return lock
+
+    # ─────────────────────────────
+    # Index maintenance
+    # ─────────────────────────────
+    def _put(self, guild_id: int, entry: dict):
+        codes = self._invites.setdefault(guild_id, {})
+        old = codes.get(entry["code"])
+        if old and old["inviter_id"] != entry["inviter_id"]:
+            self._by_inviter.get(guild_id, {}).get(old["inviter_id"], set()).discard(entry["code"])
+        codes[entry["code"]] = entry
+        if entry["inviter_id"] is not None:
+            self._by_inviter.setdefault(guild_id, {}).setdefault(entry["inviter_id"], set()).add(entry["code"])
+
+    def _drop(self, guild_id: int, code: str) -> dict | None:
+        entry = self._invites.get(guild_id, {}).pop(code, None)
+        if entry and entry["inviter_id"] is not None:
+            owned = self._by_inviter.get(guild_id, {}).get(entry["inviter_id"])
+            if owned is not None:
+                owned.discard(code)
+                if not owned:
+                    del self._by_inviter[guild_id][entry["inviter_id"]]
+        return entry
+
+    def _bury(self, guild_id: int, entry: dict):
+        now = time.monotonic()
+        graves = self._tombstones.setdefault(guild_id, {})
+        graves[entry["code"]] = (entry, now)
+        for code in [c for c, (_, ts) in graves.items() if now - ts > TOMBSTONE_TTL]:
+            del graves[code]
+
+    async def load(self, guild: discord.Guild):
+        """Full snapshot of a guild's invites (startup / guild join only)."""
+        async with self._lock(guild.id):
+            invites = await guild.invites()
+            self._invites[guild.id] = {}
+            self._by_inviter[guild.id] = {}
+            for inv in invites:
+                self._put(guild.id, _entry(inv))
+            self._loaded.add(guild.id)
+        logger.info("📨 Tracking %d invites for %s", len(invites), guild.name)
+
+    def add(self, invite: discord.Invite):
+        """on_invite_create / invites we create ourselves."""
+        if invite.guild is None:
+            return
+        self._put(invite.guild.id, _entry(invite))
+
+    def remove(self, invite: discord.Invite):
+        """on_invite_delete: keep a tombstone so an exhausted one-use invite can still be attributed."""
+        if invite.guild is None:
+            return
+        entry = self._drop(invite.guild.id, invite.code)
+        if entry:
+            self._bury(invite.guild.id, entry)
+
+    def forget_guild(self, guild_id: int):
+        for table in (self._invites, self._by_inviter, self._tombstones, self._locks):
+            table.pop(guild_id, None)
+        self._loaded.discard(guild_id)
+
+    # ─────────────────────────────
+    # Lookups
+    # ─────────────────────────────
+    def invite_for(self, guild_id: int, user_id: int) -> dict | None:
+        """Existing usable invite created by this user, from memory."""
+        codes = self._invites.get(guild_id, {})
+        for code in self._by_inviter.get(guild_id, {}).get(user_id, ()):
+            entry = codes.get(code)
+            if entry and _usable(entry):
+                return entry
+        return None
+
+    async def resolve_join(self, guild: discord.Guild) -> dict | None:
+        """Return the invite entry a new member most likely used, or None."""
+        async with self._lock(guild.id):
+            known = self._invites.setdefault(guild.id, {})
+            try:
+                fresh = {inv.code: inv for inv in await guild.invites()}
+            except (discord.Forbidden, discord.HTTPException) as e:
+                logger.warning("⚠️ Could not fetch invites for %s: %s", guild.name, e)
+                fresh = None
+
+            used = None
+            if fresh is not None:
+                # Only the attributed invite advances by one use, so if two
+                # members joined between fetches the second join still sees
+                # the other invite's pending use.
+                for code, inv in fresh.items():
+                    entry = known.get(code)
+                    if entry is None:
+                        entry = _entry(inv)
+                        if guild.id in self._loaded:
+                            # Created after the snapshot without an on_invite_create
+                            entry["uses"] = 0
+                        # else: no snapshot to compare with, so its uses are
+                        # history; take them as the baseline and attribute nothing
+                        self._put(guild.id, entry)
+                    if used is None and (inv.uses or 0) > entry["uses"]:
+                        entry["uses"] += 1
+                        used = entry
+                # Invites that vanished without an on_invite_delete yet
+                for code in [c for c in known if c not in fresh]:
+                    self._bury(guild.id, self._drop(guild.id, code))
+
+            if used is None:
+                used = self._claim_tombstone(guild.id)
+            return used
+
+    def _claim_tombstone(self, guild_id: int) -> dict | None:
+        """Attribute the join to a recently deleted invite that was one use from exhaustion."""
+        graves = self._tombstones.get(guild_id, {})
+        now = time.monotonic()
+        for code, (entry, ts) in list(graves.items()):
+            if now - ts > TOMBSTONE_TTL:
+                del graves[code]
+                continue
+            if entry["max_uses"] and entry["uses"] + 1 >= entry["max_uses"]:
+                del graves[code]
+                entry["uses"] += 1
+                return entry
+        return None
+
+
+tracker = InviteTracker()
@@ -0,0 +1,126 @@
+# bot/jobs.py
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import discord
+from loghelper import logger
+
+# ─────────────────────────────
+# Background jobs for slash commands
+# ─────────────────────────────
+# Long-running commands defer straight away (well inside Discord's 3s
+# deadline), run their work as a tracked asyncio task and stream progress
+# into the deferred response. Work functions set `job.progress` from the
+# loop or from executor threads; a reporter coroutine pushes changes to
+# Discord at most every PROGRESS_EVERY seconds.
+
+PROGRESS_EVERY = 2.0
+MAX_HISTORY = 50
+# Interaction tokens expire after 15 minutes; stop editing just before
+EDIT_WINDOW = 14 * 60
+
+JOBS: "OrderedDict[int, Job]" = OrderedDict()
+_ids = itertools.count(1)
+
+
+class Job:
+    def __init__(self, name: str, requested_by: str):
+        self.id = next(_ids)
+        self.name = name
+        self.requested_by = requested_by
+        self.status = "running"
+        self.progress = "Starting…"
+        self.result = None
+        self.error = None
+        self.started = time.monotonic()
+        self.started_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+        self.finished_at = None
+        self.task = None
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "requested_by": self.requested_by,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed": round(self.elapsed, 1),
+        }
+
+
+def _remember(job: Job):
+    JOBS[job.id] = job
+    while len(JOBS) > MAX_HISTORY:
+        oldest = next(iter(JOBS.values()))
+        if oldest.status == "running":
+            break
+        JOBS.popitem(last=False)
+
+
+async def _edit(interaction: discord.Interaction, job: Job, text: str):
+    if job.elapsed > EDIT_WINDOW:
+        return
+    try:
+        await interaction.edit_original_response(content=text)
+    except discord.HTTPException as e:
+        logger.debug("Job #%d progress edit failed: %s", job.id, e)
+
+
+async def _report(interaction: discord.Interaction, job: Job):
+    shown = None
+    while job.status == "running":
+        if job.progress != shown:
+            shown = job.progress
+            await _edit(interaction, job, f"⏳ **{job.name}** (job #{job.id}) — {shown}")
+        await asyncio.sleep(PROGRESS_EVERY)
+
+
+async def _run(interaction: discord.Interaction, job: Job, work):
+    reporter = asyncio.create_task(_report(interaction, job))
+    try:
+        job.result = await work(job) or "Done."
+        job.status = "done"
+        final = f"✅ **{job.name}** (job #{job.id}) — {job.result}"
+    except Exception as e:
+        job.status = "failed"
+        job.error = f"{type(e).__name__}: {e}"
+        final = f"⚠️ **{job.name}** (job #{job.id}) failed: {job.error}"
+        logger.error("⚠️ Job #%d %s failed: %s", job.id, job.name, job.error)
+    finally:
+        job.finished_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+        reporter.cancel()
+    await _edit(interaction, job, final)
+    logger.info("🧾 Job #%d %s %s in %.1fs", job.id, job.name, job.status, job.elapsed)
+
+
+async def start_job(interaction: discord.Interaction, name: str, work, ephemeral: bool = True) -> Job:
+    """Defer the interaction and run `await work(job)` in the background.
+
+    `work` returns the final status line; it may update `job.progress` as it goes.
+    """
+    if not interaction.response.is_done():
+        await interaction.response.defer(ephemeral=ephemeral, thinking=True)
+    job = Job(name, str(interaction.user))
+    _remember(job)
+    job.task = asyncio.create_task(_run(interaction, job, work), name=f"casharr-job-{job.id}")
+    return job
+
+
+def running() -> list[Job]:
+    return [j for j in JOBS.values() if j.status == "running"]
+
+
+def snapshot() -> list[dict]:
+    """Newest first, JSON-safe."""
+    return [j.summary() for j in reversed(JOBS.values())]
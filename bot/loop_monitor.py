@@ -0,0 +1,200 @@
+# bot/loop_monitor.py
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+
+from loghelper import logger
+from bot import config
+
+# ─────────────────────────────
+# Event-loop lag watchdog
+# ─────────────────────────────
+# A heartbeat coroutine sleeps for a fixed interval and records how late it
+# wakes up (loop lag). A watchdog thread watches the heartbeat; if the loop
+# has not ticked within the stall threshold it grabs the loop thread's
+# current stack, i.e. the callback that is blocking it.
+
+# Histogram bucket upper bounds in milliseconds (last bucket is +Inf)
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _stack_of(frame, limit: int = 15) -> list[str]:
+    """Format a frame's stack, dropping the asyncio dispatch frames above the callback."""
+    summary = traceback.extract_stack(frame)
+    events_py = os.path.join("asyncio", "events.py")
+    for i in range(len(summary) - 1, -1, -1):
+        if summary[i].filename.endswith(events_py):
+            summary = summary[i + 1:]
+            break
+    return traceback.format_list(summary[-limit:])
+
+
+class LoopMonitor:
+    def __init__(self, interval_ms: int = 250, threshold_ms: int = 100,
+                 max_stalls: int = 50, window: int = 1200):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.counts = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.recent = deque(maxlen=window)  # last N lag samples (seconds)
+        self.stalls = deque(maxlen=max_stalls)
+        self.stall_total = 0
+        self.started_at = None
+
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_thread_id = None
+        self._last_tick = time.monotonic()
+        self._open_stall = None
+        self._task = None
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, cfg):
+        return cls(
+            interval_ms=cfg.getint("Monitor", "IntervalMs", fallback=250),
+            threshold_ms=cfg.getint("Monitor", "StallThresholdMs", fallback=100),
+            max_stalls=cfg.getint("Monitor", "MaxStalls", fallback=50),
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the heartbeat on the running loop and the watchdog thread (idempotent)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self.started_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+        self._task = self._loop.create_task(self._heartbeat(), name="casharr-loop-monitor")
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._watchdog, daemon=True, name="LoopWatchdog")
+            self._thread.start()
+        logger.info(
+            "🩺 Loop monitor started (interval %dms, stall threshold %dms).",
+            self.interval * 1000, self.threshold * 1000,
+        )
+
+    # ─────────────────────────────
+    # Heartbeat (runs on the loop)
+    # ─────────────────────────────
+    async def _heartbeat(self):
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._record(max(0.0, now - before - self.interval))
+            self._last_tick = now
+
+    def _record(self, lag: float):
+        lag_ms = lag * 1000
+        idx = next((i for i, b in enumerate(LAG_BUCKETS_MS) if lag_ms <= b), len(LAG_BUCKETS_MS))
+        with self._lock:
+            self.counts[idx] += 1
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            self.recent.append(lag)
+            stall, self._open_stall = self._open_stall, None
+        if stall is not None:
+            stall["blocked_ms"] = round(lag_ms, 1)
+            logger.warning(
+                "🐢 Event loop blocked for ~%dms in %s",
+                stall["blocked_ms"], stall["where"],
+            )
+
+    # ─────────────────────────────
+    # Watchdog (separate thread)
+    # ─────────────────────────────
+    def _watchdog(self):
+        captured_tick = None
+        poll = max(self.threshold / 2, 0.01)
+        while True:
+            time.sleep(poll)
+            if not self.running:
+                continue
+            tick = self._last_tick
+            if tick == captured_tick:
+                continue
+            overdue = time.monotonic() - tick - self.interval
+            if overdue < self.threshold:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = _stack_of(frame)
+            del frame
+            where = stack[-1].strip().splitlines()[0] if stack else "unknown"
+            stall = {
+                "time": datetime.now().isoformat(sep=" ", timespec="seconds"),
+                "blocked_ms": None,  # filled in once the loop wakes up
+                "where": where,
+                "stack": "".join(stack),
+            }
+            with self._lock:
+                self.stalls.appendleft(stall)
+                self.stall_total += 1
+                self._open_stall = stall
+            captured_tick = tick
+
+    # ─────────────────────────────
+    # Reporting
+    # ─────────────────────────────
+    def snapshot(self) -> dict:
+        """JSON-safe summary: histogram, percentiles over the recent window, recent stalls."""
+        with self._lock:
+            counts = list(self.counts)
+            samples = self.samples
+            total = self.total_lag
+            max_lag = self.max_lag
+            recent = sorted(self.recent)
+            stalls = [dict(s) for s in self.stalls]
+            stall_total = self.stall_total
+
+        def pct(p):
+            if not recent:
+                return None
+            return round(recent[min(len(recent) - 1, int(p / 100 * len(recent)))] * 1000, 2)
+
+        histogram = [{"le": b, "count": c} for b, c in zip(LAG_BUCKETS_MS, counts)]
+        histogram.append({"le": "+Inf", "count": counts[-1]})
+
+        from bot.aio import _io_pool
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "interval_ms": round(self.interval * 1000),
+            "threshold_ms": round(self.threshold * 1000),
+            "samples": samples,
+            "mean_ms": round(total / samples * 1000, 2) if samples else None,
+            "max_ms": round(max_lag * 1000, 2),
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "p99_ms": pct(99),
+            "window_samples": len(recent),
+            "histogram": histogram,
+            "stall_count": stall_total,
+            "stalls": stalls,
+            "io_queue": _io_pool._work_queue.qsize(),
+        }
+
+
+monitor = LoopMonitor.from_config(config)
+MONITOR_ENABLED = config.getboolean("Monitor", "Enabled", fallback=True)
+
+
+def start():
+    """Start the monitor if enabled in config. Call from inside the bot's loop."""
+    if MONITOR_ENABLED:
+        monitor.start()
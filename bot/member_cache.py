@@ -0,0 +1,185 @@
+# bot/member_cache.py
+import configparser
+import os
+import time
+from collections import OrderedDict
+
+import discord
+from loghelper import logger
+from bot.guild_cache import cache as guild_cache
+
+# ─────────────────────────────
+# Member cache policy
+# ─────────────────────────────
+# [Discord] MemberCache:
+#   full — chunk every guild at startup and keep every member (default)
+#   lazy — no startup chunking; only members Casharr cares about (those
+#          with a DB record, plus anyone who joins while connected) are
+#          loaded, via gateway member queries. Anything else is fetched on
+#          demand through a bounded LRU. Commands that genuinely need the
+#          whole guild call ensure_full() first.
+#
+# A DB-linked id the warm-up query did not find is simply not in that guild
+# (joins arrive through the gateway), so that miss is final. Other misses are
+# remembered in a separate negative cache. Periodic loops pass fetch=False and
+# never fall back to per-row REST calls.
+#
+# Startup time and RSS are recorded in both modes (stats()).
+
+CONFIG_PATH = os.path.join("config", "config.ini")
+_cfg = configparser.ConfigParser()
+_cfg.read(CONFIG_PATH, encoding="utf-8")
+
+MODE = _cfg.get("Discord", "MemberCache", fallback="full").strip().lower()
+LAZY = MODE == "lazy"
+LRU_SIZE = _cfg.getint("Discord", "MemberLRUSize", fallback=512)
+NEGATIVE_TTL = 6 * 3600  # seconds to remember "not in this guild"; well above the loop intervals
+QUERY_BATCH = 100        # gateway limit for user_ids per member query
+
+_process_start = time.monotonic()
+_lru: "OrderedDict[tuple[int, int], discord.Member]" = OrderedDict()
+_absent: dict[tuple[int, int], float] = {}  # (guild, member) -> when a fetch said NotFound
+_warmed: dict[int, set[int]] = {}           # guild -> ids the warm-up query answered for
+_stats = {"mode": MODE, "ready_seconds": None, "warm_seconds": None,
+          "rss_ready_mb": None, "rss_warm_mb": None, "cached_members": None,
+          "lru_hits": 0, "lru_fetches": 0}
+
+
+def _rss_mb():
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    except Exception:
+        try:
+            import resource
+            return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        except Exception:
+            return None
+
+
+def client_kwargs(intents: discord.Intents) -> dict:
+    """Extra discord.Client kwargs for the configured mode."""
+    if not LAZY:
+        return {}
+    return {
+        "chunk_guilds_at_startup": False,
+        "member_cache_flags": discord.MemberCacheFlags.from_intents(intents),
+    }
+
+
+# ─────────────────────────────
+# Startup
+# ─────────────────────────────
+def mark_ready():
+    if _stats["ready_seconds"] is None:
+        _stats["ready_seconds"] = round(time.monotonic() - _process_start, 2)
+        _stats["rss_ready_mb"] = _rss_mb()
+
+
+async def warm(guilds, member_ids):
+    """Lazy mode: load only DB-linked members into each guild's cache."""
+    if not LAZY:
+        return
+    ids = sorted({int(i) for i in member_ids if str(i).isdigit()})
+    for guild in guilds:
+        loaded = 0
+        warmed = _warmed[guild.id] = set()
+        for i in range(0, len(ids), QUERY_BATCH):
+            batch = ids[i:i + QUERY_BATCH]
+            try:
+                found = await guild.query_members(user_ids=batch, cache=True)
+                loaded += len(found)
+                warmed.update(batch)
+            except Exception as e:
+                logger.warning("⚠️ Member query failed for %s: %s", guild.name, e)
+                break
+        logger.info("👥 Lazy cache: loaded %d/%d linked member(s) for %s", loaded, len(ids), guild.name)
+
+
+def finish_startup(guilds):
+    """Record time-to-warm cache and RSS once, after the first on_ready."""
+    if _stats["warm_seconds"] is not None:
+        return
+    _stats["warm_seconds"] = round(time.monotonic() - _process_start, 2)
+    _stats["rss_warm_mb"] = _rss_mb()
+    _stats["cached_members"] = sum(len(g.members) for g in guilds)
+    logger.info(
+        "📏 Member cache (%s): ready in %.2fs (RSS %s MB), warm in %.2fs (RSS %s MB), %d member(s) cached",
+        MODE, _stats["ready_seconds"] or 0, _stats["rss_ready_mb"],
+        _stats["warm_seconds"], _stats["rss_warm_mb"], _stats["cached_members"],
+    )
+
+
+async def ensure_full(guild: discord.Guild):
+    """Chunk the whole guild before an operation that walks every member (no-op in full mode)."""
+    if LAZY and not guild.chunked:
+        started = time.monotonic()
+        await guild.chunk(cache=True)
+        guild_cache.index_guild(guild)
+        logger.info("👥 Chunked %s on demand (%d members, %.1fs)",
+                    guild.name, guild.member_count or 0, time.monotonic() - started)
+
+
+# ─────────────────────────────
+# On-demand lookup
+# ─────────────────────────────
+async def resolve(guild: discord.Guild, member_id, fetch: bool = True) -> discord.Member | None:
+    """guild.get_member, falling back (lazy mode) to a bounded LRU of REST-fetched members.
+
+    fetch=False never calls REST: for periodic loops that walk every DB row.
+    """
+    member_id = int(member_id)
+    member = guild.get_member(member_id)
+    if member is not None or not LAZY:
+        return member  # full mode: the gateway cache is complete, a miss is final
+    if member_id in _warmed.get(guild.id, ()):
+        return None  # queried at warm-up and not there
+
+    key = (guild.id, member_id)
+    member = _lru.get(key)
+    if member is not None:
+        _lru.move_to_end(key)
+        _stats["lru_hits"] += 1
+        return member
+    absent_at = _absent.get(key)
+    if absent_at is not None and time.monotonic() - absent_at < NEGATIVE_TTL:
+        _stats["lru_hits"] += 1
+        return None
+    if not fetch:
+        return None
+
+    _stats["lru_fetches"] += 1
+    try:
+        member = await guild.fetch_member(member_id)
+    except discord.NotFound:
+        _absent[key] = time.monotonic()
+        return None
+    except discord.HTTPException as e:
+        logger.warning("⚠️ Could not fetch member %s in %s: %s", member_id, guild.name, e)
+        return None  # not cached: transient
+    _absent.pop(key, None)
+    _lru[key] = member
+    _lru.move_to_end(key)
+    while len(_lru) > LRU_SIZE:
+        _lru.popitem(last=False)
+    return member
+
+
+async def find(discord_id, guilds, fetch: bool = True) -> tuple:
+    """(guild, member) like guild_cache.find_member, fetching on demand in lazy mode."""
+    guild, member = guild_cache.find_member(discord_id)
+    if member is not None or not LAZY:
+        return guild, member
+    try:
+        member_id = int(discord_id)
+    except (TypeError, ValueError):
+        return None, None
+    for guild in guilds:
+        member = await resolve(guild, member_id, fetch=fetch)
+        if member is not None:
+            return guild, member
+    return None, None
+
+
+def stats() -> dict:
+    return dict(_stats, lru_size=len(_lru), rss_now_mb=_rss_mb())
@@ -0,0 +1,119 @@
+# bot/member_sync.py
+import asyncio
+import hashlib
+
+import discord
+from loghelper import logger
+from bot import bot, config
+from bot.aio import db
+from bot.onboarding import member_tag, serialize_roles
+
+# ─────────────────────────────
+# Incremental discord_tag / discord_roles snapshots
+# ─────────────────────────────
+# Member events call note(); changed snapshots are queued and written in one
+# transaction every FLUSH_SECONDS. `_known` mirrors what the DB holds so
+# unchanged members never cost a write.
+#
+# A periodic reconcile hashes each guild's (id, tag, roles) set in memory
+# and only diffs members against `_known` when that hash moved since the
+# last pass — catching anything missed while disconnected without the
+# per-member DB round trips of /sync_members.
+
+FLUSH_SECONDS = config.getint("Discord", "SnapshotFlushSeconds", fallback=5)
+RECONCILE_MINUTES = config.getint("Discord", "SnapshotReconcileMinutes", fallback=30)
+
+_known: dict[str, tuple[str, str]] = {}
+_dirty: dict[str, tuple[str, str]] = {}
+_guild_hash: dict[int, str] = {}
+_task = None
+
+
+def snapshot_of(member: discord.Member) -> tuple[str, str]:
+    return member_tag(member), serialize_roles(member)
+
+
+def note(member: discord.Member, removed: bool = False):
+    """Queue a snapshot write if the member's tag/roles differ from what is stored."""
+    if member.bot:
+        return
+    key = str(member.id)
+    tag, roles = snapshot_of(member)
+    if removed:
+        roles = ""
+    if key not in _known or _known[key] != (tag, roles):
+        _dirty[key] = (tag, roles)
+
+
+async def flush():
+    """Write all queued snapshots in one transaction."""
+    if not _dirty:
+        return 0
+    batch = dict(_dirty)
+    _dirty.clear()
+    try:
+        missing = await db.update_member_snapshots([(k, t, r) for k, (t, r) in batch.items()])
+    except Exception as e:
+        logger.error("⚠️ Role snapshot flush failed (%d queued): %s", len(batch), e)
+        for k, v in batch.items():
+            _dirty.setdefault(k, v)
+        return 0
+    for key, value in batch.items():
+        _known[key] = value
+    # No member row yet (mid-onboarding); onboarding writes roles when it saves
+    for key in missing:
+        _known.pop(key, None)
+    written = len(batch) - len(missing)
+    if written:
+        logger.debug("💾 Flushed %d role snapshot(s).", written)
+    return written
+
+
+def _guild_digest(snapshots: dict[str, tuple[str, str]]) -> str:
+    h = hashlib.sha1()
+    for key in sorted(snapshots):
+        tag, roles = snapshots[key]
+        h.update(f"{key}\x1f{tag}\x1f{roles}\x1e".encode("utf-8"))
+    return h.hexdigest()
+
+
+def reconcile(guild: discord.Guild) -> int:
+    """Queue writes for members whose snapshot drifted; cheap no-op if the guild hash is unchanged."""
+    current = {str(m.id): snapshot_of(m) for m in guild.members if not m.bot}
+    digest = _guild_digest(current)
+    if _guild_hash.get(guild.id) == digest:
+        return 0
+    queued = 0
+    for key, value in current.items():
+        if key in _known and _known[key] != value:
+            _dirty[key] = value
+            queued += 1
+    _guild_hash[guild.id] = digest
+    return queued
+
+
+async def _run():
+    _known.update(await db.get_member_snapshots())
+    logger.info("🎭 Role snapshots: tracking %d member(s).", len(_known))
+
+    last_reconcile = None
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            now = loop.time()
+            if last_reconcile is None or now - last_reconcile >= RECONCILE_MINUTES * 60:
+                queued = sum(reconcile(g) for g in bot.guilds)
+                if queued:
+                    logger.info("🔄 Reconcile queued %d role snapshot update(s).", queued)
+                last_reconcile = now
+            await flush()
+        except Exception as e:
+            logger.error("⚠️ Role snapshot loop error: %s", e)
+        await asyncio.sleep(FLUSH_SECONDS)
+
+
+def start():
+    """Start the flush/reconcile loop (idempotent; call from on_ready)."""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(_run(), name="casharr-member-sync")
@@ -0,0 +1,278 @@
+# bot/onboarding.py
+import asyncio
+import json
+import os
+
+import discord
+from loghelper import logger
+from bot import (
+    bot, aplex, member_cache, send_admin, check_and_upgrade_after_invite,
+    WELCOME_MESSAGE, TRIAL_DAYS
+)
+from bot.aio import db, run_blocking
+
+# ─────────────────────────────
+# DM onboarding state machine
+# ─────────────────────────────
+# One row per member in `onboarding_sessions`, mirrored in `_sessions` so
+# routing a DM is a dict lookup. Each answer advances the session and
+# persists that single row; nothing waits on bot.wait_for, so a restart
+# simply reloads the table and the next reply continues where it left off.
+#
+# Flows:
+#   join    — questionnaire sent on member join; finishes with Plex invite + trial
+#   details — /request_details: update missing contact info (`skip` keeps a value)
+
+LEGACY_PENDING_FILE = os.path.join("data", "pending_details.json")
+
+QUESTIONS = [
+    ("first_name", "What is your **first name**?"),
+    ("last_name", "What is your **last name**?"),
+    ("email", "What is the **email you used for Plex**?"),
+    ("mobile", "What is your **mobile number**?"),
+]
+
+_sessions: dict[int, dict] = {}
+_locks: dict[int, asyncio.Lock] = {}
+_loaded = False
+
+
+def serialize_roles(member: discord.Member) -> str:
+    return ", ".join(role.name for role in member.roles if role.name != "@everyone")
+
+
+def member_tag(member) -> str:
+    return f"{member.name}#{member.discriminator}" if member.discriminator else member.name
+
+
+def _lock(user_id: int) -> asyncio.Lock:
+    lock = _locks.get(user_id)
+    if lock is None:
+        lock = _locks[user_id] = asyncio.Lock()
+    return lock
+
+
+def has_session(user_id: int) -> bool:
+    return int(user_id) in _sessions
+
+
+async def _persist(user_id: int, session: dict):
+    await db.save_onboarding_session(
+        user_id, session["guild_id"], session["flow"], session["stage"],
+        session["answers"], session["context"],
+    )
+
+
+async def _drop(user_id: int):
+    _sessions.pop(user_id, None)
+    _locks.pop(user_id, None)
+    await db.delete_onboarding_session(user_id)
+
+
+async def _resolve_member(user_id: int, guild_id) -> discord.Member | None:
+    guild = bot.get_guild(int(guild_id)) if guild_id else None
+    member = await member_cache.resolve(guild, user_id) if guild else None
+    if member is None:
+        _, member = await member_cache.find(user_id, bot.guilds)
+    return member
+
+
+# ─────────────────────────────
+# Startup
+# ─────────────────────────────
+def _read_legacy_pending() -> dict:
+    if not os.path.exists(LEGACY_PENDING_FILE):
+        return {}
+    try:
+        with open(LEGACY_PENDING_FILE, "r") as f:
+            data = json.load(f)
+    except Exception:
+        data = {}
+    os.replace(LEGACY_PENDING_FILE, LEGACY_PENDING_FILE + ".migrated")
+    return data
+
+
+async def load():
+    """Load open sessions into memory (once), importing any legacy pending_details.json."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+
+    legacy = await run_blocking(_read_legacy_pending)
+    for user_id, stage in legacy.items():
+        if int(stage) >= len(QUESTIONS):
+            continue
+        session = {"guild_id": None, "flow": "details", "stage": int(stage),
+                   "answers": {}, "context": {}}
+        await _persist(int(user_id), session)
+
+    for row in await db.get_onboarding_sessions():
+        _sessions[int(row["discord_id"])] = {
+            "guild_id": row["guild_id"], "flow": row["flow"], "stage": row["stage"],
+            "answers": row["answers"], "context": row["context"],
+        }
+    logger.info("📝 Loaded %d open onboarding session(s).", len(_sessions))
+
+
+# ─────────────────────────────
+# Prompts
+# ─────────────────────────────
+def _prompt(session: dict) -> str:
+    key, question = QUESTIONS[session["stage"]]
+    if session["flow"] != "details":
+        return question
+    current = session["context"].get("current", {}).get(key)
+    if current:
+        return f"{question}\nCurrent: `{current}`\nType `skip` to keep it."
+    return f"{question}\n(Type `skip` to leave blank.)"
+
+
+async def start(member: discord.Member, flow: str, **context) -> bool:
+    """Open (or resume) a session for a member and send the current question."""
+    async with _lock(member.id):
+        session = _sessions.get(member.id)
+        if session and (session["flow"] == flow or session["flow"] == "join"):
+            # Already collecting — just repeat where they are
+            await member.send(_prompt(session))
+            return True
+
+        if flow == "details":
+            record = await db.get_member(member.id)
+            context["current"] = {
+                key: (record[idx] if record and len(record) > idx and record[idx] else "")
+                for idx, (key, _) in zip((2, 3, 4, 5), QUESTIONS)
+            }
+            intro = (
+                "👋 Thanks for helping update your profile."
+                "\nYou can reply anytime — this chat stays open until all details are received."
+                "\nReply with `skip` to keep any existing value."
+            )
+        else:
+            intro = WELCOME_MESSAGE.format(user=member.name)
+
+        session = {"guild_id": member.guild.id, "flow": flow, "stage": 0,
+                   "answers": {}, "context": context}
+        try:
+            await member.send(intro)
+            await member.send(_prompt(session))
+        except discord.HTTPException as e:
+            await send_admin(f"⚠️ Couldn’t DM {member.mention} for details: {e}")
+            return False
+
+        _sessions[member.id] = session
+        await _persist(member.id, session)
+        logger.info("💬 Started %s onboarding for %s", flow, member.name)
+        return True
+
+
+# ─────────────────────────────
+# DM routing
+# ─────────────────────────────
+async def handle_dm(message: discord.Message) -> bool:
+    """Feed a DM into the author's session. Returns False if they have none."""
+    user_id = message.author.id
+    if user_id not in _sessions:
+        return False
+
+    async with _lock(user_id):
+        session = _sessions.get(user_id)
+        if session is None:  # finished while we waited for the lock
+            return False
+
+        key, _ = QUESTIONS[session["stage"]]
+        response = message.content.strip()
+        if session["flow"] == "details" and response.lower() == "skip":
+            response = None  # keep whatever is on file
+        session["answers"][key] = response
+        session["stage"] += 1
+
+        if session["stage"] < len(QUESTIONS):
+            await _persist(user_id, session)
+            await message.channel.send(_prompt(session))
+            return True
+
+        member = await _resolve_member(user_id, session["guild_id"])
+        await _drop(user_id)
+
+    if member is None:
+        logger.warning("⚠️ Onboarding finished for %s but they are no longer in a guild.", message.author)
+        return True
+
+    try:
+        if session["flow"] == "join":
+            await _finish_join(member, message.channel, session)
+        else:
+            await _finish_details(member, message.channel, session)
+    except Exception as e:
+        logger.error("⚠️ Onboarding failed for %s: %s", member.name, e)
+        await send_admin(f"⚠️ Onboarding failed for {member.mention}: {type(e).__name__}: {e}")
+    return True
+
+
+# ─────────────────────────────
+# Completion handlers
+# ─────────────────────────────
+async def _finish_details(member: discord.Member, channel, session: dict):
+    record = await db.get_member(member.id)
+    origin = record[17] if record and len(record) > 17 and record[17] else "sync"
+
+    # Skipped (or, for resumed legacy sessions, never asked) → value on file
+    values = {}
+    for idx, (key, _) in zip((2, 3, 4, 5), QUESTIONS):
+        answer = session["answers"].get(key)
+        if answer is None:
+            answer = record[idx] if record and len(record) > idx and record[idx] else ""
+        values[key] = answer.strip()
+    email = values["email"]
+
+    await db.save_member(
+        member.id,
+        first_name=values["first_name"],
+        last_name=values["last_name"],
+        email=email,
+        mobile=values["mobile"],
+        discord_tag=member_tag(member),
+        origin=origin,
+        roles=serialize_roles(member),
+    )
+    await channel.send("✅ Thanks! Your details have been updated and saved.")
+    await send_admin(f"✅ Saved updated details for {member.mention} ({email or 'no email supplied'}).")
+
+
+async def _finish_join(member: discord.Member, channel, session: dict):
+    answers = session["answers"]
+    first, last, email, mobile = (answers.get(k, "") for k, _ in QUESTIONS)
+
+    await db.save_member(
+        member.id,
+        first_name=first,
+        last_name=last,
+        email=email,
+        mobile=mobile,
+        discord_tag=member_tag(member),
+        roles=serialize_roles(member),
+    )
+    logger.info("💾 Saved new member info for %s (email: %s)", member.name, email)
+
+    # Referral acknowledgment
+    if session["context"].get("referrer_id"):
+        await channel.send(
+            "🎁 You joined via a referral invite! Your referrer will earn bonus days when you subscribe."
+        )
+
+    # Plex Invite + Trial Setup
+    logger.info("📨 Inviting %s to Plex", email)
+    try:
+        await aplex.invite_user(email)
+    except Exception as e:
+        logger.warning("⚠️ Could not send Plex invite to %s: %s", email, e)
+
+    await asyncio.sleep(5)
+    await check_and_upgrade_after_invite(member, email)
+
+    logger.info("🧪 Starting %d-day trial for %s", TRIAL_DAYS, member.name)
+    await db.start_trial(member.id, TRIAL_DAYS)
+
+    await channel.send("✅ Your details are saved and a Plex invite has been sent.")
+    await send_admin(f"🧪 Trial started for {member.mention} ({email}).")
@@ -0,0 +1,104 @@
+# bot/role_transitions.py
+import asyncio
+import configparser
+import os
+import time
+
+import discord
+from loghelper import logger
+
+# ─────────────────────────────
+# Role transition service
+# ─────────────────────────────
+# Every access-role change goes out as ONE member edit carrying the full
+# target role set, instead of a remove_roles + add_roles pair: half the
+# REST calls against the per-guild limit and no visible in-between state.
+# Transitions that would not change anything make no request at all.
+
+CONFIG_PATH = os.path.join("config", "config.ini")
+_cfg = configparser.ConfigParser()
+_cfg.read(CONFIG_PATH, encoding="utf-8")
+
+# Minimum spacing between edits inside a RoleBatch (mass changes/sweeps)
+BATCH_DELAY = _cfg.getint("Discord", "RoleBatchDelayMs", fallback=500) / 1000
+
+
+def target_roles(member: discord.Member, add=(), remove=()) -> list[discord.Role]:
+    """Member's roles after removing `remove` and adding `add` (None entries ignored)."""
+    drop = {r.id for r in remove if r}
+    keep = [r for r in member.roles if not r.is_default() and r.id not in drop]
+    have = {r.id for r in keep}
+    for r in add:
+        if r and r.id not in have:
+            keep.append(r)
+            have.add(r.id)
+    return keep
+
+
+async def transition(member: discord.Member, add=(), remove=(),
+                     reason: str = "Casharr status update") -> bool:
+    """Apply a role transition in a single edit. Returns False if it was a no-op."""
+    new_roles = target_roles(member, add, remove)
+    current = {r.id for r in member.roles if not r.is_default()}
+    if {r.id for r in new_roles} == current:
+        return False
+    await member.edit(roles=new_roles, reason=reason)
+    return True
+
+
+async def set_access_role(member: discord.Member, role: discord.Role | None,
+                          access_roles, reason: str = "Casharr status update") -> bool:
+    """Make `role` the member's only access role (out of `access_roles`)."""
+    remove = [r for r in access_roles if r and (role is None or r.id != role.id)]
+    return await transition(member, add=[role] if role else [], remove=remove, reason=reason)
+
+
+class RoleBatch:
+    """Paced transitions for mass changes (expiry sweeps, audits, bulk renewals).
+
+    Spacing only applies between edits that actually hit the API; no-ops
+    are free. discord.py still handles any 429s on top of this.
+    """
+
+    def __init__(self, delay: float = BATCH_DELAY):
+        self.delay = delay
+        self.applied = 0
+        self.skipped = 0
+        self.failed = 0
+        self._last = 0.0
+
+    async def apply(self, member: discord.Member, add=(), remove=(),
+                    reason: str = "Casharr status update") -> bool:
+        if {r.id for r in target_roles(member, add, remove)} == {
+            r.id for r in member.roles if not r.is_default()
+        }:
+            self.skipped += 1
+            return False
+        wait = self._last + self.delay - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            await transition(member, add, remove, reason=reason)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._last = time.monotonic()
+        self.applied += 1
+        return True
+
+
+async def transition_many(changes, reason: str = "Casharr bulk update",
+                          delay: float = BATCH_DELAY) -> RoleBatch:
+    """Apply [(member, add, remove), ...] with pacing; failures are logged and skipped."""
+    batch = RoleBatch(delay)
+    for member, add, remove in changes:
+        try:
+            await batch.apply(member, add, remove, reason=reason)
+        except Exception as e:
+            logger.warning("⚠️ Role transition failed for %s: %s", member, e)
+    logger.info(
+        "🎭 Role batch: %d applied, %d unchanged, %d failed",
+        batch.applied, batch.skipped, batch.failed,
+    )
+    return batch
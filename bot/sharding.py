@@ -0,0 +1,77 @@
+# bot/sharding.py
+import asyncio
+import math
+
+import discord
+from loghelper import logger
+from bot import bot, SHARDED
+
+# ─────────────────────────────
+# Shard-aware work partitioning
+# ─────────────────────────────
+# With [Discord] Sharded = true the bot is an AutoShardedClient and each
+# guild lives on one shard. Periodic tasks split their work by shard and
+# run the partitions concurrently, so one slow or reconnecting shard never
+# holds up guilds on the others. Unsharded, everything is partition 0 and
+# behaviour is unchanged.
+
+
+def shard_of(guild: discord.Guild | None) -> int:
+    return guild.shard_id if guild is not None and SHARDED else 0
+
+
+def guilds_by_shard() -> dict[int, list[discord.Guild]]:
+    parts: dict[int, list[discord.Guild]] = {}
+    for g in bot.guilds:
+        parts.setdefault(shard_of(g), []).append(g)
+    return parts
+
+
+def partition(items, guild_of) -> dict[int, list]:
+    """Group `items` by the shard of `guild_of(item)` (None → shard 0)."""
+    parts: dict[int, list] = {}
+    for item in items:
+        parts.setdefault(shard_of(guild_of(item)), []).append(item)
+    return parts
+
+
+async def run_partitions(label: str, parts: dict[int, list], work) -> dict:
+    """Run `await work(shard_id, items)` for every partition concurrently.
+
+    A failing partition is logged and does not cancel the others.
+    Returns {shard_id: result-or-exception}.
+    """
+    if not parts:
+        return {}
+    ids = sorted(parts)
+    results = await asyncio.gather(*(work(i, parts[i]) for i in ids), return_exceptions=True)
+    for shard_id, result in zip(ids, results):
+        if isinstance(result, Exception):
+            logger.error("⚠️ %s failed on shard %s: %s", label, shard_id, result)
+    if len(ids) > 1:
+        logger.info("🧩 %s ran across %d shard(s).", label, len(ids))
+    return dict(zip(ids, results))
+
+
+async def run_per_shard(label: str, work) -> dict:
+    """`work(shard_id, guilds)` for each shard's guilds, concurrently."""
+    return await run_partitions(label, guilds_by_shard(), work)
+
+
+def status() -> list[dict]:
+    """Per-shard latency / connection state for the status page."""
+    counts: dict[int, int] = {}
+    for g in bot.guilds:
+        counts[shard_of(g)] = counts.get(shard_of(g), 0) + 1
+
+    def _ms(latency):
+        return None if latency is None or math.isinf(latency) or math.isnan(latency) else round(latency * 1000)
+
+    if not SHARDED:
+        return [{"shard_id": 0, "latency_ms": _ms(bot.latency), "guilds": counts.get(0, 0),
+                 "connected": bot.is_ready() and not bot.is_closed()}]
+    return [
+        {"shard_id": shard_id, "latency_ms": _ms(info.latency), "guilds": counts.get(shard_id, 0),
+         "connected": not info.is_closed()}
+        for shard_id, info in sorted(bot.shards.items())
+    ]
@@ -5,10 +5,13 @@ import discord
 from configparser import ConfigParser
 from loghelper import logger
 from bot import (
-    bot, plex, get_all_members,
+    bot, aplex, guild_cache,
     TRIAL_ROLE, PAYER_ROLE, INITIAL_ROLE, LIFETIME_ROLE,
-    start_trial, end_trial, send_admin, parse_iso, TRIAL_DAYS
+    send_admin, parse_iso, TRIAL_DAYS
 )
+from bot.aio import db, has_server_access
+from bot.role_transitions import RoleBatch
+from bot import member_cache, sharding
 
 # ✅ Added: Task registry imports
 from .task_registry import register_task, mark_start, mark_finish
@@ -38,8 +41,8 @@ async def audit_plex_access():
     logger.info("🔁 Running Plex access audit (%s mode)...", ACCESS_MODE.upper())
 
     try:
-        server_name = plex.plex.friendlyName
-        plex_users = {u.email.lower(): u for u in plex.account.users() if u.email}
+        server_name = aplex.server_name
+        plex_users = await aplex.users_by_email()
         logger.info("📡 Retrieved %d Plex users from server '%s'", len(plex_users), server_name)
     except Exception as e:
         logger.error("⚠️ Could not fetch Plex user list: %s", e)
@@ -47,26 +50,31 @@ async def audit_plex_access():
         mark_finish(name, started, audit_plex_access)
         return
 
-    normalized_server_name = server_name.lower().replace(" ", "").replace("-", "")
+    # One DB read per run, off the loop thread
+    rows = await db.get_all_members()
 
     # ─────────────────────────────
-    # Iterate through all guilds and DB members
+    # Iterate through all guilds and DB members (one partition per shard)
     # ─────────────────────────────
-    for g in bot.guilds:
+    async def _audit_shard(shard_id, guilds):
+        batch = RoleBatch()
+        for g in guilds:
+            await _audit_guild(g, batch)
+
+    async def _audit_guild(g, batch):
         logger.info("🔍 Auditing Plex access for guild: %s", g.name)
-        lifetime_role = discord.utils.get(g.roles, name=LIFETIME_ROLE)
-        trial_role = discord.utils.get(g.roles, name=TRIAL_ROLE)
-        payer_role = discord.utils.get(g.roles, name=PAYER_ROLE)
-        no_access_role = discord.utils.get(g.roles, name=INITIAL_ROLE)
+        lifetime_role, trial_role, payer_role, no_access_role = guild_cache.roles(
+            g, LIFETIME_ROLE, TRIAL_ROLE, PAYER_ROLE, INITIAL_ROLE
+        )
 
-        for row in get_all_members():
+        for row in rows:
             try:
                 discord_id = row[0]
                 email = row[4] if len(row) > 4 else None
                 if not email:
                     continue
 
-                member = g.get_member(int(discord_id))
+                member = await member_cache.resolve(g, discord_id, fetch=False)
                 if not member:
                     logger.debug("Skipping Plex-only user: %s (not in Discord)", email)
                     continue  # ✅ Plex-only users never touched
@@ -77,15 +85,8 @@ async def audit_plex_access():
                     continue
 
                 # Check Plex access
-                has_access = False
                 plex_user = plex_users.get(email.lower())
-                if plex_user:
-                    for s in getattr(plex_user, "servers", []):
-                        s_str = str(s).lower().replace(" ", "").replace("-", "")
-                        s_name = getattr(s, "name", "").lower().replace(" ", "").replace("-", "")
-                        if normalized_server_name in s_str or normalized_server_name in s_name:
-                            has_access = True
-                            break
+                has_access = bool(plex_user and has_server_access(plex_user, server_name))
 
                 logger.debug(
                     "👤 Checking %s (%s): has_access=%s | Roles=%s",
@@ -98,11 +99,10 @@ async def audit_plex_access():
                 # ─────────────────────────────
                 if has_access and no_access_role in member.roles and payer_role not in member.roles:
                     logger.info("🎉 %s gained Plex access — upgrading to Trial", member.display_name)
-                    await member.remove_roles(no_access_role)
+                    await batch.apply(member, add=[trial_role], remove=[no_access_role])
                     if trial_role:
-                        await member.add_roles(trial_role)
                         logger.info("✅ Added role '%s' to %s", TRIAL_ROLE, member.display_name)
-                    start_trial(member.id, TRIAL_DAYS)
+                    await db.start_trial(member.id, TRIAL_DAYS)
                     await send_admin(
                         f"🎉 {member.mention} gained Plex access. Trial started for {TRIAL_DAYS} days."
                     )
@@ -125,17 +125,16 @@ async def audit_plex_access():
 
                     # Auto mode only
                     logger.warning("⚠️ %s lost Plex access — reverting to INITIAL role", member.display_name)
-                    await member.remove_roles(trial_role)
+                    await batch.apply(member, add=[no_access_role], remove=[trial_role])
                     if no_access_role:
-                        await member.add_roles(no_access_role)
                         logger.info("✅ Added role '%s' to %s", INITIAL_ROLE, member.display_name)
 
                     try:
-                        plex.remove_user(email)
+                        await aplex.remove_user(email)
                     except Exception as e:
                         logger.warning("Could not remove Plex user %s: %s", email, e)
 
-                    end_trial(member.id)
+                    await db.end_trial(member.id)
                     await send_admin(f"⚠️ {member.mention} lost Plex access. Reverted to {INITIAL_ROLE}.")
                     continue
 
@@ -147,6 +146,8 @@ async def audit_plex_access():
             except Exception as e:
                 logger.error("⚠️ Audit failed for a member: %s", e)
 
+    await sharding.run_per_shard("Plex audit", _audit_shard)
+
     logger.info("✅ Plex access audit completed.")
 
     # ✅ Added tracking finish
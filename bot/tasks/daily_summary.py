@@ -1,24 +1,30 @@
 # bot/tasks/daily_summary.py
 from discord.ext import tasks
-from datetime import datetime, timezone
+from collections import Counter
+from datetime import datetime, timezone, timedelta
 from bot import bot, send_admin
-from database import get_all_members, parse_iso
+from bot.aio import db
 
 @tasks.loop(hours=24)
 async def daily_summary():
     """Send a daily summary of member stats to the admin channel."""
-    rows = get_all_members()
+    stats = await db.member_stats()
     now = datetime.now(timezone.utc)
-    active_payers = sum(1 for r in rows if parse_iso(r[10]) and parse_iso(r[10]) > now)
-    active_trials = sum(1 for r in rows if parse_iso(r[8]) and parse_iso(r[8]) > now)
-    expired = sum(1 for r in rows if (parse_iso(r[8]) and parse_iso(r[8]) < now) or (parse_iso(r[10]) and parse_iso(r[10]) < now))
     msg = (
         f"🧾 **Daily Summary — {datetime.now():%Y-%m-%d}**\n"
-        f"👥 Total Members: {len(rows)}\n"
-        f"💰 Active Payers: {active_payers}\n"
-        f"🧪 Active Trials: {active_trials}\n"
-        f"⚠️ Expired: {expired}"
+        f"👥 Total Members: {stats['total']}\n"
+        f"💰 Active Payers: {stats['active_payers']}\n"
+        f"🧪 Active Trials: {stats['active_trials']}\n"
+        f"⚠️ Expired: {stats['expired']}\n"
+        f"🤝 Referred Members: {stats['referrals']['referred']}"
     )
+
+    # Last 24h of activity, straight from the event journal
+    since = (now - timedelta(days=1)).isoformat(timespec="seconds")
+    events, _ = await db.get_events(since=since, limit=500)
+    if events:
+        counts = Counter(e["type"] for e in events)
+        msg += "\n📈 Last 24h: " + ", ".join(f"{t} ×{n}" for t, n in counts.most_common())
     await send_admin(msg)
 
 @daily_summary.before_loop
@@ -7,9 +7,12 @@ import sqlite3, os, asyncio, json
 from configparser import ConfigParser
 from loghelper import logger
 from bot import (
-    bot, plex, parse_iso, get_trial_members, get_payer_members,
-    TRIAL_ROLE, INITIAL_ROLE, PAYER_ROLE, LIFETIME_ROLE, send_admin, end_trial
+    bot, aplex, parse_iso, guild_cache,
+    TRIAL_ROLE, INITIAL_ROLE, PAYER_ROLE, LIFETIME_ROLE, send_admin
 )
+from bot.aio import db, run_blocking
+from bot.role_transitions import RoleBatch
+from bot import member_cache, sharding
 from database import DB_PATH
 
 # ─────────────────────────────
@@ -42,6 +45,11 @@ def save_skips(data):
 # Sync Helper
 # ─────────────────────────────
 def sync_trial_durations():
+    """
+    Re-align stored trial_end dates with the configured duration.
+    Blocking (sqlite) — call via run_blocking from coroutines.
+    Returns (updated_count, new_duration, expired_now_ids).
+    """
     CONFIG_PATH = os.path.join("config", "config.ini")
     config = ConfigParser()
     config.read(CONFIG_PATH)
@@ -80,26 +88,41 @@ def sync_trial_durations():
     conn.commit()
     conn.close()
 
+    return updated, new_duration, expired_now
+
+
+async def run_trial_duration_sync():
+    """Sync trial durations off the loop, then notify/enforce on the loop."""
+    updated, new_duration, expired_now = await run_blocking(sync_trial_durations)
+
     # ─────────────────────────────
     # 🔔 Trigger manual enforcement if any expired after sync
     # ─────────────────────────────
     if updated > 0 and ACCESS_MODE == "manual" and expired_now:
-        async def notify_manual_check():
-            await send_admin(
-                f"🕒 {updated} trial durations synced to new {new_duration}-day length.\n"
-                f"⚠️ {len(expired_now)} member(s) now past expiry — check your DMs for removal confirmations."
-            )
-            # Run enforcement immediately
-            await enforce_access()
-        asyncio.create_task(notify_manual_check())
+        await send_admin(
+            f"🕒 {updated} trial durations synced to new {new_duration}-day length.\n"
+            f"⚠️ {len(expired_now)} member(s) now past expiry — check your DMs for removal confirmations."
+        )
+        # Run enforcement immediately
+        await enforce_access()
 
     return updated
 
 # ─────────────────────────────
 # Helper: DM admin for confirmation
 # ─────────────────────────────
+# Shards run concurrently, and a "yes" DM would satisfy every waiting
+# prompt at once, so only one confirmation is open at a time.
+_confirm_lock = asyncio.Lock()
+
+
 async def ask_admin_confirmation(admin, member, email, reason, skip_data):
     """Ask admin via DM whether to remove access; respects skip deferral."""
+    async with _confirm_lock:
+        return await _ask_admin_confirmation(admin, member, email, reason, skip_data)
+
+
+async def _ask_admin_confirmation(admin, member, email, reason, skip_data):
     uid = str(member.id)
     now = datetime.now(timezone.utc)
 
@@ -134,7 +157,7 @@ async def ask_admin_confirmation(admin, member, email, reason, skip_data):
             return True
         elif choice == "skip":
             skip_data[uid] = now.isoformat()
-            save_skips(skip_data)
+            await run_blocking(save_skips, dict(skip_data))
             await dm.send(f"⏸️ Skipped {member.display_name}. I’ll remind you again in 7 days.")
             return False
     except asyncio.TimeoutError:
@@ -169,26 +192,35 @@ async def enforce_access():
     # ✅ Define `now` once, early
     now = datetime.now(timezone.utc)
 
-    skip_data = load_skips()
+    skip_data = await run_blocking(load_skips)
     logger.info("🔒 Enforcement cycle started (%s)", ACCESS_MODE.upper())
 
-    for g in bot.guilds:
-        admin_role = discord.utils.get(g.roles, name="Admin")
+    # Fetch expiry candidates once per cycle, off the loop thread
+    trial_rows = await db.get_trial_members()
+    payer_rows = await db.get_payer_members()
+    async def _enforce_guild(g, batch):
+        admin_role = guild_cache.role(g, "Admin")
         admin = next((m for m in g.members if admin_role in m.roles), None)
+        if not admin and member_cache.LAZY:
+            # Admins usually have no member row, so the lazy cache may not hold
+            # them; the guild owner stands in (fetched once, then LRU-cached)
+            admin = await member_cache.resolve(g, g.owner_id)
         if not admin:
             logger.warning("⚠️ No admin found in guild %s — skipping enforcement.", g.name)
-            continue
+            return
 
-        lifetime_role = discord.utils.get(g.roles, name=LIFETIME_ROLE)
+        lifetime_role, trial_role, payer_role, init_role = guild_cache.roles(
+            g, LIFETIME_ROLE, TRIAL_ROLE, PAYER_ROLE, INITIAL_ROLE
+        )
 
         # ────────── Trial Expiry ──────────
-        for discord_id, email, trial_end in get_trial_members():
+        for discord_id, email, trial_end in trial_rows:
             try:
                 end_time = parse_iso(trial_end)
                 if not end_time or now <= end_time:
                     continue
 
-                member = g.get_member(int(discord_id))
+                member = await member_cache.resolve(g, discord_id, fetch=False)
                 if not member:
                     logger.info("Skipping Plex-only user (no Discord link): %s", email)
                     continue
@@ -198,9 +230,6 @@ async def enforce_access():
                     logger.info("⏳ Skipping lifetime member %s (trial expiry)", member.display_name)
                     continue
 
-                trial_role = discord.utils.get(g.roles, name=TRIAL_ROLE)
-                init_role = discord.utils.get(g.roles, name=INITIAL_ROLE)
-
                 confirmed = True
                 if ACCESS_MODE == "manual":
                     reason = f"⚠️ Trial expired for {member.display_name}."
@@ -210,19 +239,16 @@ async def enforce_access():
                     continue
 
                 # Downgrade confirmed or in auto mode
-                if trial_role and trial_role in member.roles:
-                    await member.remove_roles(trial_role)
-                if init_role and init_role not in member.roles:
-                    await member.add_roles(init_role)
+                await batch.apply(member, add=[init_role], remove=[trial_role])
 
                 # Remove Plex only if linked user exists
                 try:
                     if email:
-                        plex.remove_user(email)
+                        await aplex.remove_user(email)
                 except Exception as e:
                     logger.warning("Could not remove Plex access for %s: %s", email, e)
 
-                end_trial(member.id)
+                await db.end_trial(member.id)
                 await send_admin(
                     f"⚠️ {member.mention}'s trial expired — reverted to {INITIAL_ROLE}."
                     + (" (Manual mode, confirmed)" if ACCESS_MODE == "manual" else "")
@@ -233,13 +259,13 @@ async def enforce_access():
                 logger.error("Error processing trial expiry for %s: %s", email, e)
 
         # ────────── Paid Expiry ──────────
-        for discord_id, email, paid_until in get_payer_members():
+        for discord_id, email, paid_until in payer_rows:
             try:
                 paid_time = parse_iso(paid_until)
                 if not paid_time or now <= paid_time:
                     continue
 
-                member = g.get_member(int(discord_id))
+                member = await member_cache.resolve(g, discord_id, fetch=False)
                 if not member:
                     logger.info("Skipping Plex-only user (no Discord link): %s", email)
                     continue
@@ -249,9 +275,6 @@ async def enforce_access():
                     logger.info("⏳ Skipping lifetime member %s (paid expiry)", member.display_name)
                     continue
 
-                payer_role = discord.utils.get(g.roles, name=PAYER_ROLE)
-                init_role = discord.utils.get(g.roles, name=INITIAL_ROLE)
-
                 confirmed = True
                 if ACCESS_MODE == "manual":
                     reason = f"💸 Subscription expired for {member.display_name}."
@@ -261,15 +284,12 @@ async def enforce_access():
                     continue
 
                 # Downgrade confirmed or auto
-                if payer_role and payer_role in member.roles:
-                    await member.remove_roles(payer_role)
-                if init_role and init_role not in member.roles:
-                    await member.add_roles(init_role)
+                await batch.apply(member, add=[init_role], remove=[payer_role])
 
                 # Remove Plex only if linked
                 try:
                     if email:
-                        plex.remove_user(email)
+                        await aplex.remove_user(email)
                 except Exception as e:
                     logger.warning("Could not remove Plex access for %s: %s", email, e)
 
@@ -282,6 +302,13 @@ async def enforce_access():
             except Exception as e:
                 logger.error("Error processing payer expiry for %s: %s", email, e)
 
+    async def _enforce_shard(shard_id, guilds):
+        batch = RoleBatch()  # paced, single-edit downgrades for this shard's sweep
+        for g in guilds:
+            await _enforce_guild(g, batch)
+
+    await sharding.run_per_shard("Enforcement", _enforce_shard)
+
     logger.info("✅ Enforcement cycle completed.")
 
     # ✅ Added tracking finish
@@ -293,7 +320,7 @@ def _register():
     register_task("Enforce Access", enforce_access, "Every 30 minutes", enforce_access)
 
     async def _run_once():
-        sync_trial_durations()
+        await run_trial_duration_sync()
     register_task("Sync Trial Durations", type("Temp", (), {"next_iteration": None})(),
                   "On demand", _run_once)
 _register()
@@ -302,16 +329,14 @@ _register()
 # Automatic Daily Backup Task
 # ─────────────────────────────
 from discord.ext import tasks
-import shutil
-from datetime import datetime
+from helpers.backups import create_backup
 
 @tasks.loop(hours=24)
 async def auto_backup():
-    from database import DB_PATH
-    os.makedirs("exports", exist_ok=True)
-    stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")  # ✅ simplified call
-    shutil.copy2(DB_PATH, f"exports/auto_backup_{stamp}.db")
-    logger.info("💾 Automatic database backup created.")
+    try:
+        await run_blocking(create_backup, "auto", "auto_backup")
+    except Exception as e:
+        logger.error(f"⚠️ Automatic database backup failed: {e}")
 
 @auto_backup.before_loop
 async def before_backup():
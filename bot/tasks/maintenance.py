@@ -1,9 +1,11 @@
 # bot/tasks/maintenance.py
-import os, shutil
+import os
 from datetime import datetime, timezone, time
 from discord.ext import tasks
 from loghelper import logger
-from bot import bot, DB_PATH, EXPORTS_DIR
+from bot import bot, DB_PATH
+from bot.aio import run_blocking
+from helpers.backups import create_backup
 from .task_registry import register_task, mark_start, mark_finish
 
 # ─────────────────────────────
@@ -24,11 +26,7 @@ async def backup_database_daily():
             logger.warning("⚠️ Database file not found, skipping backup.")
             return
 
-        os.makedirs(EXPORTS_DIR, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        dst = os.path.join(EXPORTS_DIR, f"members_backup_{timestamp}.db")
-        shutil.copy2(DB_PATH, dst)
-        logger.info(f"💾 Database backup completed → {dst}")
+        await run_blocking(create_backup, "daily")
 
     except Exception as e:
         logger.error(f"⚠️ Database backup failed: {e}")
@@ -46,11 +44,7 @@ async def run_backup_once():
             logger.warning("⚠️ Database not found for manual backup.")
             return
 
-        os.makedirs(EXPORTS_DIR, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        dst = os.path.join(EXPORTS_DIR, f"members_backup_{timestamp}.db")
-        shutil.copy2(DB_PATH, dst)
-        logger.info(f"💾 Manual database backup created → {dst}")
+        await run_blocking(create_backup, "manual")
     except Exception as e:
         logger.error(f"⚠️ Manual database backup failed: {e}")
 
@@ -4,25 +4,23 @@ from discord.ext import tasks
 import discord
 import os
 import configparser
-from helpers.emailer import send_email
-from helpers.sms import send_sms
 from bot import (
     bot,
-    get_all_for_reminders,
+    guild_cache,
     parse_iso,
     TRIAL_REMINDER_MSG,
     PAID_REMINDER_MSG,
     pay_page,
-    mark_trial_reminder_sent,
-    mark_paid_reminder_sent,
     send_admin,
     REMINDER_DAYS,
     LIFETIME_ROLE,
 )
+from bot.aio import db, run_blocking, send_email_async, send_sms_async
+from bot import member_cache, sharding
 from .task_registry import register_task, mark_start, mark_finish
 
 
-def send_notification(discord_member, email, mobile, subject, message, cfg):
+async def send_notification(discord_member, email, mobile, subject, message, cfg):
     """Send reminder across all enabled channels and return list of channels that succeeded."""
     sent_channels = []
     notify_discord = cfg.getboolean("Reminders", "NotifyDiscord", fallback=True)
@@ -32,26 +30,23 @@ def send_notification(discord_member, email, mobile, subject, message, cfg):
     # Discord
     if notify_discord and discord_member:
         try:
-            import asyncio
-            asyncio.run_coroutine_threadsafe(
-                discord_member.send(message), bot.loop
-            )
+            await discord_member.send(message)
             sent_channels.append("Discord")
         except Exception as e:
             print(f"⚠️ Discord DM failed for {discord_member}: {e}")
 
-    # Email
+    # Email (SMTP runs on the I/O pool)
     if notify_email and email:
         try:
-            send_email(subject, message, to=email)
+            await send_email_async(subject, message, to=email)
             sent_channels.append("Email")
         except Exception as e:
             print(f"⚠️ Email send failed for {email}: {e}")
 
-    # SMS
+    # SMS (HTTP gateway runs on the I/O pool)
     if notify_sms and mobile:
         try:
-            send_sms(mobile, message)
+            await send_sms_async(mobile, message)
             sent_channels.append("SMS")
         except Exception as e:
             print(f"⚠️ SMS send failed for {mobile}: {e}")
@@ -59,6 +54,12 @@ def send_notification(discord_member, email, mobile, subject, message, cfg):
     return sent_channels
 
 
+def _read_config():
+    cfg = configparser.ConfigParser()
+    cfg.read(os.path.join("config", "config.ini"), encoding="utf-8")
+    return cfg
+
+
 @tasks.loop(hours=12)
 async def send_renewal_reminders():
     """Send trial and paid renewal reminders via Discord, Email, or SMS."""
@@ -66,33 +67,26 @@ async def send_renewal_reminders():
     started = datetime.now(timezone.utc)
     mark_start(task_name, send_renewal_reminders)
 
-    cfg = configparser.ConfigParser()
-    cfg.read(os.path.join("config", "config.ini"), encoding="utf-8")
-    
+    cfg = await run_blocking(_read_config)
+
     SERVER_NAME = cfg.get("General", "ServerName", fallback="My Plex Server")
     now = datetime.now(timezone.utc)
     horizon = now + timedelta(days=REMINDER_DAYS)
-    due = get_all_for_reminders()
+    due = await db.get_all_for_reminders()
 
-    # Find lifetime role once
-    lifetime_role = None
-    for g in bot.guilds:
-        r = discord.utils.get(g.roles, name=LIFETIME_ROLE)
-        if r:
-            lifetime_role = r
-            break
+    def _guild_of(row):
+        discord_id = row[0]
+        return guild_cache.find_member(discord_id)[0] if discord_id and discord_id.isdigit() else None
 
-    for discord_id, email, mobile, trial_end, paid_until, trial_rem_at, paid_rem_at in due:
+    async def _remind(row):
+        discord_id, email, mobile, trial_end, paid_until, trial_rem_at, paid_rem_at = row
         # Skip lifetime members
         member = None
         if discord_id and discord_id.isdigit():
-            for g in bot.guilds:
-                m = g.get_member(int(discord_id))
-                if m:
-                    member = m
-                    if lifetime_role and lifetime_role in m.roles:
-                        member = None
-                    break
+            g, m = await member_cache.find(discord_id, bot.guilds, fetch=False)
+            if m:
+                lifetime_role = guild_cache.role(g, LIFETIME_ROLE)
+                member = None if lifetime_role and lifetime_role in m.roles else m
 
         # ========== TRIAL REMINDER ==========
         t_end = parse_iso(trial_end)
@@ -105,9 +99,9 @@ async def send_renewal_reminders():
                 m6=pay_page(discord_id, "6"),
                 m12=pay_page(discord_id, "12"),
             )
-            sent = send_notification(member, email, mobile, subject, msg, cfg)
+            sent = await send_notification(member, email, mobile, subject, msg, cfg)
             if sent:
-                mark_trial_reminder_sent(discord_id or email or mobile)
+                await db.mark_trial_reminder_sent(discord_id or email or mobile)
                 await send_admin(
                     f"🔔 Trial reminder sent to {member.mention if member else email or mobile} "
                     f"(ends {t_end.date()}) via {', '.join(sent)}."
@@ -124,14 +118,21 @@ async def send_renewal_reminders():
                 m6=pay_page(discord_id, "6"),
                 m12=pay_page(discord_id, "12"),
             )
-            sent = send_notification(member, email, mobile, subject, msg, cfg)
+            sent = await send_notification(member, email, mobile, subject, msg, cfg)
             if sent:
-                mark_paid_reminder_sent(discord_id or email or mobile)
+                await db.mark_paid_reminder_sent(discord_id or email or mobile)
                 await send_admin(
                     f"🔔 Subscription reminder sent to {member.mention if member else email or mobile} "
                     f"(ends {p_end.date()}) via {', '.join(sent)}."
                 )
 
+    async def _remind_shard(shard_id, rows):
+        for row in rows:
+            await _remind(row)
+
+    # Members without a Discord link (email/SMS only) ride along with shard 0
+    await sharding.run_partitions("Renewal reminders", sharding.partition(due, _guild_of), _remind_shard)
+
     mark_finish(task_name, started, send_renewal_reminders)
 
 
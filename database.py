@@ -1,8 +1,13 @@
 import os
+import json
 import sqlite3
 import configparser
 from datetime import datetime, timezone, timedelta
 import secrets
+import base64
+import re
+import threading
+import time
 
 # ─────────────────────────────
 # Database Path (Persistent)
@@ -105,12 +110,255 @@ def init_db():
     conn.close()
 
 
+# ─────────────────────────────
+# Event journal (append-only; see ensure_schema)
+# ─────────────────────────────
+EVENT_TYPES = (
+    "member_join", "member_removed", "discord_join", "discord_leave",
+    "trial_start", "trial_end", "trial_extend", "payment", "referral", "referral_paid",
+    "referral_bonus", "promo_used", "role_change", "status_change", "plex_invite", "plex_remove",
+    "member_import",
+)
+
+
+def _record_event(c, event_type, discord_id=None, message="", email=None, data=None):
+    """Append an event using the caller's cursor, so it commits with the change it describes."""
+    c.execute(
+        "INSERT INTO events (created_at, type, discord_id, email, message, data) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            datetime.now(timezone.utc).isoformat(timespec="seconds"), event_type,
+            str(discord_id) if discord_id is not None else None, email or None, message,
+            json.dumps(data) if data else None,
+        ),
+    )
+
+
+def record_event(event_type, discord_id=None, message="", email=None, data=None):
+    """Standalone event for transitions with no row change of their own (Plex, Discord joins)."""
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        _record_event(conn.cursor(), event_type, discord_id, message, email, data)
+    conn.close()
+
+
+def get_events(before=None, limit=50, event_type=None, discord_id=None, since=None):
+    """Newest-first page of events. `before` is the id cursor from the previous page.
+
+    Returns (events, next_cursor); next_cursor is None on the last page.
+    """
+    where, args = [], []
+    if before:
+        where.append("id < ?"); args.append(int(before))
+    if event_type:
+        types = [t for t in str(event_type).split(",") if t]
+        where.append(f"type IN ({','.join('?' * len(types))})"); args.extend(types)
+    if discord_id:
+        where.append("discord_id = ?"); args.append(str(discord_id))
+    if since:
+        where.append("created_at >= ?"); args.append(str(since))
+    limit = max(1, min(int(limit), 500))
+    sql = "SELECT id, created_at, type, discord_id, email, message, data FROM events"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC LIMIT ?"
+    conn = sqlite3.connect(DB_PATH)
+    rows = conn.execute(sql, (*args, limit + 1)).fetchall()
+    conn.close()
+    events = [
+        {"id": r[0], "time": r[1], "type": r[2], "discord_id": r[3], "email": r[4],
+         "message": r[5], "data": json.loads(r[6]) if r[6] else None}
+        for r in rows[:limit]
+    ]
+    return events, (events[-1]["id"] if len(rows) > limit else None)
+
+
+# ─────────────────────────────
+# Backup catalog (written by helpers/backups.py)
+# ─────────────────────────────
+# Kept in its own file beside the backups rather than in members.db, so
+# recording a backup does not change the next snapshot (which would defeat
+# checksum dedupe) and restoring a snapshot does not roll the catalog back.
+BACKUP_CATALOG_PATH = os.path.join("exports", "catalog.db")
+BACKUP_COLUMNS = (
+    "created_at", "file", "origin", "size_bytes", "pages", "duration_ms", "integrity",
+    "checksum", "schema_version", "stored_bytes", "status",
+)
+_catalog_ready = False
+
+
+def _catalog():
+    global _catalog_ready
+    os.makedirs(os.path.dirname(BACKUP_CATALOG_PATH), exist_ok=True)
+    conn = sqlite3.connect(BACKUP_CATALOG_PATH)
+    if not _catalog_ready:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS backups (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                created_at TEXT NOT NULL,
+                file TEXT NOT NULL,
+                origin TEXT,
+                size_bytes INTEGER,
+                pages INTEGER,
+                duration_ms INTEGER,
+                integrity TEXT,
+                checksum TEXT,
+                schema_version INTEGER,
+                stored_bytes INTEGER,
+                status TEXT NOT NULL DEFAULT 'ok'   -- ok | failed | duplicate | pruned | deleted
+            );
+            CREATE INDEX IF NOT EXISTS idx_backups_created ON backups(created_at);
+            CREATE INDEX IF NOT EXISTS idx_backups_checksum ON backups(checksum);
+            CREATE INDEX IF NOT EXISTS idx_backups_file ON backups(file);
+        """)
+        _catalog_ready = True
+    return conn
+
+
+def record_backup(file, origin, created_at=None, **fields) -> int:
+    """Insert a catalog row (any of BACKUP_COLUMNS as keywords); returns its id."""
+    row = {"created_at": created_at or datetime.now(timezone.utc).isoformat(timespec="seconds"),
+           "file": file, "origin": origin, "status": "ok"}
+    row.update({k: v for k, v in fields.items() if k in BACKUP_COLUMNS})
+    conn = _catalog()
+    with conn:
+        cur = conn.execute(f"INSERT INTO backups ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                           tuple(row.values()))
+    conn.close()
+    return cur.lastrowid
+
+
+def update_backup(backup_id, **fields):
+    fields = {k: v for k, v in fields.items() if k in BACKUP_COLUMNS}
+    if not fields:
+        return
+    conn = _catalog()
+    with conn:
+        conn.execute(f"UPDATE backups SET {', '.join(f'{k} = ?' for k in fields)} WHERE id = ?",
+                     (*fields.values(), backup_id))
+    conn.close()
+
+
+def get_backups(limit=50, status="ok", origin=None):
+    """Newest-first catalog rows as dicts; status=None for every attempt."""
+    where, args = [], []
+    if status:
+        where.append("status = ?"); args.append(status)
+    if origin:
+        origins = [o for o in str(origin).split(",") if o]
+        where.append(f"origin IN ({','.join('?' * len(origins))})"); args.extend(origins)
+    sql = "SELECT * FROM backups" + (" WHERE " + " AND ".join(where) if where else "")
+    conn = _catalog()
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute(sql + " ORDER BY created_at DESC, id DESC LIMIT ?", (*args, int(limit))).fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+
+def get_backup(file=None, checksum=None):
+    """The stored ('ok') catalog row for a file name or content checksum, or None."""
+    column, value = ("file", file) if file else ("checksum", checksum)
+    conn = _catalog()
+    conn.row_factory = sqlite3.Row
+    row = conn.execute(f"SELECT * FROM backups WHERE {column} = ? AND status = 'ok' ORDER BY id DESC LIMIT 1",
+                       (value,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+_counter_conn = None
+_counter_lock = threading.Lock()
+
+
+def get_generation():
+    """(generation, changed_at) of the change counter; moves on every members/events write.
+
+    Polled on every API request, so it reuses one long-lived read connection
+    instead of opening the database each time.
+    """
+    global _counter_conn
+    with _counter_lock:
+        if _counter_conn is None:
+            _counter_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        row = _counter_conn.execute("SELECT generation, changed_at FROM change_counter WHERE id = 1").fetchone()
+    return row or (0, None)
+
+
+# ─────────────────────────────
+# Member stats (SQL aggregates, memoized on the change counter)
+# ─────────────────────────────
+# Shared by the dashboard, /api/stats, the report summary and the daily
+# summary. The memo holds until a write bumps the generation or the next
+# trial/paid expiry passes, whichever is first. Dates are compared by
+# julianday(), so stamps with an offset are converted and naive ones count
+# as UTC; unparseable values are ignored.
+_stats_memo = {"generation": None, "valid_until": 0.0, "value": None}
+_stats_lock = threading.Lock()
+
+
+def _compute_member_stats(conn):
+    row = conn.execute("""
+        SELECT COUNT(*),
+               COALESCE(SUM(julianday(trial_end) > julianday('now')), 0),
+               COALESCE(SUM(julianday(paid_until) > julianday('now')), 0),
+               COALESCE(SUM(julianday(trial_end) < julianday('now') OR julianday(paid_until) < julianday('now')), 0),
+               COALESCE(SUM(referrer_id IS NOT NULL AND referrer_id != ''), 0),
+               COALESCE(SUM(is_referrer = 1), 0),
+               COALESCE(SUM(referral_paid = 1), 0),
+               MIN(CASE WHEN julianday(trial_end) > julianday('now') THEN julianday(trial_end) END),
+               MIN(CASE WHEN julianday(paid_until) > julianday('now') THEN julianday(paid_until) END)
+        FROM members
+    """).fetchone()
+    by_status = dict(conn.execute(
+        "SELECT COALESCE(status, ''), COUNT(*) FROM members GROUP BY COALESCE(status, '')"
+    ).fetchall())
+    # Last 10 by discord_id, oldest first (what the report preview always showed)
+    preview = conn.execute("""
+        SELECT discord_tag, email, trial_end, paid_until, referrer_id
+        FROM members ORDER BY discord_id DESC LIMIT 10
+    """).fetchall()[::-1]
+
+    next_expiry = min((jd for jd in row[7:9] if jd is not None), default=None)
+    valid_until = (next_expiry - 2440587.5) * 86400 if next_expiry else float("inf")
+    value = {
+        "total": row[0],
+        "active_trials": row[1],
+        "active_payers": row[2],
+        "expired": row[3],
+        "by_status": by_status,
+        "referrals": {"referred": row[4], "referrers": row[5], "paid": row[6]},
+        "preview": [
+            {"tag": r[0], "email": r[1], "trial_end": r[2], "paid_until": r[3], "referrer": r[4]}
+            for r in preview
+        ],
+    }
+    return value, valid_until
+
+
+def member_stats() -> dict:
+    """Counters, status/referral totals and the newest-10 preview. Treat the result as read-only."""
+    generation, _ = get_generation()
+    memo = _stats_memo
+    if memo["generation"] == generation and time.time() < memo["valid_until"]:
+        return memo["value"]
+    with _stats_lock:
+        if memo["generation"] == generation and time.time() < memo["valid_until"]:
+            return memo["value"]
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            value, valid_until = _compute_member_stats(conn)
+        finally:
+            conn.close()
+        memo.update(generation=generation, valid_until=valid_until, value=value)
+        return value
+
+
 def set_referrer(discord_id, referrer_id):
     """Record who referred a member and mark the referrer as active."""
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute("UPDATE members SET referrer_id=? WHERE discord_id=?", (str(referrer_id), str(discord_id)))
     c.execute("UPDATE members SET is_referrer=1 WHERE discord_id=?", (str(referrer_id),))
+    _record_event(c, "referral", discord_id, f"Referred by {referrer_id}", data={"referrer_id": str(referrer_id)})
     conn.commit()
     conn.close()
 
@@ -120,6 +368,7 @@ def mark_referral_paid(referrer_id):
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute("UPDATE members SET referral_paid=1 WHERE discord_id=?", (str(referrer_id),))
+    _record_event(c, "referral_paid", referrer_id, "Referral credit paid")
     conn.commit()
     conn.close()
 
@@ -145,6 +394,9 @@ def start_trial(discord_id, duration_days):
         SET trial_start=?, trial_end=?, had_trial=1
         WHERE discord_id=?
     """, (now.isoformat(), end.isoformat(), str(discord_id)))
+    if c.rowcount:
+        _record_event(c, "trial_start", discord_id, f"{duration_days}-day trial started (ends {end.date()})",
+                      data={"days": duration_days, "trial_end": end.isoformat()})
     conn.commit()
     conn.close()
 
@@ -177,7 +429,9 @@ def end_trial(discord_id):
     """End the trial immediately."""
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
-    cur.execute("UPDATE members SET trial_end=NULL WHERE discord_id=?", (str(discord_id),))
+    cur.execute("UPDATE members SET trial_end=NULL WHERE discord_id=? AND trial_end IS NOT NULL", (str(discord_id),))
+    if cur.rowcount:
+        _record_event(cur, "trial_end", discord_id, "Trial ended")
     conn.commit()
     conn.close()
 
@@ -223,6 +477,8 @@ def update_payment(discord_id, months):
         SET paid_until=?, trial_end=NULL
         WHERE discord_id=?
     """, (new_paid_until.isoformat(), str(discord_id)))
+    _record_event(c, "payment", discord_id, f"Paid {months} month(s) — access until {new_paid_until.date()}",
+                  data={"months": int(months), "paid_until": new_paid_until.isoformat()})
     conn.commit()
     conn.close()
 
@@ -273,6 +529,7 @@ def mark_promo_used(discord_id):
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
     c.execute("UPDATE members SET used_promo=1 WHERE discord_id=?", (str(discord_id),))
+    _record_event(c, "promo_used", discord_id, "Promo pricing used")
     conn.commit()
     conn.close()
 
@@ -357,6 +614,204 @@ def get_all_members():
     conn.close()
     return rows
 
+
+# Columns /api/members may return (selectable with ?fields=)
+MEMBER_FIELDS = (
+    "discord_id", "discord_tag", "first_name", "last_name", "email", "mobile",
+    "trial_start", "trial_end", "paid_until", "origin", "status", "referrer_id", "plex_username",
+)
+
+# Sort key -> SQL expression. Each one has a matching expression index in
+# ensure_schema(), so ORDER BY / keyset seeks never scan the whole table.
+MEMBER_SORTS = {
+    "name": "lower(COALESCE(first_name, '') || ' ' || COALESCE(last_name, ''))",
+    "email": "lower(COALESCE(email, ''))",
+    "status": "COALESCE(status, '')",
+    "trial_end": "COALESCE(trial_end, '')",
+    "paid_until": "COALESCE(paid_until, '')",
+    "discord_id": "discord_id",
+}
+
+
+def _encode_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def query_members(status=None, origin=None, q=None, expires_within=None, sort="name", desc=False,
+                  limit=100, cursor=None, fields=None, default_status=None, count=True):
+    """One page of members, filtered and sorted in SQL.
+
+    `status`/`origin` are comma lists; `default_status` is the status a NULL
+    row counts as. `expires_within` keeps members whose trial or paid access
+    ends in the next N days. `cursor` is the opaque `next` value of the
+    previous page. Returns (rows as dicts, next_cursor, total matching);
+    total is None with count=False.
+    """
+    if sort not in MEMBER_SORTS:
+        raise ValueError(f"unknown sort key '{sort}'")
+    cols = [f for f in (fields or MEMBER_FIELDS) if f in MEMBER_FIELDS]
+    if "discord_id" not in cols:
+        cols.insert(0, "discord_id")
+
+    where, args = [], []
+    if status:
+        wanted = [s.strip() for s in str(status).split(",") if s.strip()]
+        clause = f"status IN ({','.join('?' * len(wanted))})"
+        if default_status and default_status.lower() in (s.lower() for s in wanted):
+            clause = f"({clause} OR status IS NULL OR status = '')"
+        where.append(clause); args.extend(wanted)
+    if origin:
+        wanted = [o.strip() for o in str(origin).split(",") if o.strip()]
+        where.append(f"origin IN ({','.join('?' * len(wanted))})"); args.extend(wanted)
+    if q and FTS_ENABLED:
+        match = _fts_query(q)
+        if match:
+            where.append("discord_id IN (SELECT discord_id FROM members_fts WHERE members_fts MATCH ?)")
+            args.append(match)
+    elif q:
+        like = f"%{str(q).strip().lower()}%"
+        where.append(
+            "(lower(first_name) LIKE ? OR lower(last_name) LIKE ? OR lower(email) LIKE ?"
+            " OR lower(discord_tag) LIKE ? OR lower(plex_username) LIKE ? OR discord_id LIKE ?)"
+        )
+        args.extend([like] * 6)
+    if expires_within is not None:
+        now = datetime.now()
+        window = (now.isoformat(timespec="seconds"),
+                  (now + timedelta(days=int(expires_within))).isoformat(timespec="seconds"))
+        where.append("((trial_end >= ? AND trial_end < ?) OR (paid_until >= ? AND paid_until < ?))")
+        args.extend(window * 2)
+
+    conn = sqlite3.connect(DB_PATH)
+    filter_sql = (" WHERE " + " AND ".join(where)) if where else ""
+    total = conn.execute(f"SELECT COUNT(*) FROM members{filter_sql}", args).fetchone()[0] if count else None
+
+    expr = MEMBER_SORTS[sort]
+    page_where, page_args = list(where), list(args)
+    if cursor:
+        key, last_id = _decode_cursor(cursor)
+        page_where.append(f"({expr}, discord_id) {'<' if desc else '>'} (?, ?)")
+        page_args.extend([key, last_id])
+    direction = "DESC" if desc else "ASC"
+    limit = max(1, min(int(limit), 500))
+    sql = (f"SELECT {expr}, {', '.join(cols)} FROM members"
+           + ((" WHERE " + " AND ".join(page_where)) if page_where else "")
+           + f" ORDER BY {expr} {direction}, discord_id {direction} LIMIT ?")
+    rows = conn.execute(sql, (*page_args, limit + 1)).fetchall()
+    conn.close()
+
+    page = [dict(zip(cols, r[1:])) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor([last[0], page[-1]["discord_id"]])
+    return page, next_cursor, total
+
+
+def iter_members(batch=500, **filters):
+    """Every member matching query_members() filters, `batch` rows per short read.
+
+    Each batch is its own keyset query, so a slow consumer (a download) never
+    holds a read lock across the whole table and memory stays at one batch.
+    """
+    cursor = None
+    while True:
+        page, cursor, _ = query_members(limit=batch, cursor=cursor, count=False, **filters)
+        yield from page
+        if not cursor:
+            return
+
+
+def iter_events(batch=500, **filters):
+    """Every journal event matching get_events() filters, newest first, in keyset batches."""
+    before = None
+    while True:
+        events, before = get_events(before=before, limit=batch, **filters)
+        yield from events
+        if not before:
+            return
+
+
+# ─────────────────────────────
+# Full-text member search (members_fts, see ensure_schema)
+# ─────────────────────────────
+FTS_ENABLED = False  # set by ensure_schema() when SQLite has FTS5
+FTS_COLUMNS = ("discord_id", "discord_tag", "first_name", "last_name", "email", "mobile", "plex_username")
+# bm25 weights, same order as FTS_COLUMNS: names rank above contact details
+FTS_WEIGHTS = (2.0, 8.0, 10.0, 10.0, 5.0, 2.0, 6.0)
+FTS_RANK_LIMIT = 2000  # rank by relevance only when a query matches at most this many members
+
+
+def _fts_query(text: str) -> str:
+    """Typed text -> FTS5 query: every word must match as a prefix ("jo sm" finds John Smith)."""
+    words = re.findall(r"\w+", str(text or "").lower())
+    return " ".join(f'"{w}"*' for w in words[:8])
+
+
+def search_members(text: str, limit: int = 10) -> list[dict]:
+    """Typeahead: best-ranked members whose tag, name, email, mobile, Plex name or id starts with `text`."""
+    match = _fts_query(text)
+    if not match:
+        return []
+    limit = max(1, min(int(limit), 50))
+    conn = sqlite3.connect(DB_PATH)
+    if FTS_ENABLED:
+        # bm25 has to score every hit; for very broad prefixes ("a") that costs
+        # more than it is worth, so those return index order until more is typed
+        hits = conn.execute("SELECT COUNT(*) FROM members_fts WHERE members_fts MATCH ?", (match,)).fetchone()[0]
+        score = f"bm25(members_fts, {', '.join(map(str, FTS_WEIGHTS))})" if hits <= FTS_RANK_LIMIT else "rowid"
+        rows = conn.execute(f"""
+            SELECT m.discord_id, m.discord_tag, m.first_name, m.last_name, m.email, m.plex_username, m.status
+            FROM (
+                SELECT discord_id, {score} AS score
+                FROM members_fts WHERE members_fts MATCH ? ORDER BY score LIMIT ?
+            ) f JOIN members m ON m.discord_id = f.discord_id
+            ORDER BY f.score
+        """, (match, limit)).fetchall()
+    else:
+        rows = conn.execute("""
+            SELECT discord_id, discord_tag, first_name, last_name, email, plex_username, status
+            FROM members
+            WHERE lower(discord_tag) LIKE ? OR lower(first_name) LIKE ? OR lower(last_name) LIKE ?
+               OR lower(email) LIKE ? OR lower(plex_username) LIKE ? OR discord_id LIKE ?
+            LIMIT ?
+        """, (*[f"{str(text).strip().lower()}%"] * 6, limit)).fetchall()
+    conn.close()
+    keys = ("discord_id", "discord_tag", "first_name", "last_name", "email", "plex_username", "status")
+    return [dict(zip(keys, r)) for r in rows]
+
+
+def find_member(term: str):
+    """Resolve an admin-typed target (id, email, Discord tag or Plex username, any case) to one member row."""
+    t = str(term or "").strip()
+    if not t:
+        return None
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute("SELECT * FROM members WHERE discord_id = ?", (t,))
+    row = c.fetchone()
+    if not row:
+        c.execute("SELECT * FROM members WHERE lower(email) = lower(?)", (t,))
+        row = c.fetchone()
+    if not row and FTS_ENABLED and _fts_query(t):
+        # Narrow with the index, then compare exactly (tokens alone would match substrings)
+        c.execute("""
+            SELECT m.* FROM members_fts f JOIN members m ON m.discord_id = f.discord_id
+            WHERE members_fts MATCH ?
+              AND (lower(m.discord_id) = lower(?) OR lower(m.discord_tag) = lower(?)
+                   OR lower(m.plex_username) = lower(?))
+            LIMIT 1
+        """, ("{discord_id discord_tag plex_username} : (" + _fts_query(t).replace("*", "") + ")", t, t, t))
+        row = c.fetchone()
+    conn.close()
+    return row
+
+
 def get_member(discord_id):
     conn = sqlite3.connect(DB_PATH)
     c = conn.cursor()
@@ -529,10 +984,118 @@ def save_member(
             discord_id, discord_tag, first_name, last_name, email, mobile,
             origin, status, roles_value
         ))
+        _record_event(c, "member_join", discord_id, f"New member {discord_tag or email or discord_id} ({origin})",
+                      email=email, data={"origin": origin})
 
     conn.commit()
     conn.close()
 
+# ─────────────────────────────
+# Bulk member import (see helpers/imports.py)
+# ─────────────────────────────
+IMPORT_FIELDS = (
+    "discord_id", "discord_tag", "first_name", "last_name", "email", "mobile", "plex_username",
+    "status", "trial_start", "trial_end", "paid_until", "referrer_id",
+)
+_IMPORT_LOOKUP_CHUNK = 500  # bound parameters per IN (...) lookup
+
+
+def _lookup_existing(c, column_expr, keys):
+    """{key: [IMPORT_FIELDS values..., had_trial]} for members whose `column_expr` is in `keys`."""
+    found = {}
+    keys = list(keys)
+    cols = ", ".join(IMPORT_FIELDS)
+    for i in range(0, len(keys), _IMPORT_LOOKUP_CHUNK):
+        part = keys[i:i + _IMPORT_LOOKUP_CHUNK]
+        c.execute(f"SELECT {column_expr}, {cols}, COALESCE(had_trial, 0) FROM members "
+                  f"WHERE {column_expr} IN ({','.join('?' * len(part))})", part)
+        for key, *values in c.fetchall():
+            found[key] = values
+    return found
+
+
+def import_members_batch(rows, dry_run=False, shadow=None):
+    """Upsert one batch of normalized member dicts (IMPORT_FIELDS, plus "line") in a single transaction.
+
+    Rows match an existing member by discord_id, else by email (through the
+    lower(email) index). Non-blank values overwrite, blanks keep what is
+    stored, like save_member(); rows that would change nothing are skipped,
+    so re-importing a file does not touch the search index or the change
+    counter. An email match can only give a placeholder member ('plex:…',
+    'noid') its real discord_id; any other id/email clash is a row error.
+    New email-only rows get the usual 'plex:<email>' id.
+
+    With dry_run nothing is written; pass the same `shadow` dict to every
+    batch so rows "written" by earlier batches are seen by later ones.
+    Returns (inserted, updated, unchanged, errors), errors as [(line, message)].
+    """
+    shadow = shadow if shadow is not None else {"members": {}, "emails": {}}
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    members = _lookup_existing(c, "discord_id", {r.get("discord_id") or f"plex:{r['email']}" for r in rows})
+    email_rows = _lookup_existing(c, "lower(email)", {r["email"] for r in rows if r.get("email")})
+    emails = {email: values[0] for email, values in email_rows.items()}
+    members.update({values[0]: values for values in email_rows.values()})
+    members.update(shadow["members"])
+    emails.update(shadow["emails"])
+
+    inserts, updates, errors, unchanged = [], [], [], 0
+    touched = set()
+    for r in rows:
+        new_id, email = r.get("discord_id") or "", r.get("email") or ""
+        owner = emails.get(email) if email else None
+        if owner and not members.get(owner):
+            owner = None  # renamed earlier in this import
+        if not new_id and not owner and members.get(f"plex:{email}"):
+            owner = f"plex:{email}"  # placeholder row whose email was since cleared
+        if owner and new_id and owner != new_id and (members.get(new_id) or owner.isdigit()):
+            errors.append((r.get("line"), f"email {email} already belongs to member {owner}"))
+            continue
+
+        current = new_id if members.get(new_id) else owner
+        incoming = [r.get(f) or "" for f in IMPORT_FIELDS]
+        had_trial = 1 if (r.get("trial_start") or r.get("trial_end")) else 0
+        stored = members.get(current) if current else None
+        if stored:
+            merged = [new or old for new, old in zip(incoming, stored)] + [max(stored[-1], had_trial)]
+            if merged == stored:
+                unchanged += 1
+                continue
+            updates.append((*incoming, had_trial, current))
+        else:
+            merged = [v or None for v in incoming] + [had_trial]
+            merged[0] = new_id or f"plex:{email}"
+            inserts.append(tuple(merged))
+        final_id, final_email = merged[0], (merged[4] or "").lower()
+        if current and final_id != current:
+            members[current] = None
+            touched.add(current)
+        members[final_id] = merged
+        touched.add(final_id)
+        if final_email:
+            emails[final_email] = final_id
+            if dry_run:
+                shadow["emails"][final_email] = final_id
+
+    if dry_run:
+        shadow["members"].update({key: members[key] for key in touched})
+    elif inserts or updates:
+        cols = ", ".join(IMPORT_FIELDS)
+        c.executemany(
+            f"INSERT INTO members ({cols}, had_trial, origin) "
+            f"VALUES ({', '.join('?' * len(IMPORT_FIELDS))}, ?, 'import')",
+            inserts,
+        )
+        assignments = ", ".join(f"{f} = COALESCE(NULLIF(?, ''), {f})" for f in IMPORT_FIELDS)
+        c.executemany(
+            f"UPDATE members SET {assignments}, had_trial = MAX(COALESCE(had_trial, 0), ?) WHERE discord_id = ?",
+            updates,
+        )
+        conn.commit()
+    conn.close()
+    return len(inserts), len(updates), unchanged, errors
+
+
 def delete_member(discord_id=None, email=None):
     """
     Forcefully remove a member record — by Discord ID, email, or both.
@@ -553,8 +1116,12 @@ def delete_member(discord_id=None, email=None):
             c.execute("DELETE FROM members WHERE (discord_id IS NULL OR discord_id = '' OR discord_id = 'noid') "
                       "AND (email IS NULL OR email = '')")
 
+        deleted = c.rowcount
+        if deleted > 0:
+            _record_event(c, "member_removed", discord_id if discord_id not in ("", "None", "noid") else None,
+                          f"Member record deleted ({deleted} row(s))", email=email)
         conn.commit()
-        return c.rowcount > 0
+        return deleted > 0
 
     
 def update_member_role(discord_id, role: str):
@@ -573,6 +1140,7 @@ def update_member_role(discord_id, role: str):
             "UPDATE members SET trial_start=NULL, trial_end=NULL, paid_until=NULL WHERE discord_id=?",
             (str(discord_id),),
         )
+        _record_event(c, "role_change", discord_id, "Access removed (No Access)", data={"role": role})
         conn.commit()
         conn.close()
         return
@@ -594,6 +1162,7 @@ def update_member_role(discord_id, role: str):
             "UPDATE members SET paid_until=?, trial_end=NULL WHERE discord_id=?",
             (far_future.isoformat(), str(discord_id)),
         )
+        _record_event(c, "role_change", discord_id, "Lifetime access granted", data={"role": role})
         conn.commit()
         conn.close()
         return
@@ -676,6 +1245,8 @@ def apply_referral_bonus(referrer_id: str, new_member_id: str, referral_cfg, tri
                 c.execute("UPDATE members SET trial_end = date(trial_end, ? || ' days') WHERE discord_id=?",
                           (referral_bonus, referrer_id))
 
+        _record_event(c, "referral_bonus", referrer_id, f"+{referral_bonus} days for referring {new_member_id}",
+                      data={"new_member_id": str(new_member_id), "days": referral_bonus})
         conn.commit()
     except Exception as e:
         print(f"⚠️ Referral bonus error: {e}")
@@ -708,6 +1279,9 @@ def update_paid_until(discord_id: str, days: int = 30):
             pass
 
     cur.execute("UPDATE members SET paid_until = ? WHERE discord_id = ?", (new_date.isoformat(), discord_id))
+    if cur.rowcount:
+        _record_event(cur, "payment", discord_id, f"Paid access +{days} days (until {new_date.date()})",
+                      data={"days": days, "paid_until": new_date.isoformat()})
     conn.commit()
     conn.close()
     return new_date.isoformat()
@@ -733,6 +1307,9 @@ def extend_trial(discord_id: str, days: int = 7):
             pass
 
     cur.execute("UPDATE members SET trial_end = ? WHERE discord_id = ?", (new_date.isoformat(), discord_id))
+    if cur.rowcount:
+        _record_event(cur, "trial_extend", discord_id, f"Trial extended +{days} days (until {new_date.date()})",
+                      data={"days": days, "trial_end": new_date.isoformat()})
     conn.commit()
     conn.close()
     return new_date.isoformat()
@@ -744,6 +1321,8 @@ def update_member_status(discord_id: str, new_status: str):
     cur = conn.cursor()
     cur.execute("UPDATE members SET status = ? WHERE discord_id = ?", (new_status, discord_id))
     print(f"🟢 Updated {discord_id} to {new_status}")
+    if cur.rowcount:
+        _record_event(cur, "status_change", discord_id, f"Status → {new_status}", data={"status": new_status})
     conn.commit()
     conn.close()
     return True
@@ -791,6 +1370,143 @@ def ensure_schema():
     """)
     conn.commit()
 
+    # ─────────────────────────────
+    # Ensure 'onboarding_sessions' table exists (DM questionnaires)
+    # ─────────────────────────────
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS onboarding_sessions (
+            discord_id TEXT PRIMARY KEY,
+            guild_id TEXT,
+            flow TEXT NOT NULL,
+            stage INTEGER NOT NULL DEFAULT 0,
+            answers TEXT NOT NULL DEFAULT '{}',
+            context TEXT NOT NULL DEFAULT '{}',
+            started_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+
+    # ─────────────────────────────
+    # Ensure 'events' journal exists (append-only; written with each change)
+    # ─────────────────────────────
+    c.executescript("""
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at TEXT NOT NULL,
+            type TEXT NOT NULL,
+            discord_id TEXT,
+            email TEXT,
+            message TEXT,
+            data TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_events_created ON events(created_at);
+        CREATE INDEX IF NOT EXISTS idx_events_member ON events(discord_id, id);
+        CREATE INDEX IF NOT EXISTS idx_events_type ON events(type, id);
+        CREATE TRIGGER IF NOT EXISTS events_no_update BEFORE UPDATE ON events
+        BEGIN SELECT RAISE(ABORT, 'events is append-only'); END;
+        CREATE TRIGGER IF NOT EXISTS events_no_delete BEFORE DELETE ON events
+        BEGIN SELECT RAISE(ABORT, 'events is append-only'); END;
+    """)
+    conn.commit()
+
+    # ─────────────────────────────
+    # Backup metadata used to live in members.db; move it to the catalog file
+    # ─────────────────────────────
+    if c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'backups'").fetchone():
+        old_rows = c.execute("SELECT created_at, file, origin, size_bytes, pages, duration_ms, integrity "
+                             "FROM backups ORDER BY id").fetchall()
+        catalog = _catalog()
+        with catalog:
+            for row in old_rows:
+                if not catalog.execute("SELECT 1 FROM backups WHERE file = ?", (row[1],)).fetchone():
+                    catalog.execute(
+                        "INSERT INTO backups (created_at, file, origin, size_bytes, pages, duration_ms, integrity, "
+                        "status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (*row, "ok" if row[6] == "ok" else "failed"))
+        catalog.close()
+        c.execute("DROP TABLE backups")
+        conn.commit()
+        print(f"🆕 Moved {len(old_rows)} backup record(s) to {BACKUP_CATALOG_PATH}.")
+
+    # ─────────────────────────────
+    # Change counter: one row bumped by every members/events write, so
+    # readers can tell "nothing changed" without reading the data (ETags)
+    # ─────────────────────────────
+    bump = ("UPDATE change_counter SET generation = generation + 1, "
+            "changed_at = strftime('%Y-%m-%dT%H:%M:%SZ', 'now') WHERE id = 1;")
+    c.executescript(f"""
+        CREATE TABLE IF NOT EXISTS change_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL,
+            changed_at TEXT NOT NULL
+        );
+        INSERT OR IGNORE INTO change_counter VALUES (1, 0, strftime('%Y-%m-%dT%H:%M:%SZ', 'now'));
+        CREATE TRIGGER IF NOT EXISTS members_gen_ai AFTER INSERT ON members BEGIN {bump} END;
+        CREATE TRIGGER IF NOT EXISTS members_gen_au AFTER UPDATE ON members BEGIN {bump} END;
+        CREATE TRIGGER IF NOT EXISTS members_gen_ad AFTER DELETE ON members BEGIN {bump} END;
+        CREATE TRIGGER IF NOT EXISTS events_gen_ai AFTER INSERT ON events BEGIN {bump} END;
+    """)
+    conn.commit()
+
+    # ─────────────────────────────
+    # Full-text search index over the member identity columns
+    # ─────────────────────────────
+    global FTS_ENABLED
+    cols = ", ".join(FTS_COLUMNS)
+    new_cols = ", ".join(f"new.{col}" for col in FTS_COLUMNS)
+    # Old rows are found through the index by their id tokens, then matched
+    # exactly; ids with no tokens at all (blank) fall back to a plain scan
+    drop_old = """
+        DELETE FROM members_fts WHERE rowid IN (
+            SELECT rowid FROM members_fts
+            WHERE members_fts MATCH 'discord_id : "' || replace(old.discord_id, '"', '""') || '"'
+              AND discord_id = old.discord_id
+        );
+        DELETE FROM members_fts
+        WHERE NOT (COALESCE(old.discord_id, '') GLOB '*[A-Za-z0-9]*') AND discord_id IS old.discord_id;"""
+    # Re-index on update only when an indexed column actually changed
+    changed = " OR ".join(f"old.{col} IS NOT new.{col}" for col in FTS_COLUMNS)
+    try:
+        c.executescript(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS members_fts USING fts5(
+                {cols}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+            );
+            CREATE TRIGGER IF NOT EXISTS members_fts_ai AFTER INSERT ON members BEGIN
+                INSERT INTO members_fts ({cols}) VALUES ({new_cols});
+            END;
+            CREATE TRIGGER IF NOT EXISTS members_fts_ad AFTER DELETE ON members BEGIN
+                {drop_old}
+            END;
+            DROP TRIGGER IF EXISTS members_fts_au;
+            CREATE TRIGGER members_fts_au AFTER UPDATE OF {cols} ON members WHEN {changed} BEGIN
+                {drop_old}
+                INSERT INTO members_fts ({cols}) VALUES ({new_cols});
+            END;
+        """)
+        fts_rows = c.execute("SELECT COUNT(*) FROM members_fts").fetchone()[0]
+        member_rows = c.execute("SELECT COUNT(*) FROM members").fetchone()[0]
+        if fts_rows != member_rows:
+            c.execute("DELETE FROM members_fts")
+            c.execute(f"INSERT INTO members_fts ({cols}) SELECT {cols} FROM members")
+            print(f"🆕 Rebuilt members_fts search index ({member_rows} members).")
+        conn.commit()
+        FTS_ENABLED = True
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ SQLite FTS5 unavailable ({e}); member search falls back to LIKE.")
+
+    # ─────────────────────────────
+    # Member list indexes (filters + the sort expressions in MEMBER_SORTS)
+    # ─────────────────────────────
+    c.execute("CREATE INDEX IF NOT EXISTS idx_members_status ON members(status)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_members_origin ON members(origin)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_members_trial_end ON members(trial_end)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_members_paid_until ON members(paid_until)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_members_email_nocase ON members(lower(email))")
+    for key, expr in MEMBER_SORTS.items():
+        if key != "discord_id":
+            c.execute(f"CREATE INDEX IF NOT EXISTS idx_members_sort_{key} ON members({expr}, discord_id)")
+    conn.commit()
+
     conn.close()
 
 
@@ -822,6 +1538,82 @@ def resolve_pending_action(action_id, approve: bool):
 def add_or_update_member(**kwargs):
     save_member(**kwargs)
 
+# ─────────────────────────────
+# Discord tag/role snapshots (see bot/member_sync.py)
+# ─────────────────────────────
+def get_member_snapshots():
+    """{discord_id: (discord_tag, discord_roles)} for every Discord-linked member."""
+    conn = sqlite3.connect(DB_PATH)
+    rows = conn.execute(
+        "SELECT discord_id, discord_tag, discord_roles FROM members WHERE discord_id NOT LIKE 'plex:%'"
+    ).fetchall()
+    conn.close()
+    return {r[0]: (r[1] or "", r[2] or "") for r in rows}
+
+def update_member_snapshots(snapshots):
+    """Write [(discord_id, tag, roles), ...] in one transaction; returns ids with no member row."""
+    missing = []
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        for discord_id, tag, roles in snapshots:
+            before = conn.execute(
+                "SELECT discord_roles FROM members WHERE discord_id = ?", (str(discord_id),)
+            ).fetchone()
+            if before is None:
+                missing.append(str(discord_id))
+                continue
+            cur = conn.execute(
+                "UPDATE members SET discord_tag = COALESCE(NULLIF(?, ''), discord_tag), discord_roles = ? "
+                "WHERE discord_id = ?",
+                (tag, roles, str(discord_id)),
+            )
+            if (before[0] or "") != (roles or ""):
+                _record_event(cur, "role_change", discord_id, f"Discord roles: {roles or '(none)'}",
+                              data={"before": before[0] or "", "after": roles or ""})
+    conn.close()
+    return missing
+
+# ─────────────────────────────
+# Onboarding sessions (see bot/onboarding.py)
+# ─────────────────────────────
+def save_onboarding_session(discord_id, guild_id, flow, stage, answers, context):
+    """Upsert one session row; answers/context are JSON-encoded dicts."""
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("""
+        INSERT INTO onboarding_sessions (discord_id, guild_id, flow, stage, answers, context)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(discord_id) DO UPDATE SET
+            guild_id = excluded.guild_id,
+            flow = excluded.flow,
+            stage = excluded.stage,
+            answers = excluded.answers,
+            context = excluded.context,
+            updated_at = CURRENT_TIMESTAMP
+    """, (str(discord_id), str(guild_id) if guild_id else None, flow, stage,
+          json.dumps(answers), json.dumps(context)))
+    conn.commit()
+    conn.close()
+
+def get_onboarding_sessions():
+    conn = sqlite3.connect(DB_PATH)
+    rows = conn.execute(
+        "SELECT discord_id, guild_id, flow, stage, answers, context FROM onboarding_sessions"
+    ).fetchall()
+    conn.close()
+    return [
+        {
+            "discord_id": r[0], "guild_id": r[1], "flow": r[2], "stage": r[3],
+            "answers": json.loads(r[4] or "{}"), "context": json.loads(r[5] or "{}"),
+        }
+        for r in rows
+    ]
+
+def delete_onboarding_session(discord_id):
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("DELETE FROM onboarding_sessions WHERE discord_id = ?", (str(discord_id),))
+    conn.commit()
+    conn.close()
+
 # ─────────────────────────────
 # Initialize Database
 # ─────────────────────────────
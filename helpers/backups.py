@@ -0,0 +1,322 @@
+# helpers/backups.py
+import configparser
+import glob
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from loghelper import logger
+import database
+from database import DB_PATH, record_backup, update_backup, get_backups, get_backup
+
+# ─────────────────────────────
+# Online database backups
+# ─────────────────────────────
+# Every backup entry point (/backup_db, the WebUI buttons and the daily
+# loops) goes through create_backup(). It copies the live database with
+# SQLite's online backup API a few pages at a time, pausing between steps
+# so writers (IPN, the bot) get the lock back, instead of copying the file
+# while it may be mid-write. The copy is written to a .part file, verified
+# with PRAGMA quick_check and only then kept.
+#
+# Kept copies are gzip-compressed (.db.gz) and listed in the backup catalog
+# (database.BACKUP_CATALOG_PATH) with size, content checksum, schema
+# version and origin. A snapshot whose checksum matches a stored one is
+# dropped, so the several daily loops cost one file per actual change, and
+# grandfather-father-son retention ([Backups] KeepLast/KeepDaily/
+# KeepWeekly/KeepMonthly) runs after every new backup.
+
+CONFIG_PATH = os.path.join("config", "config.ini")
+_cfg = configparser.ConfigParser()
+_cfg.read(CONFIG_PATH, encoding="utf-8")
+
+BACKUP_DIR = "exports"
+PAGES_PER_STEP = 256   # ~1 MiB at the default 4 KiB page size
+STEP_PAUSE = 0.005     # seconds between steps
+MAX_RESTARTS = 5       # a write between steps restarts the copy; after this many, finish in one step
+COMPRESS_LEVEL = _cfg.getint("Backups", "CompressLevel", fallback=6)
+KEEP_LAST = _cfg.getint("Backups", "KeepLast", fallback=3)  # always, so a manual backup outlives that day's scheduled one
+KEEP_DAILY = _cfg.getint("Backups", "KeepDaily", fallback=7)
+KEEP_WEEKLY = _cfg.getint("Backups", "KeepWeekly", fallback=4)
+KEEP_MONTHLY = _cfg.getint("Backups", "KeepMonthly", fallback=12)
+# Uncompressed copies written before the catalog existed
+LEGACY_PATTERNS = ("members_backup_*.db", "auto_backup_*.db", "casharr_backup_*.db")
+# SQLite header fields that change on every commit without the data changing:
+# file change counter, schema cookie, version-valid-for
+_HEADER_COUNTERS = ((24, 28), (40, 44), (92, 96))
+
+_lock = threading.Lock()  # one backup (or restore) at a time per process
+_legacy_checked = False
+
+
+class BackupError(Exception):
+    pass
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _copy(dst_path: str) -> int:
+    """Paged online backup of DB_PATH into dst_path; returns the page count."""
+    state = {"remaining": None, "restarts": 0}
+
+    def progress(status, remaining, total):
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1
+            if state["restarts"] > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        state["remaining"] = remaining
+
+    src = sqlite3.connect(DB_PATH)
+    try:
+        for pages in (PAGES_PER_STEP, -1):
+            dst = sqlite3.connect(dst_path)
+            try:
+                src.backup(dst, pages=pages, progress=progress if pages > 0 else None, sleep=STEP_PAUSE)
+                return dst.execute("PRAGMA page_count").fetchone()[0]
+            except _TooManyRestarts:
+                logger.warning("⚠️ Database busy during backup; finishing it in a single step.")
+            finally:
+                dst.close()
+    finally:
+        src.close()
+
+
+def _inspect(path: str):
+    """(quick_check result, schema version) of a database file."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("PRAGMA quick_check").fetchall()
+        try:
+            row = conn.execute("SELECT version FROM schema_version LIMIT 1").fetchone()
+        except sqlite3.Error:
+            row = None
+    finally:
+        conn.close()
+    integrity = "ok" if rows == [("ok",)] else "; ".join(r[0] for r in rows[:5])
+    return integrity, (row[0] if row else None)
+
+
+def _checksum(path: str) -> str:
+    """sha256 of the database content, ignoring the header's commit counters."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        header = bytearray(f.read(100))
+        for start, end in _HEADER_COUNTERS:
+            header[start:end] = bytes(end - start)
+        h.update(header)
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _compress(src: str, dst: str) -> int:
+    with open(src, "rb") as f_in, gzip.open(dst + ".part", "wb", compresslevel=COMPRESS_LEVEL) as f_out:
+        shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+    os.replace(dst + ".part", dst)
+    return os.path.getsize(dst)
+
+
+def _unique_path(prefix: str, stamp: str) -> str:
+    path = os.path.join(BACKUP_DIR, f"{prefix}_{stamp}.db.gz")
+    n = 1
+    while os.path.exists(path):  # two backups within the same second
+        n += 1
+        path = os.path.join(BACKUP_DIR, f"{prefix}_{stamp}_{n}.db.gz")
+    return path
+
+
+def create_backup(origin: str, prefix: str = "members_backup") -> dict:
+    """Blocking. Back up the live database to BACKUP_DIR/<prefix>_<timestamp>.db.gz.
+
+    Returns the catalog row; when the content is identical to a stored
+    backup, that backup's row is returned with "duplicate": True and no new
+    file is written. Raises BackupError when the database is missing or the
+    copy fails its integrity check. Call through run_blocking() from the bot.
+    """
+    if not os.path.exists(DB_PATH):
+        raise BackupError("database file not found")
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    with _lock:
+        _adopt_legacy()
+        stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        path = _unique_path(prefix, stamp)
+        part = os.path.join(BACKUP_DIR, f".{prefix}_{stamp}.db.part")
+        started = time.monotonic()
+        try:
+            pages = _copy(part)
+            integrity, schema_version = _inspect(part)
+            size = os.path.getsize(part)
+            if integrity != "ok":
+                record_backup(os.path.basename(path), origin, size_bytes=size, pages=pages,
+                              integrity=integrity, status="failed")
+                raise BackupError(f"backup failed quick_check: {integrity}")
+            checksum = _checksum(part)
+            existing = get_backup(checksum=checksum)
+            if existing and os.path.exists(os.path.join(BACKUP_DIR, existing["file"])):
+                logger.info(f"💾 Database unchanged since {existing['file']}; backup ({origin}) skipped.")
+                return {**existing, "path": os.path.join(BACKUP_DIR, existing["file"]), "duplicate": True}
+            stored = _compress(part, path)
+        finally:
+            _remove(part)
+        duration_ms = int((time.monotonic() - started) * 1000)
+        backup_id = record_backup(
+            os.path.basename(path), origin, size_bytes=size, pages=pages, duration_ms=duration_ms,
+            integrity=integrity, checksum=checksum, schema_version=schema_version, stored_bytes=stored,
+        )
+        apply_retention()
+
+    logger.info(f"💾 Database backup ({origin}) → {path} "
+                f"({size / 1024:.0f} KB → {stored / 1024:.0f} KB gz, {duration_ms} ms)")
+    return {"id": backup_id, "path": path, "file": os.path.basename(path), "origin": origin,
+            "size_bytes": size, "stored_bytes": stored, "pages": pages, "duration_ms": duration_ms,
+            "integrity": integrity, "checksum": checksum, "schema_version": schema_version,
+            "duplicate": False}
+
+
+# ─────────────────────────────
+# Retention (grandfather-father-son)
+# ─────────────────────────────
+def _retained_ids(rows) -> set:
+    """The KEEP_LAST newest backups, plus the newest of each of the last KEEP_DAILY days,
+    KEEP_WEEKLY ISO weeks and KEEP_MONTHLY months."""
+    keep = {row["id"] for row in rows[:max(1, KEEP_LAST)]}
+    for count, bucket in (
+        (KEEP_DAILY, lambda d: d.date()),
+        (KEEP_WEEKLY, lambda d: d.isocalendar()[:2]),
+        (KEEP_MONTHLY, lambda d: (d.year, d.month)),
+    ):
+        seen = set()
+        for row in rows:  # newest first
+            key = bucket(_parse_time(row["created_at"]))
+            if key not in seen and len(seen) < count:
+                seen.add(key)
+                keep.add(row["id"])
+    return keep
+
+
+def apply_retention() -> int:
+    """Delete stored backups outside the GFS policy; returns how many were pruned."""
+    rows = get_backups(limit=100000)
+    keep = _retained_ids(rows)
+    pruned = 0
+    for row in rows:
+        if row["id"] not in keep:
+            _remove(os.path.join(BACKUP_DIR, row["file"]))
+            update_backup(row["id"], status="pruned")
+            pruned += 1
+    if pruned:
+        logger.info(f"🧹 Backup retention pruned {pruned} backup(s); {len(keep)} kept.")
+    return pruned
+
+
+def _parse_time(value: str) -> datetime:
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _adopt_legacy():
+    """Compress and catalog uncompressed .db backups left by older versions (once per process)."""
+    global _legacy_checked
+    if _legacy_checked:
+        return
+    _legacy_checked = True
+    files = sorted({p for pattern in LEGACY_PATTERNS for p in glob.glob(os.path.join(BACKUP_DIR, pattern))},
+                   key=os.path.getmtime)
+    for legacy in files:
+        name = os.path.basename(legacy)
+        try:
+            integrity, schema_version = _inspect(legacy)
+            checksum = _checksum(legacy)
+            row = get_backup(file=name)
+            if integrity != "ok" or get_backup(checksum=checksum):
+                os.remove(legacy)  # unreadable, or a copy of something already stored
+                if row:
+                    update_backup(row["id"], status="failed" if integrity != "ok" else "duplicate")
+                continue
+            gz_path = legacy + ".gz"
+            stored = _compress(legacy, gz_path)
+            fields = dict(file=os.path.basename(gz_path), checksum=checksum, schema_version=schema_version,
+                          stored_bytes=stored, integrity=integrity, size_bytes=os.path.getsize(legacy))
+            if row:
+                update_backup(row["id"], **fields)
+            else:
+                created = datetime.fromtimestamp(os.path.getmtime(legacy), timezone.utc)
+                record_backup(origin="legacy", created_at=created.isoformat(timespec="seconds"), **fields)
+            os.remove(legacy)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"⚠️ Could not catalog old backup {name}: {e}")
+    if files:
+        logger.info(f"💾 Cataloged {len(files)} uncompressed backup(s) from before the backup catalog.")
+
+
+# ─────────────────────────────
+# Restore / delete
+# ─────────────────────────────
+def restore_file(path: str):
+    """Blocking. Replace the live database with a .db or .db.gz file.
+
+    The snapshot is checked first, written into the live database through
+    the backup API (open connections see the new content; nothing is copied
+    over an open file) and brought up to the current schema.
+    """
+    with _lock, tempfile.TemporaryDirectory(dir=BACKUP_DIR) as tmp:
+        snapshot = os.path.join(tmp, "restore.db")
+        if path.endswith(".gz"):
+            with gzip.open(path, "rb") as f_in, open(snapshot, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        else:
+            shutil.copyfile(path, snapshot)
+        integrity, _ = _inspect(snapshot)
+        if integrity != "ok":
+            raise BackupError(f"{os.path.basename(path)} failed quick_check: {integrity}")
+
+        generation = database.get_generation()[0]
+        src, live = sqlite3.connect(snapshot), sqlite3.connect(DB_PATH)
+        try:
+            src.backup(live)
+        finally:
+            src.close()
+            live.close()
+
+        database.init_db()
+        database.ensure_schema()
+        live = sqlite3.connect(DB_PATH)
+        with live:
+            # keep generation-keyed caches (ETags, stats memo) from matching pre-restore values
+            live.execute("UPDATE change_counter SET generation = MAX(generation, ?) + 1 WHERE id = 1",
+                         (generation,))
+        live.close()
+    logger.info(f"♻️ Database restored from {os.path.basename(path)}.")
+
+
+def restore_backup(file: str):
+    """Restore a cataloged backup by file name."""
+    row = get_backup(file=file)
+    path = os.path.join(BACKUP_DIR, file)
+    if not row or not os.path.exists(path):
+        raise BackupError(f"backup {file} not found")
+    restore_file(path)
+
+
+def delete_backup(file: str) -> bool:
+    row = get_backup(file=file)
+    if not row:
+        return False
+    _remove(os.path.join(BACKUP_DIR, file))
+    update_backup(row["id"], status="deleted")
+    return True
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,98 @@
+# helpers/exports.py
+import csv
+import io
+import json
+import zlib
+
+from database import MEMBER_FIELDS, iter_members, iter_events
+
+# ─────────────────────────────
+# Streaming CSV / NDJSON exports
+# ─────────────────────────────
+# Rows come from database.iter_members()/iter_events() (keyset batches) and
+# are encoded a few hundred at a time, so an export of any size holds one
+# batch in memory. The same generators back the WebUI download endpoints
+# (as a streamed response body) and the /export command (written to disk).
+
+DATASETS = ("members", "payments")
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+PAYMENT_FIELDS = ("id", "time", "discord_id", "email", "months", "days", "paid_until", "message")
+FLUSH_ROWS = 500
+
+
+def member_rows(fields=None, **filters):
+    return iter_members(fields=fields, **filters)
+
+
+def payment_rows(discord_id=None, since=None):
+    """Payment events from the journal, flattened (months/days/paid_until from the event data)."""
+    for e in iter_events(event_type="payment", discord_id=discord_id, since=since):
+        data = e.get("data") or {}
+        yield {
+            "id": e["id"], "time": e["time"], "discord_id": e["discord_id"], "email": e["email"],
+            "months": data.get("months"), "days": data.get("days"),
+            "paid_until": data.get("paid_until"), "message": e["message"],
+        }
+
+
+def csv_chunks(rows, fields):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(fields), extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % FLUSH_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def ndjson_chunks(rows, fields):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({f: row.get(f) for f in fields}, ensure_ascii=False, default=str))
+        if len(lines) >= FLUSH_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def encoded(chunks, compress: bool = False):
+    """UTF-8 bytes, optionally gzip-compressed on the fly (a valid .gz stream)."""
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        if gz:
+            data = gz.compress(data)
+        if data:
+            yield data
+    if gz:
+        yield gz.flush()
+
+
+def export_stream(dataset: str, fmt: str, fields=None, compress: bool = False, **filters):
+    """Byte chunks of `dataset` ("members"/"payments") as `fmt` ("csv"/"ndjson")."""
+    if dataset not in DATASETS:
+        raise ValueError(f"unknown dataset '{dataset}'")
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format '{fmt}'")
+    if dataset == "members":
+        fields = [f for f in (fields or MEMBER_FIELDS) if f in MEMBER_FIELDS] or list(MEMBER_FIELDS)
+        rows = member_rows(fields=fields, **filters)
+    else:
+        fields = [f for f in (fields or PAYMENT_FIELDS) if f in PAYMENT_FIELDS] or list(PAYMENT_FIELDS)
+        rows = payment_rows(**filters)
+    chunks = csv_chunks(rows, fields) if fmt == "csv" else ndjson_chunks(rows, fields)
+    return encoded(chunks, compress)
+
+
+def write_export(path: str, chunks) -> int:
+    """Write an export stream to `path`; returns bytes written."""
+    size = 0
+    with open(path, "wb") as f:
+        for data in chunks:
+            f.write(data)
+            size += len(data)
+    return size
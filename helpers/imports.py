@@ -0,0 +1,206 @@
+# helpers/imports.py
+"""Bulk member import from CSV or NDJSON.
+
+Used by POST /api/import/members and from the command line:
+
+    python -m helpers.imports customers.csv [--format csv|ndjson] [--dry-run]
+
+The file is parsed as a stream; rows are validated and normalized one at a
+time and upserted BATCH_ROWS at a time (one transaction per batch, see
+database.import_members_batch), so memory stays at one batch whatever the
+file size.
+"""
+import argparse
+import codecs
+import csv
+import json
+import re
+import sys
+from datetime import datetime, timezone
+
+from database import IMPORT_FIELDS, import_members_batch, record_event, init_db, ensure_schema
+
+FORMATS = ("csv", "ndjson")
+BATCH_ROWS = 1000
+MAX_ERRORS = 200  # per-row errors kept in the report; the count is always exact
+
+DATE_FIELDS = ("trial_start", "trial_end", "paid_until")
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+DISCORD_ID_RE = re.compile(r"^\d{15,21}$")
+
+# Header spellings seen in exported customer lists -> members column
+ALIASES = {
+    "id": "discord_id", "discord": "discord_id", "discordid": "discord_id", "user_id": "discord_id",
+    "tag": "discord_tag", "discordtag": "discord_tag", "username": "discord_tag",
+    "first": "first_name", "firstname": "first_name", "given_name": "first_name",
+    "last": "last_name", "lastname": "last_name", "surname": "last_name", "family_name": "last_name",
+    "e_mail": "email", "mail": "email",
+    "phone": "mobile", "mobile_number": "mobile", "phone_number": "mobile",
+    "plex": "plex_username", "plex_user": "plex_username",
+    "referrer": "referrer_id", "referred_by": "referrer_id",
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+def _column(name: str):
+    key = re.sub(r"[\s\-.]+", "_", str(name).strip().lower())
+    key = ALIASES.get(key, key)
+    return key if key in IMPORT_FIELDS else None
+
+
+def _date(value: str, field: str) -> str:
+    """ISO 8601 date or datetime ('Z' allowed, YYYY/M/D accepted) -> aware UTC isoformat().
+
+    Naive values are taken as UTC, like everything else the app stores.
+    """
+    text = value.strip()
+    m = re.match(r"^(\d{4})/(\d{1,2})/(\d{1,2})", text)
+    if m:
+        y, mo, d = m.groups()
+        text = f"{y}-{int(mo):02d}-{int(d):02d}" + text[m.end():]
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        raise RowError(f"{field}: '{value}' is not a date (use YYYY-MM-DD or ISO 8601)")
+    dt = dt.astimezone(timezone.utc) if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+    return dt.isoformat()
+
+
+def normalize(raw: dict) -> dict:
+    """Map, validate and normalize one input row; raises RowError."""
+    row = {}
+    for key, value in raw.items():
+        col = _column(key) if key is not None else None
+        if col is None or value is None:
+            continue
+        value = str(value).strip()
+        if value:
+            row[col] = value
+
+    if "email" in row:
+        row["email"] = row["email"].lower()
+        if not EMAIL_RE.match(row["email"]):
+            raise RowError(f"email: '{row['email']}' is not a valid address")
+    for field in ("discord_id", "referrer_id"):
+        if field in row and not DISCORD_ID_RE.match(row[field]):
+            raise RowError(f"{field}: '{row[field]}' is not a Discord ID")
+    for field in DATE_FIELDS:
+        if field in row:
+            row[field] = _date(row[field], field)
+    if "mobile" in row:
+        row["mobile"] = re.sub(r"[\s\-().]", "", row["mobile"])
+    if not row.get("discord_id") and not row.get("email"):
+        raise RowError("needs a discord_id or an email")
+    return row
+
+
+def read_rows(stream, fmt: str):
+    """(line, raw dict or RowError) pairs from a binary stream, parsed incrementally."""
+    text = codecs.getreader("utf-8-sig")(stream, errors="replace")
+    if fmt == "csv":
+        reader = csv.DictReader(_lines(text))
+        for raw in reader:
+            yield reader.line_num, raw
+    elif fmt == "ndjson":
+        for line_no, line in enumerate(_lines(text), 1):
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+            except ValueError as e:
+                yield line_no, RowError(f"invalid JSON ({e.msg})")
+                continue
+            yield line_no, raw if isinstance(raw, dict) else RowError("expected a JSON object")
+    else:
+        raise ValueError(f"unknown format '{fmt}'")
+
+
+def _lines(text):
+    # StreamReader.readline() keeps line endings, which csv needs for quoted newlines
+    while True:
+        line = text.readline()
+        if not line:
+            return
+        yield line
+
+
+def import_members(stream, fmt: str = "csv", dry_run: bool = False, progress=None) -> dict:
+    """Import members from a binary stream; returns a JSON-safe report."""
+    report = {"ok": True, "dry_run": dry_run, "rows": 0, "inserted": 0, "updated": 0,
+              "unchanged": 0, "failed": 0, "errors": []}
+    shadow = {"members": {}, "emails": {}} if dry_run else None
+    batch = []
+
+    def fail(line, message):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_ERRORS:
+            report["errors"].append({"line": line, "error": message})
+
+    def flush():
+        inserted, updated, unchanged, errors = import_members_batch(batch, dry_run=dry_run, shadow=shadow)
+        report["inserted"] += inserted
+        report["updated"] += updated
+        report["unchanged"] += unchanged
+        for line, message in errors:
+            fail(line, message)
+        batch.clear()
+        if progress:
+            progress(report)
+
+    for line, raw in read_rows(stream, fmt):
+        report["rows"] += 1
+        try:
+            if isinstance(raw, RowError):
+                raise raw
+            row = normalize(raw)
+        except RowError as e:
+            fail(line, str(e))
+            continue
+        row["line"] = line
+        batch.append(row)
+        if len(batch) >= BATCH_ROWS:
+            flush()
+    if batch:
+        flush()
+    report["errors"].sort(key=lambda e: e["line"] or 0)
+
+    if not dry_run and (report["inserted"] or report["updated"]):
+        record_event("member_import", message=f"Imported members: {report['inserted']} new, "
+                     f"{report['updated']} updated, {report['failed']} failed",
+                     data={k: report[k] for k in ("rows", "inserted", "updated", "unchanged", "failed")})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import members into Casharr from CSV or NDJSON")
+    parser.add_argument("path", help="file to import ('-' for stdin)")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--dry-run", action="store_true", help="validate and count, write nothing")
+    args = parser.parse_args()
+
+    init_db()
+    ensure_schema()
+    fmt = args.format or ("ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv")
+    stream = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+    try:
+        report = import_members(
+            stream, fmt, dry_run=args.dry_run,
+            progress=lambda r: print(f"… {r['rows']} rows", end="\r", file=sys.stderr, flush=True),
+        )
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    for err in report["errors"]:
+        print(f"line {err['line']}: {err['error']}", file=sys.stderr)
+    print(f"{'[dry run] ' if args.dry_run else ''}{report['rows']} rows: {report['inserted']} new, "
+          f"{report['updated']} updated, {report['unchanged']} unchanged, {report['failed']} failed")
+    sys.exit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
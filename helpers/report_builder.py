@@ -0,0 +1,206 @@
+# helpers/report_builder.py
+"""Member report writer (PDF + XML), run as a worker process:
+
+    python -m helpers.report_builder --db data/members.db --out exports --stamp <ts> --summary '<json>'
+
+Progress goes to stdout as one JSON object per line. Rows are read in
+keyset-paged chunks, in a single pass that streams the XML row by row and
+feeds the PDF story one chunk of page-sized tables at a time (see Story),
+so only one chunk of rows is ever held as flowables. reportlab still keeps
+each finished page's compressed content stream until the file is saved.
+Output is written to *.part files and renamed only when complete.
+Deliberately free of Casharr imports (no logger, no database init).
+"""
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime
+from xml.sax.saxutils import XMLGenerator
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, landscape
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+CHUNK_ROWS = 500
+PDF_ROWS_PER_TABLE = 40  # about one page, so reportlab never has to split a table
+
+# (members column, XML tag)
+XML_COLUMNS = [
+    ("discord_id", "DiscordID"), ("discord_tag", "DiscordTag"), ("first_name", "First"),
+    ("last_name", "Last"), ("email", "Email"), ("mobile", "Mobile"), ("invite_sent_at", "Invite"),
+    ("trial_start", "TrialStart"), ("trial_end", "TrialEnd"), ("had_trial", "HadTrial"),
+    ("paid_until", "PaidUntil"), ("trial_reminder_sent_at", "TrialReminderSentAt"),
+    ("paid_reminder_sent_at", "PaidReminderSentAt"), ("used_promo", "UsedPromo"),
+    ("referrer_id", "ReferrerID"),
+]
+# (members column, PDF header)
+PDF_COLUMNS = [
+    ("discord_id", "Discord ID"), ("discord_tag", "Discord Tag"), ("first_name", "First Name"),
+    ("last_name", "Last Name"), ("email", "Email"), ("mobile", "Mobile"),
+    ("trial_end", "Trial End"), ("paid_until", "Paid Until"), ("referrer_id", "Referrer"),
+]
+TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.gray),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, -1), 7),
+    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+])
+
+
+def emit(**msg):
+    print(json.dumps(msg), flush=True)
+
+
+def iter_chunks(conn, size=CHUNK_ROWS):
+    """Members in discord_id order, `size` rows at a time (keyset, not OFFSET)."""
+    cols = sorted({c for c, _ in XML_COLUMNS + PDF_COLUMNS})
+    last = ""
+    while True:
+        rows = conn.execute(
+            f"SELECT {', '.join(cols)} FROM members WHERE discord_id > ? ORDER BY discord_id LIMIT ?",
+            (last, size),
+        ).fetchall()
+        if not rows:
+            return
+        yield [dict(zip(cols, r)) for r in rows]
+        last = rows[-1][cols.index("discord_id")]
+
+
+def _text(value) -> str:
+    return "" if value is None or value == "" else str(value)
+
+
+class XmlReport:
+    def __init__(self, path, generated_at, summary):
+        self.f = open(path, "w", encoding="utf-8")
+        self.x = XMLGenerator(self.f, encoding="utf-8", short_empty_elements=True)
+        self.x.startDocument()
+        self.x.startElement("MembersReport", {})
+        self.x.startElement("Summary", {})
+        for tag, value in (
+            ("GeneratedAt", generated_at), ("TotalMembers", summary["total"]),
+            ("ActiveTrials", summary["active_trials"]), ("ActivePayers", summary["active_payers"]),
+            ("Expired", summary["expired"]),
+        ):
+            self._leaf(tag, value)
+        self.x.endElement("Summary")
+        self.x.startElement("Members", {})
+
+    def _leaf(self, tag, value):
+        self.x.startElement(tag, {})
+        self.x.characters(_text(value))
+        self.x.endElement(tag)
+
+    def member(self, row):
+        self.x.startElement("Member", {})
+        for col, tag in XML_COLUMNS:
+            self._leaf(tag, row[col])
+        self.x.endElement("Member")
+
+    def close(self):
+        self.x.endElement("Members")
+        self.x.endElement("MembersReport")
+        self.x.endDocument()
+        self.f.close()
+
+
+def _pdf_table(rows):
+    data = [[header for _, header in PDF_COLUMNS]]
+    data += [[_text(r[col]) or "-" for col, _ in PDF_COLUMNS] for r in rows]
+    table = Table(data, repeatRows=1)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+
+class Story(list):
+    """Flowable list that refills itself from `more` (an iterator of lists).
+
+    doc.build() consumes its story from the front and checks len() before each
+    flowable, so topping up there keeps only one chunk's tables alive.
+    """
+
+    def __init__(self, head, more):
+        super().__init__(head)
+        self._more = more
+
+    def __len__(self):
+        while self._more is not None and list.__len__(self) < 2:
+            nxt = next(self._more, None)
+            if nxt is None:
+                self._more = None
+            else:
+                self.extend(nxt)
+        return list.__len__(self)
+
+
+def build(db_path, out_dir, stamp, summary):
+    base = os.path.join(out_dir, f"members_report_{stamp}")
+    pdf_path, xml_path = base + ".pdf", base + ".xml"
+    total = summary["total"]
+    generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    styles = getSampleStyleSheet()
+    elements = [
+        Paragraph("Casharr Member Report", styles["Heading1"]), Spacer(1, 12),
+        Paragraph(f"Generated: {generated_at}", styles["Normal"]), Spacer(1, 12),
+        Paragraph(f"Total Members: <b>{total}</b>", styles["Normal"]),
+        Paragraph(f"Active Trials: <b>{summary['active_trials']}</b>", styles["Normal"]),
+        Paragraph(f"Active Payers: <b>{summary['active_payers']}</b>", styles["Normal"]),
+        Paragraph(f"Expired (trial/subscription): <b>{summary['expired']}</b>", styles["Normal"]),
+        Spacer(1, 10), Paragraph("Details", styles["Heading2"]), Spacer(1, 6),
+    ]
+
+    doc = SimpleDocTemplate(pdf_path + ".part", pagesize=landscape(letter), pageCompression=1,
+                            leftMargin=24, rightMargin=24, topMargin=24, bottomMargin=24)
+    pages = {"n": 0}
+
+    def on_progress(kind, value):
+        if kind == "PAGE":
+            pages["n"] = value
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    xml = XmlReport(xml_path + ".part", generated_at, summary)
+    done = 0
+
+    def tables():
+        nonlocal done
+        for chunk in iter_chunks(conn):
+            for row in chunk:
+                xml.member(row)
+            done += len(chunk)
+            emit(phase="rows", done=done, total=total, pages=pages["n"])
+            yield [_pdf_table(chunk[i:i + PDF_ROWS_PER_TABLE])
+                   for i in range(0, len(chunk), PDF_ROWS_PER_TABLE)]
+        emit(phase="pdf", pages=pages["n"])
+
+    feed = tables()
+    try:
+        doc.setProgressCallBack(on_progress)
+        doc.build(Story(elements, feed))
+    finally:
+        feed.close()
+        xml.close()
+        conn.close()
+
+    os.replace(xml_path + ".part", xml_path)
+    os.replace(pdf_path + ".part", pdf_path)
+    emit(phase="done", pdf=pdf_path, xml=xml_path, rows=done, pages=pages["n"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the Casharr member report")
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--stamp", required=True)
+    parser.add_argument("--summary", required=True, help="JSON counters (total, active_trials, …)")
+    args = parser.parse_args()
+    build(args.db, args.out, args.stamp, json.loads(args.summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# helpers/report_jobs.py
+import itertools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from loghelper import logger
+from database import DB_PATH, member_stats
+
+# ─────────────────────────────
+# Background report jobs
+# ─────────────────────────────
+# Report requests (WebUI or /report) are queued here and built one at a time
+# by helpers/report_builder.py in a separate Python process, so neither the
+# Flask request nor the bot loop waits on reportlab. A dispatcher thread
+# reads the worker's JSON progress lines; cancelling terminates the worker
+# and removes its partial files.
+
+EXPORTS_DIR = "exports"
+MAX_HISTORY = 20
+ACTIVE = ("queued", "running")
+
+
+class ReportJob:
+    def __init__(self, job_id: int, requested_by: str):
+        self.id = job_id
+        self.requested_by = requested_by
+        self.status = "queued"
+        self.done = 0
+        self.total = 0
+        self.pages = 0
+        self.phase = "queued"
+        self.files: dict[str, str] = {}
+        self.error = None
+        self.created_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+        self.finished_at = None
+        self.started = None
+        self.cancel_requested = False
+        self.proc = None
+        self.stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+    def progress_text(self) -> str:
+        if self.status == "queued":
+            return "Queued…"
+        if self.phase == "rows":
+            return f"Writing rows {self.done}/{self.total} (page {self.pages})…"
+        if self.phase == "pdf":
+            return f"Laying out PDF (page {self.pages})…"
+        return self.phase.capitalize() + "…" if self.status == "running" else self.status
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "phase": self.phase,
+            "progress": self.progress_text(),
+            "done": self.done,
+            "total": self.total,
+            "pages": self.pages,
+            "files": {kind: os.path.basename(p) for kind, p in self.files.items()},
+            "error": self.error,
+            "requested_by": self.requested_by,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "elapsed": round(time.monotonic() - self.started, 1) if self.started else None,
+        }
+
+
+class ReportRunner:
+    def __init__(self):
+        self.jobs: "OrderedDict[int, ReportJob]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._queue: "queue.Queue[ReportJob]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # ─────────────────────────────
+    # Public API (any thread)
+    # ─────────────────────────────
+    def submit(self, requested_by: str) -> ReportJob:
+        """Queue a report; while one is already queued or running, that job is returned instead."""
+        with self._lock:
+            for job in self.jobs.values():
+                if job.status in ACTIVE:
+                    return job
+            job = ReportJob(next(self._ids), requested_by)
+            self.jobs[job.id] = job
+            while len(self.jobs) > MAX_HISTORY:
+                self.jobs.popitem(last=False)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, daemon=True, name="ReportRunner")
+                self._thread.start()
+        self._queue.put(job)
+        logger.info(f"🧾 Report job #{job.id} queued by {requested_by}.")
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        job = self.jobs.get(job_id)
+        if not job or job.status not in ACTIVE:
+            return False
+        job.cancel_requested = True
+        if job.status == "queued":
+            self._finish(job, "cancelled")
+        elif job.proc is not None:
+            job.proc.terminate()
+        return True
+
+    def get(self, job_id: int):
+        return self.jobs.get(job_id)
+
+    def snapshot(self) -> list[dict]:
+        """Newest first, JSON-safe."""
+        return [j.summary() for j in reversed(list(self.jobs.values()))]
+
+    # ─────────────────────────────
+    # Dispatcher thread
+    # ─────────────────────────────
+    def _loop(self):
+        while True:
+            job = self._queue.get()
+            if job.status != "queued":
+                continue  # cancelled while waiting
+            try:
+                self._run(job)
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                self._finish(job, "failed")
+
+    def _run(self, job: ReportJob):
+        summary = member_stats()
+        job.total = summary["total"]
+        job.status, job.phase, job.started = "running", "starting", time.monotonic()
+        counters = {k: summary[k] for k in ("total", "active_trials", "active_payers", "expired")}
+        os.makedirs(EXPORTS_DIR, exist_ok=True)
+        job.proc = subprocess.Popen(
+            [sys.executable, "-m", "helpers.report_builder", "--db", DB_PATH, "--out", EXPORTS_DIR,
+             "--stamp", job.stamp, "--summary", json.dumps(counters)],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding="utf-8",
+        )
+        if job.cancel_requested:  # cancelled between dequeue and spawn
+            job.proc.terminate()
+        tail = []
+        for line in job.proc.stdout:
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                tail = (tail + [line.rstrip()])[-5:]  # tracebacks etc.
+                continue
+            job.phase = msg.get("phase", job.phase)
+            job.done = msg.get("done", job.done)
+            job.pages = msg.get("pages", job.pages)
+            if job.phase == "done":
+                job.files = {"pdf": msg["pdf"], "xml": msg["xml"]}
+        code = job.proc.wait()
+
+        if job.cancel_requested:
+            self._cleanup(job)
+            self._finish(job, "cancelled")
+        elif code == 0 and job.files:
+            self._finish(job, "done")
+        else:
+            self._cleanup(job)
+            job.error = tail[-1] if tail else f"worker exited with code {code}"
+            self._finish(job, "failed")
+
+    def _cleanup(self, job: ReportJob):
+        base = os.path.join(EXPORTS_DIR, f"members_report_{job.stamp}")
+        for path in (base + ".pdf.part", base + ".xml.part"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _finish(self, job: ReportJob, status: str):
+        job.status = status
+        job.proc = None
+        job.finished_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+        elapsed = f" in {time.monotonic() - job.started:.1f}s" if job.started else ""
+        if status == "failed":
+            logger.error(f"⚠️ Report job #{job.id} failed{elapsed}: {job.error}")
+        else:
+            logger.info(f"🧾 Report job #{job.id} {status}{elapsed}.")
+
+
+runner = ReportRunner()
@@ -0,0 +1,503 @@
+# helpers/wal_archive.py
+"""Continuous WAL archiving and point-in-time restore.
+
+    python -m helpers.wal_archive list
+    python -m helpers.wal_archive restore --at "2026-10-19 14:05" [--output restored.db | --live]
+
+With [Backups] ContinuousArchive = true the database runs in WAL mode and a
+background thread ships every committed WAL frame to ArchiveDir (which can
+be a mounted NAS) every ShipIntervalSeconds. Restores replay a base
+snapshot plus the shipped frames up to the requested time, so at most one
+ship interval of payments is at risk instead of a day.
+"""
+import argparse
+import configparser
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from loghelper import logger
+from database import DB_PATH
+from helpers import backups
+
+# ─────────────────────────────
+# Archive layout
+# ─────────────────────────────
+# ArchiveDir/<generation>/base.db.gz      online-backup snapshot the generation starts from
+# ArchiveDir/<generation>/segments.jsonl  one line per shipped segment (WAL header, frame range, time)
+# ArchiveDir/<generation>/NNNNNNNN.wal.gz raw WAL frames, always ending on a commit frame
+#
+# A generation starts when archiving starts, after a restore, when a gap is
+# detected and every BaseIntervalHours (to bound replay time). Writers do
+# nothing extra: the archiver keeps a read transaction open, which stops
+# SQLite from restarting the WAL over frames that have not been shipped,
+# and every CheckpointSeconds (sooner once half of CHECKPOINT_FRAMES is
+# waiting, so writers' own auto-checkpoints stay idle) it briefly takes the
+# write lock, ships the tail and checkpoints so the WAL can start over.
+
+CONFIG_PATH = os.path.join("config", "config.ini")
+_cfg = configparser.ConfigParser()
+_cfg.read(CONFIG_PATH, encoding="utf-8")
+
+ARCHIVE_ENABLED = _cfg.getboolean("Backups", "ContinuousArchive", fallback=False)
+ARCHIVE_DIR = _cfg.get("Backups", "ArchiveDir", fallback="").strip() or os.path.join("exports", "wal_archive")
+SHIP_INTERVAL = max(1, _cfg.getint("Backups", "ShipIntervalSeconds", fallback=10))
+CHECKPOINT_INTERVAL = max(SHIP_INTERVAL, _cfg.getint("Backups", "CheckpointSeconds", fallback=300))
+BASE_INTERVAL = timedelta(hours=max(1, _cfg.getint("Backups", "BaseIntervalHours", fallback=24)))
+RETENTION = timedelta(days=max(1, _cfg.getint("Backups", "ArchiveRetentionDays", fallback=7)))
+CHECKPOINT_FRAMES = 1000          # same threshold as SQLite's own auto-checkpoint
+SEGMENT_COMPRESS_LEVEL = 1        # segments ship every few seconds; favour speed
+WRITE_LOCK_TIMEOUT = 5            # seconds to wait for the write lock at checkpoint time
+
+WAL_HEADER = 32
+FRAME_HEADER = 24
+WAL_MAGIC_LE, WAL_MAGIC_BE = 0x377F0682, 0x377F0683
+
+
+class ArchiveError(Exception):
+    pass
+
+
+# ─────────────────────────────
+# WAL file format
+# ─────────────────────────────
+def _checksum(data: bytes, s: tuple, big_endian: bool) -> tuple:
+    """SQLite's cumulative WAL checksum over `data`, continuing from `s`."""
+    s0, s1 = s
+    words = struct.unpack(f"{'>' if big_endian else '<'}{len(data) // 4}I", data)
+    for i in range(0, len(words), 2):
+        s0 = (s0 + words[i] + s1) & 0xFFFFFFFF
+        s1 = (s1 + words[i + 1] + s0) & 0xFFFFFFFF
+    return s0, s1
+
+
+def _parse_header(raw: bytes):
+    """WAL header as a dict, or None when the file holds no valid header."""
+    if len(raw) < WAL_HEADER:
+        return None
+    magic, _version, page_size, _seq, salt1, salt2, c1, c2 = struct.unpack(">8I", raw[:WAL_HEADER])
+    if magic not in (WAL_MAGIC_LE, WAL_MAGIC_BE):
+        return None
+    if _checksum(raw[:24], (0, 0), magic == WAL_MAGIC_BE) != (c1, c2):
+        return None
+    return {"raw": raw[:WAL_HEADER], "page_size": page_size, "salt": (salt1, salt2)}
+
+
+def _committed_frames(f, header: dict, first_frame: int, last_frame: int):
+    """Frames first_frame..last_frame (0-based, end exclusive) as one bytes object.
+
+    Everything up to the WAL-index mxFrame is committed and fully written,
+    so only the salts are checked here; SQLite verifies the checksum chain
+    when the frames are replayed.
+    """
+    size = FRAME_HEADER + header["page_size"]
+    f.seek(WAL_HEADER + first_frame * size)
+    data = f.read((last_frame - first_frame) * size)
+    if len(data) != (last_frame - first_frame) * size:
+        raise ArchiveError(f"WAL is shorter than its index ({len(data)} bytes after frame {first_frame})")
+    for off in range(0, len(data), size):
+        if struct.unpack_from(">2I", data, off + 8) != header["salt"]:
+            raise ArchiveError(f"WAL frame {first_frame + off // size} does not belong to this WAL")
+    return data
+
+
+def _read_wal_header():
+    try:
+        with open(DB_PATH + "-wal", "rb") as f:
+            return _parse_header(f.read(WAL_HEADER))
+    except FileNotFoundError:
+        return None
+
+
+def _read_max_frame(header: dict):
+    """Last committed frame from the WAL-index header in -shm, or None when unreadable.
+
+    The header is stored twice and writers update the copies one after the
+    other, so a read is only trusted when both match (as SQLite does).
+    """
+    for _ in range(5):
+        try:
+            with open(DB_PATH + "-shm", "rb") as f:
+                raw = f.read(96)
+        except FileNotFoundError:
+            return None
+        if len(raw) == 96 and raw[:48] == raw[48:] and raw[12]:
+            if raw[32:40] != header["raw"][16:24]:
+                return None  # index already describes a newer WAL than the header we read
+            return struct.unpack_from("=I", raw, 16)[0]
+        time.sleep(0.001)
+    return None
+
+
+# ─────────────────────────────
+# Shipper
+# ─────────────────────────────
+class WalArchiver:
+    def __init__(self):
+        self._thread = None
+        self._wake = threading.Event()
+        self._new_generation = threading.Event()
+        self._reader = None
+        self.generation = None      # directory name of the current generation
+        self.generation_started = None
+        self.wal_salt = None        # salts of the WAL being shipped
+        self.next_frame = 0
+        self.checkpointed_frame = 0  # next_frame at the last checkpoint of this WAL
+        self.segments = 0
+        self.last_shipped_at = None
+        self.last_checkpoint = 0.0
+        self.error = None
+
+    # ─────────────────────────────
+    # Public API
+    # ─────────────────────────────
+    def start(self):
+        if not ARCHIVE_ENABLED or (self._thread and self._thread.is_alive()):
+            return
+        conn = sqlite3.connect(DB_PATH)
+        mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        conn.close()
+        if mode.lower() != "wal":
+            logger.error(f"⚠️ Continuous archive disabled: could not switch the database to WAL (mode={mode}).")
+            return
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="WalArchiver")
+        self._thread.start()
+        logger.info(f"📼 Continuous WAL archive started → {ARCHIVE_DIR} (every {SHIP_INTERVAL}s).")
+
+    def restart_generation(self):
+        """Start from a fresh base snapshot (after a restore, for example)."""
+        self._new_generation.set()
+        self._wake.set()
+
+    def status(self) -> dict:
+        gens = list_generations()
+        return {
+            "enabled": ARCHIVE_ENABLED,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "archive_dir": ARCHIVE_DIR,
+            "generation": self.generation,
+            "segments": self.segments,
+            "last_shipped_at": self.last_shipped_at,
+            "restorable_from": gens[0]["created_at"] if gens else None,
+            "restorable_to": self.last_shipped_at or (gens[-1]["last_shipped_at"] if gens else None),
+            "error": self.error,
+        }
+
+    # ─────────────────────────────
+    # Thread
+    # ─────────────────────────────
+    def _loop(self):
+        while True:
+            try:
+                due = (self.generation is None or self._new_generation.is_set()
+                       or datetime.now(timezone.utc) - self.generation_started >= BASE_INTERVAL)
+                if due:
+                    self._new_generation.clear()
+                    self._begin_generation()
+                self._ship()
+                pending = self._unchecked_frames()
+                if pending >= CHECKPOINT_FRAMES // 2 or (
+                        pending and time.monotonic() - self.last_checkpoint >= CHECKPOINT_INTERVAL):
+                    self._checkpoint()
+                else:
+                    self._roll_reader()
+                self.error = None
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                logger.error(f"⚠️ WAL archive: {self.error}; starting a new generation.")
+                self._new_generation.set()
+                self._release_reader()
+            # under a burst of writes come back sooner, so the WAL is checkpointed
+            # before writers' own auto-checkpoints start running into our reader
+            self._wake.wait(1 if self._unchecked_frames() >= CHECKPOINT_FRAMES // 4 else SHIP_INTERVAL)
+            self._wake.clear()
+
+    def _unchecked_frames(self) -> int:
+        return self.next_frame - self.checkpointed_frame
+
+    def _hold_reader(self):
+        """Open a read transaction; while one is open SQLite cannot restart the WAL."""
+        conn = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+        conn.execute("BEGIN")
+        conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        return conn
+
+    def _roll_reader(self):
+        # hand over hand, so there is never a moment without a reader
+        new = self._hold_reader()
+        self._release_reader()
+        self._reader = new
+
+    def _release_reader(self):
+        if self._reader is not None:
+            try:
+                self._reader.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            self._reader.close()
+            self._reader = None
+
+    def _begin_generation(self):
+        self._roll_reader()
+        started = datetime.now(timezone.utc)
+        name = started.strftime("%Y%m%dT%H%M%SZ")
+        gen_dir = os.path.join(ARCHIVE_DIR, name)
+        os.makedirs(gen_dir, exist_ok=True)
+        part = os.path.join(gen_dir, "base.db.part")
+        try:
+            backups._copy(part)
+            backups._compress(part, os.path.join(gen_dir, "base.db.gz"))
+        finally:
+            backups._remove(part)
+        _write_json(os.path.join(gen_dir, "generation.json"), {"created_at": started.isoformat(timespec="seconds")})
+        # Ship the current WAL from its first frame: frames the base already
+        # contains replay to the same pages, and the checksum chain needs them
+        self.generation, self.generation_started = name, started
+        self.wal_salt, self.next_frame, self.checkpointed_frame = None, 0, 0
+        self.segments = 0
+        logger.info(f"📼 WAL archive generation {name} started from a new base snapshot.")
+        _prune_generations()
+
+    def _ship(self):
+        header = _read_wal_header()
+        if header is None:
+            return
+        salt = header["salt"]
+        if salt != self.wal_salt:
+            # every WAL restart bumps salt-1 by one (the checkpoint sequence
+            # field is per connection, so it can't be used for this)
+            if self.wal_salt is not None and salt[0] != (self.wal_salt[0] + 1) & 0xFFFFFFFF:
+                raise ArchiveError("the WAL restarted more than once between ships; frames were missed")
+            self.wal_salt, self.next_frame, self.checkpointed_frame = salt, 0, 0
+        max_frame = _read_max_frame(header)
+        if max_frame is None or max_frame <= self.next_frame:
+            return
+        with open(DB_PATH + "-wal", "rb") as f:
+            data = _committed_frames(f, header, self.next_frame, max_frame)
+        frames = max_frame - self.next_frame
+        gen_dir = os.path.join(ARCHIVE_DIR, self.generation)
+        name = f"{self.segments:08d}.wal.gz"
+        path = os.path.join(gen_dir, name)
+        with open(path + ".part", "wb") as f:
+            f.write(gzip.compress(data, SEGMENT_COMPRESS_LEVEL))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".part", path)
+        shipped_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        entry = {"file": name, "salt": list(salt),
+                 "header": header["raw"].hex(), "first_frame": self.next_frame, "frames": frames,
+                 "shipped_at": shipped_at}
+        with open(os.path.join(gen_dir, "segments.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.next_frame = max_frame
+        self.segments += 1
+        self.last_shipped_at = shipped_at
+
+    def _checkpoint(self):
+        """Ship the tail under the write lock, backfill, and let the next writer restart the WAL."""
+        writer = sqlite3.connect(DB_PATH, isolation_level=None, timeout=WRITE_LOCK_TIMEOUT)
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError:
+            writer.close()
+            self._roll_reader()
+            return  # busy; try again next cycle
+        try:
+            self._ship()
+            self._release_reader()
+            # checkpoint from a second connection while the write lock is still
+            # held, so nothing can commit between the last ship and the backfill
+            ckpt = sqlite3.connect(DB_PATH, isolation_level=None)
+            try:
+                _busy, log, done = ckpt.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            finally:
+                ckpt.close()
+        finally:
+            writer.execute("ROLLBACK")
+            # reader first: if the last connection closes, SQLite deletes the WAL
+            self._reader = self._hold_reader()
+            writer.close()
+        self.last_checkpoint = time.monotonic()
+        self.checkpointed_frame = self.next_frame
+        if log and done < log:
+            logger.debug(f"📼 WAL checkpoint partial ({done}/{log} frames; a reader is active).")
+
+
+archiver = WalArchiver()
+
+
+# ─────────────────────────────
+# Generations / retention
+# ─────────────────────────────
+def _write_json(path, data):
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(path + ".part", path)
+
+
+def _segments(gen_dir: str) -> list:
+    try:
+        with open(os.path.join(gen_dir, "segments.jsonl"), encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def list_generations(archive_dir: str = None) -> list:
+    """Oldest first: {name, path, created_at, segments, last_shipped_at} for complete generations."""
+    archive_dir = archive_dir or ARCHIVE_DIR
+    gens = []
+    if not os.path.isdir(archive_dir):
+        return gens
+    for name in sorted(os.listdir(archive_dir)):
+        path = os.path.join(archive_dir, name)
+        meta_path = os.path.join(path, "generation.json")
+        if not os.path.isfile(meta_path) or not os.path.isfile(os.path.join(path, "base.db.gz")):
+            continue
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        segs = _segments(path)
+        gens.append({"name": name, "path": path, "created_at": meta["created_at"], "segments": len(segs),
+                     "last_shipped_at": segs[-1]["shipped_at"] if segs else meta["created_at"]})
+    return gens
+
+
+def _prune_generations():
+    """Drop generations that are no longer needed to restore any point within the retention window."""
+    gens = list_generations()
+    cutoff = datetime.now(timezone.utc) - RETENTION
+    for older, newer in zip(gens, gens[1:]):
+        if datetime.fromisoformat(newer["created_at"]) <= cutoff:
+            shutil.rmtree(older["path"], ignore_errors=True)
+            logger.info(f"🧹 WAL archive generation {older['name']} pruned.")
+
+
+# ─────────────────────────────
+# Point-in-time restore
+# ─────────────────────────────
+def _parse_at(value) -> datetime:
+    at = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    return at if at.tzinfo else at.astimezone()  # naive = server local time
+
+
+def restore_to(at, output: str, archive_dir: str = None) -> dict:
+    """Rebuild the database as of `at` into `output` (a standalone .db file).
+
+    Resolution is one ship interval: every transaction shipped at or before
+    `at` is included. Returns what was replayed.
+    """
+    at = _parse_at(at)
+    gens = [g for g in list_generations(archive_dir) if datetime.fromisoformat(g["created_at"]) <= at]
+    if not gens:
+        raise ArchiveError(f"the archive has nothing from before {at.isoformat(timespec='seconds')}")
+    gen = gens[-1]
+    part = output + ".part"
+    for suffix in ("", "-wal", "-shm"):
+        backups._remove(part + suffix)
+    with gzip.open(os.path.join(gen["path"], "base.db.gz"), "rb") as f_in, open(part, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+
+    conn = sqlite3.connect(part)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+
+    # Group segments by WAL (one run per WAL restart) and stop at the first gap
+    runs, replayed, last_at = [], 0, gen["created_at"]
+    for seg in _segments(gen["path"]):
+        if datetime.fromisoformat(seg["shipped_at"]) > at:
+            break
+        if not runs or runs[-1]["salt"] != seg["salt"]:
+            if seg["first_frame"] != 0:
+                break
+            runs.append({"salt": seg["salt"], "header": bytes.fromhex(seg["header"]),
+                         "files": [], "frames": 0})
+        run = runs[-1]
+        if seg["first_frame"] != run["frames"]:
+            break
+        run["files"].append(seg["file"])
+        run["frames"] += seg["frames"]
+        replayed += 1
+        last_at = seg["shipped_at"]
+
+    for run in runs:
+        with open(part + "-wal", "wb") as wal:
+            wal.write(run["header"])
+            for name in run["files"]:
+                with gzip.open(os.path.join(gen["path"], name), "rb") as seg_f:
+                    shutil.copyfileobj(seg_f, wal, 1024 * 1024)
+        conn = sqlite3.connect(part)  # opening recovers the WAL we just wrote
+        _busy, log, done = conn.execute("PRAGMA wal_checkpoint").fetchone()
+        conn.close()  # last connection: SQLite removes the -wal
+        if log != run["frames"] or done != log:
+            backups._remove(part)
+            raise ArchiveError(f"archived WAL is damaged: {log} of {run['frames']} frames recovered")
+
+    conn = sqlite3.connect(part)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+    integrity, _ = backups._inspect(part)
+    if integrity != "ok":
+        backups._remove(part)
+        raise ArchiveError(f"replayed database failed quick_check: {integrity}")
+    os.replace(part, output)
+    return {"generation": gen["name"], "segments": replayed, "restored_to": last_at, "requested": at.isoformat()}
+
+
+def restore_live(at) -> dict:
+    """Point-in-time restore straight into the live database (see backups.restore_file)."""
+    tmp = os.path.join(backups.BACKUP_DIR, f".pitr_{int(time.time())}.db")
+    os.makedirs(backups.BACKUP_DIR, exist_ok=True)
+    try:
+        result = restore_to(at, tmp)
+        backups.restore_file(tmp)
+    finally:
+        backups._remove(tmp)
+    archiver.restart_generation()
+    logger.info(f"♻️ Point-in-time restore to {result['restored_to']} ({result['segments']} WAL segment(s) replayed).")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Casharr WAL archive: list or point-in-time restore")
+    sub = parser.add_subparsers(dest="command", required=True)
+    listing = sub.add_parser("list", help="show archived generations and their time range")
+    listing.add_argument("--archive", default=None, help=f"archive directory (default {ARCHIVE_DIR})")
+    restore = sub.add_parser("restore", help="rebuild the database as of a time")
+    restore.add_argument("--at", required=True, help="ISO time, e.g. '2026-10-19 14:05' (local) or with +00:00")
+    restore.add_argument("--archive", default=None, help=f"archive directory (default {ARCHIVE_DIR})")
+    target = restore.add_mutually_exclusive_group()
+    target.add_argument("--output", default="restored.db", help="write the result here (default restored.db)")
+    target.add_argument("--live", action="store_true", help="replace the live database (stop Casharr first)")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for g in list_generations(args.archive):
+            print(f"{g['name']}  {g['created_at']} → {g['last_shipped_at']}  ({g['segments']} segments)")
+        return
+    try:
+        if args.live:
+            result = restore_to(args.at, DB_PATH + ".pitr", args.archive)
+            for suffix in ("-wal", "-shm"):
+                backups._remove(DB_PATH + suffix)
+            os.replace(DB_PATH + ".pitr", DB_PATH)
+        else:
+            result = restore_to(args.at, args.output, args.archive)
+    except (ArchiveError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Restored to {result['restored_to']} from generation {result['generation']} "
+          f"({result['segments']} segments) → {DB_PATH if args.live else args.output}")
+
+
+if __name__ == "__main__":
+    main()
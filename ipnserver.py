@@ -3,13 +3,9 @@ from flask import Flask, request, redirect
 import discord
 import requests, os, configparser, asyncio, json, sqlite3
 from datetime import datetime, timezone, timedelta
-import psutil
-import time
 from bot import bot, plex
 from webui.scheduler import scheduler  # ensures background loop starts
 
-APP_START = time.time()
-
 
 # ────────────────────────────────
 # Database + WebUI imports
@@ -379,45 +375,6 @@ def api_run_task():
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 500
     
-# ────────────────────────────────
-# ✅ Casharr System Status API
-# ────────────────────────────────
-
-@app.get("/api/status")
-def api_status():
-    """Return runtime system status for dashboard display."""
-    try:
-        uptime_sec = int(time.time() - APP_START)
-        hours, remainder = divmod(uptime_sec, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        uptime_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-
-        # Disk usage
-        usage = psutil.disk_usage('/')
-        disk_info = {
-            "total": f"{usage.total / (1024**3):.1f} GB",
-            "used": f"{usage.used / (1024**3):.1f} GB",
-            "percent": usage.percent
-        }
-
-        # Plex & Discord states
-        discord_ok = bot.is_ready() if hasattr(bot, "is_ready") else False
-        plex_ok = False
-        try:
-            plex_ok = bool(plex.plex)
-        except Exception:
-            plex_ok = False
-
-        return {
-            "ok": True,
-            "uptime": uptime_str,
-            "discord_online": discord_ok,
-            "plex_connected": plex_ok,
-            "disk": disk_info
-        }
-    except Exception as e:
-        return {"ok": False, "error": str(e)}, 500
-
 @app.post("/api/pending/<int:action_id>/approve")
 def api_approve_action(action_id):
     from database import resolve_pending_action
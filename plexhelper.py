@@ -30,6 +30,18 @@ class PlexHelper:
         except Exception:
             return False
 
+    # ────────────────────────────────
+    # Event journal helper
+    # ────────────────────────────────
+    def _journal(self, event_type, email, message):
+        try:
+            from database import record_event, get_member_by_email
+            member = get_member_by_email(email)
+            discord_id = member[0] if member else None
+            record_event(event_type, discord_id, message, email=email)
+        except Exception as e:
+            print(f"⚠️ Could not journal {event_type} for {email}: {e}")
+
     # ────────────────────────────────
     # Discord logging helper
     # ────────────────────────────────
@@ -128,6 +140,7 @@ class PlexHelper:
                 msg = f"✅ Plex invite sent to {email} (Libraries: {', '.join(self.libraries)})"
                 print(msg)
                 self._discord_log(msg)
+                self._journal("plex_invite", email, f"Plex invite sent to {email}")
                 return "sent"
             else:
                 msg = f"❌ Plex invite failed ({r.status_code}): {r.text}"
@@ -188,6 +201,7 @@ class PlexHelper:
                 msg = f"🚫 Removed Plex access for {email}"
                 print(msg)
                 self._discord_log(msg)
+                self._journal("plex_remove", email, f"Plex access removed for {email}")
                 return "removed"
             else:
                 msg = f"❌ Plex remove failed ({r.status_code}): {r.text}"
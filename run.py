@@ -1,5 +1,5 @@
 # run.py — unified launcher for Casharr
-import threading, time, configparser, os
+import threading, time, configparser, os, argparse
 from loghelper import logger
 from ipnserver import app
 
@@ -12,6 +12,11 @@ cfg.read(os.path.join("config", "config.ini"), encoding="utf-8")
 discord_enabled = cfg.getboolean("Discord", "Enabled", fallback=True)
 discord_token = cfg.get("Discord", "BotToken", fallback="").strip()
 
+parser = argparse.ArgumentParser(description="Casharr launcher")
+parser.add_argument("--sync-commands", action="store_true",
+                    help="force a slash command resync even if the command tree is unchanged")
+args, _ = parser.parse_known_args()
+
 # ───────────────────────────────
 # Start Flask WebUI + IPN
 # ───────────────────────────────
@@ -34,6 +39,10 @@ if discord_enabled and discord_token:
         import bot.commands.user_commands
         import bot.commands.admin_commands
 
+        if args.sync_commands:
+            import bot.command_sync
+            bot.command_sync.FORCE = True
+
         logger.info("🤖 Launching Casharr Discord bot...")
         try:
             client.run(discord_token)
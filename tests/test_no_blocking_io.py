@@ -0,0 +1,99 @@
+# tests/test_no_blocking_io.py
+"""Coroutines in bot/ must not do blocking I/O on the event loop thread.
+
+Static scan: inside every `async def` under bot/, direct calls into the
+sqlite data layer, the Plex client, anything from helpers/ (backups, exports,
+notifiers, ...), shutil, sqlite3, open() or time.sleep() are flagged, except
+the few helpers listed in LOOP_SAFE_HELPERS. Blocking work has to go through
+run_blocking / db. / aplex. (bot.aio). Nested sync defs and lambdas are
+not scanned, since those are what gets handed to run_blocking.
+"""
+import ast
+import pathlib
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+BOT_DIR = ROOT / "bot"
+
+BLOCKING_MODULES = {"database", "plexhelper", "helpers", "sqlite3", "shutil"}
+BLOCKING_NAMES = {"open", "send_email", "send_sms"}
+BLOCKING_ATTRS = {("time", "sleep")}
+# helpers/ entries that are fine on the loop thread
+LOOP_SAFE_HELPERS = {
+    ("helpers.exports", "export_stream"),  # only builds a generator; write_export drains it off-loop
+    ("helpers.report_jobs", "runner"),     # submit() just queues for the runner thread
+}
+
+
+def _blocking_imports(tree, reexported=frozenset()):
+    """Local names bound to blocking modules, and to callables imported from them."""
+    modules, names = set(), set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name.split(".")[0] in BLOCKING_MODULES:
+                    modules.add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            root = node.module.split(".")[0]
+            for alias in node.names:
+                if (node.module, alias.name) in LOOP_SAFE_HELPERS:
+                    continue
+                if root in BLOCKING_MODULES or (node.module == "bot" and alias.name in reexported):
+                    names.add(alias.asname or alias.name)
+    return modules, names
+
+
+def _bot_reexports():
+    """Blocking names `from bot import ...` hands out: database helpers and the sync plex client."""
+    tree = ast.parse((BOT_DIR / "__init__.py").read_text(encoding="utf-8"))
+    _, names = _blocking_imports(tree)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Call):
+            if isinstance(node.value.func, ast.Name) and node.value.func.id in names:
+                names.update(t.id for t in node.targets if isinstance(t, ast.Name))
+    return frozenset(names)
+
+
+def _root_name(expr):
+    while isinstance(expr, ast.Attribute):
+        expr = expr.value
+    return expr.id if isinstance(expr, ast.Name) else None
+
+
+def _own_calls(func):
+    """Calls made directly in a coroutine's body (not in nested defs/lambdas)."""
+    stack = list(func.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+            continue
+        if isinstance(node, ast.Call):
+            yield node
+        stack.extend(ast.iter_child_nodes(node))
+
+
+def _violations(path, reexported=frozenset()):
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    modules, names = _blocking_imports(tree, reexported)
+    for func in ast.walk(tree):
+        if not isinstance(func, ast.AsyncFunctionDef):
+            continue
+        for call in _own_calls(func):
+            target = call.func
+            if isinstance(target, ast.Name):
+                bad = target.id in BLOCKING_NAMES or target.id in names
+            elif isinstance(target, ast.Attribute):
+                root = _root_name(target)
+                bad = root in modules or root in names or (
+                    isinstance(target.value, ast.Name) and (target.value.id, target.attr) in BLOCKING_ATTRS
+                )
+            else:
+                bad = False
+            if bad:
+                rel = path.relative_to(ROOT)
+                yield f"{rel}:{call.lineno} {func.name}() calls {ast.unparse(target)}"
+
+
+def test_bot_coroutines_do_not_block():
+    reexported = _bot_reexports()
+    found = [v for path in sorted(BOT_DIR.rglob("*.py")) for v in _violations(path, reexported)]
+    assert not found, "Blocking I/O inside coroutines (use run_blocking / db. / aplex.):\n" + "\n".join(found)
@@ -3,16 +3,11 @@ from flask import (
     Blueprint, render_template, send_from_directory, abort,
     request, jsonify, flash, redirect, url_for, Response, session
 )
-import os, shutil, requests, glob, asyncio, configparser, discord, sqlite3
+import os, shutil, requests, glob, asyncio, configparser, discord, sqlite3, tempfile
 from datetime import datetime, timezone, timedelta
 import hashlib
-import xml.etree.ElementTree as ET
 import psutil, time, json
 
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
 
 # ───────────────────────────────
 # App / Helpers / DB imports
@@ -25,12 +20,27 @@ from loghelper import LOG_DIR, logger
 from database import (
     DB_PATH, get_all_members, get_member, save_member,
     start_trial, end_trial, add_or_update_member, delete_member,
-    update_member_role
+    update_member_role, get_events, EVENT_TYPES, query_members, search_members, find_member,
+    member_stats, MEMBER_SORTS, get_backups, get_backup
 )
 from bot import (
     client as bot,
     ADMIN_ROLE, INITIAL_ROLE, TRIAL_ROLE, PAYER_ROLE, LIFETIME_ROLE,
-    send_admin, plex, TRIAL_DAYS
+    send_admin, plex, TRIAL_DAYS, guild_cache
+)
+from bot.role_transitions import transition, set_access_role
+from bot import member_cache, sharding
+from webui.health import prober
+from helpers.report_jobs import runner as report_runner
+from helpers.exports import export_stream, FORMATS as EXPORT_FORMATS
+from helpers.imports import import_members, FORMATS as IMPORT_FORMATS
+from helpers import backups as backup_service
+from helpers import wal_archive
+from helpers.backups import create_backup
+from webui.httpcache import conditional, body_etag, compress, install_json_provider
+from webui.live import hub, install_log_handler
+from webui.logfiles import (
+    PAGE_BYTES, TAIL_BYTES, log_path, current_log, list_logs, read_forward, read_backward, tail_lines
 )
 
 # ───────────────────────────────
@@ -80,6 +90,16 @@ def login_required(f):
     return decorated_function
 
 
+@webui.record_once
+def _setup_app(state):
+    install_json_provider(state.app)
+
+
+@webui.after_request
+def _compress_response(resp):
+    return compress(resp)
+
+
 @webui.before_request
 def enforce_login_on_first_visit():
     public_routes = [
@@ -90,6 +110,8 @@ def enforce_login_on_first_visit():
         "webui.referral_portal",
         "webui.pay_page",
         "webui.update_details",
+        "webui.healthz",
+        "webui.readyz",
     ]
     if request.endpoint in public_routes:
         return
@@ -103,38 +125,6 @@ def enforce_login_on_first_visit():
 @webui.route("/")
 @webui.route("/dashboard")
 def dashboard():
-    rows = get_all_members()
-    # make comparisons timezone-neutral
-    from datetime import datetime
-
-    def _to_naive(dt_str):
-        if not dt_str:
-            return None
-        try:
-            return datetime.fromisoformat(dt_str).replace(tzinfo=None)
-        except Exception:
-            return None
-
-    now_naive = datetime.now().replace(tzinfo=None)
-
-    total = len(rows)
-    active_trials = sum(
-        1 for r in rows
-        if r[8] and (te := _to_naive(r[8])) and te > now_naive
-    )
-    active_payers = sum(
-        1 for r in rows
-        if r[10] and (pu := _to_naive(r[10])) and pu > now_naive
-    )
-    expired = sum(
-        1 for r in rows
-        if (
-            (r[8] and (te := _to_naive(r[8])) and te < now_naive)
-            or (r[10] and (pu := _to_naive(r[10])) and pu < now_naive)
-        )
-    )
-
-
     cfg = configparser.ConfigParser()
     cfg.read(os.path.join("config", "config.ini"), encoding="utf-8")
 
@@ -147,7 +137,7 @@ def dashboard():
     reminder_days = cfg.get("Reminders", "DaysBeforeExpiry", fallback="").strip()
     access_mode = cfg.get("AccessMode", "Mode", fallback="Manual").strip()
 
-    stats = {"total": total, "active_trials": active_trials, "active_payers": active_payers, "expired": expired}
+    stats = member_stats()
     SERVER_NAME = cfg.get("General", "ServerName", fallback="My Plex Server")
     return render_template(
         "dashboard.html",
@@ -248,10 +238,25 @@ def api_deny_pending(action_id: int):
 
 @webui.route("/api/logs/live")
 def api_logs_live():
+    """Tail the current log by byte offset.
+
+    No `offset` → the last few KB. With `offset` (and the `file` it belongs
+    to) → only the bytes written since. A restart switches files; the
+    response then has `reset: true` and starts from the new file's tail.
+    """
     try:
-        with open("logs/latest.log", "r", encoding="utf-8") as f:
-            tail = f.read()[-5000:]
-        return {"ok": True, "log": tail}
+        name = current_log()
+        path = log_path(name) if name else None
+        if not path:
+            return {"ok": False, "error": "No log file yet."}
+        offset = request.args.get("offset", type=int)
+        reset = offset is None or request.args.get("file") != name or offset > os.path.getsize(path)
+        if reset:
+            chunk = read_backward(path, limit=TAIL_BYTES)
+        else:
+            chunk = read_forward(path, offset)
+        return {"ok": True, "file": name, "log": chunk["text"], "offset": chunk["end"],
+                "start": chunk["start"], "size": chunk["size"], "reset": reset}
     except Exception as e:
         return {"ok": False, "error": str(e)}
     
@@ -348,78 +353,52 @@ def api_sync_plex():
 # API: simple stats + logs
 # ───────────────────────────────
 @webui.route("/api/stats")
+@conditional(bucket=60)
 def api_stats():
-    from datetime import datetime, timezone
-    rows = get_all_members()
-
-    # Use timezone-aware "now" in UTC
-    now = datetime.now(timezone.utc)
-
-    total = len(rows)
-    active_trials = 0
-    active_payers = 0
-    expired = 0
-
-    for r in rows:
-        trial_end_raw = r[8] if len(r) > 8 else None
-        paid_until_raw = r[10] if len(r) > 10 else None
-
-        trial_end = None
-        paid_until = None
-
-        # Safely parse trial_end
-        if trial_end_raw:
-            try:
-                trial_end = datetime.fromisoformat(trial_end_raw)
-            except Exception:
-                trial_end = None
-
-        # Safely parse paid_until
-        if paid_until_raw:
-            try:
-                paid_until = datetime.fromisoformat(paid_until_raw)
-            except Exception:
-                paid_until = None
-
-        # Count active trials
-        if trial_end and trial_end > now:
-            active_trials += 1
-
-        # Count active payers
-        if paid_until and paid_until > now:
-            active_payers += 1
-
-        # Count expired (either trial or paid has ended)
-        if (trial_end and trial_end < now) or (paid_until and paid_until < now):
-            expired += 1
-
-    return jsonify({
-        "total": total,
-        "active_trials": active_trials,
-        "active_payers": active_payers,
-        "expired": expired
-    })
+    return jsonify(_member_stats())
+
+
+def _member_stats():
+    s = member_stats()
+    return {
+        "total": s["total"],
+        "active_trials": s["active_trials"],
+        "active_payers": s["active_payers"],
+        "expired": s["expired"],
+        "by_status": s["by_status"],
+        "referrals": s["referrals"],
+    }
 
 
 @webui.route("/api/logs")
 def api_logs_list():
-    files = []
-    for f in sorted(os.listdir(LOG_DIR), key=lambda x: os.path.getmtime(os.path.join(LOG_DIR, x)), reverse=True):
-        if f.endswith(".log"):
-            path = os.path.join(LOG_DIR, f)
-            files.append({"name": f, "size": os.path.getsize(path), "mtime": os.path.getmtime(path)})
-    return jsonify({"files": files})
+    return jsonify({"files": list_logs(), "current": current_log()})
 
 
 @webui.route("/api/logs/<logname>")
 def api_log_content(logname):
-    safe = os.path.basename(logname)
-    path = os.path.join(LOG_DIR, safe)
-    if not os.path.isfile(path):
+    """Plain-text last 1000 lines (read backwards from EOF)."""
+    path = log_path(logname)
+    if not path:
         abort(404)
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        data = f.readlines()[-1000:]
-    return Response("".join(data), mimetype="text/plain; charset=utf-8")
+    return Response(tail_lines(path, 1000), mimetype="text/plain; charset=utf-8")
+
+
+@webui.route("/api/logs/<logname>/range")
+def api_log_range(logname):
+    """Range-read a log file by byte cursor.
+
+    ?offset=N   → next page forward from N
+    ?before=N   → previous page ending at N (omit both for the last page)
+    """
+    path = log_path(logname)
+    if not path:
+        abort(404)
+    limit = min(max(request.args.get("limit", PAGE_BYTES, type=int), 1024), 1024 * 1024)
+    offset = request.args.get("offset", type=int)
+    if offset is not None:
+        return jsonify(read_forward(path, offset, limit))
+    return jsonify(read_backward(path, request.args.get("before", type=int), limit))
 
 # ───────────────────────────────
 # Login / Logout
@@ -820,45 +799,38 @@ def members():
     cfg = configparser.ConfigParser()
     cfg.read(os.path.join("config", "config.ini"), encoding="utf-8")
     SERVER_NAME = cfg.get("General", "ServerName", fallback="My Plex Server")
-    return render_template("members.html", title=f"Members | {SERVER_NAME}")
+    # Stored statuses are the configured role names, so filter on those
+    statuses = [INITIAL_ROLE, TRIAL_ROLE, PAYER_ROLE, LIFETIME_ROLE, "Expired"]
+    return render_template("members.html", title=f"Members | {SERVER_NAME}", statuses=statuses)
 
 
 # ───────────────────────────────
 # Discord Role & Member Helpers
 # ───────────────────────────────
 def _find_member_across_guilds(discord_id: int):
-    for g in bot.guilds:
-        m = g.get_member(int(discord_id))
-        if m: return g, m
-    return None, None
+    """(guild, member) from a Flask thread; lazy member-cache mode fetches on the bot loop."""
+    guild, member = guild_cache.find_member(discord_id)
+    if member is None and member_cache.LAZY and bot.is_ready():
+        future = asyncio.run_coroutine_threadsafe(member_cache.find(discord_id, bot.guilds), bot.loop)
+        guild, member = future.result(timeout=10)
+    return guild, member
 
 def _roles_for_guild(guild):
-    return (
-        discord.utils.get(guild.roles, name=INITIAL_ROLE),
-        discord.utils.get(guild.roles, name=TRIAL_ROLE),
-        discord.utils.get(guild.roles, name=PAYER_ROLE),
-        discord.utils.get(guild.roles, name=LIFETIME_ROLE),
-        discord.utils.get(guild.roles, name=ADMIN_ROLE),
-    )
+    return guild_cache.roles(guild, INITIAL_ROLE, TRIAL_ROLE, PAYER_ROLE, LIFETIME_ROLE, ADMIN_ROLE)
 
 async def _discord_set_role(discord_id: int, target_role: str):
-    guild, member = _find_member_across_guilds(discord_id)
+    guild, member = await member_cache.find(discord_id, bot.guilds)
     if not guild or not member:
         return {"ok": False, "error": "Member not found in any guild."}
     init_r, trial_r, payer_r, life_r, _ = _roles_for_guild(guild)
-    current = [r for r in [init_r, trial_r, payer_r, life_r] if r and r in member.roles]
-    if current:
-        try:
-            await member.remove_roles(*current, reason="Casharr WebUI role update")
-        except Exception as e:
-            return {"ok": False, "error": f"Failed removing roles: {e}"}
     add_map = {INITIAL_ROLE: init_r, TRIAL_ROLE: trial_r, PAYER_ROLE: payer_r, LIFETIME_ROLE: life_r}
-    add_role = add_map.get(target_role)
-    if add_role:
-        try:
-            await member.add_roles(add_role, reason="Casharr WebUI role update")
-        except Exception as e:
-            return {"ok": False, "error": f"Failed adding role: {e}"}
+    try:
+        await set_access_role(
+            member, add_map.get(target_role), [init_r, trial_r, payer_r, life_r],
+            reason="Casharr WebUI role update",
+        )
+    except Exception as e:
+        return {"ok": False, "error": f"Failed updating roles: {e}"}
     return {"ok": True}
 
 def _compute_status(row, member, guild):
@@ -916,49 +888,121 @@ def _compute_status(row, member, guild):
 # 📡 Members JSON API
 # ───────────────────────────────
 @webui.route("/api/members", methods=["GET"])
+@conditional(bucket=60)  # expires_within is relative to now
 def api_members():
-    import sqlite3, os, configparser
+    """One page of members: ?status=&origin=&q=&expires_within=&sort=&order=&limit=&cursor=&fields=
 
-    cfg = configparser.ConfigParser()
-    cfg.read(os.path.join("config", "config.ini"), encoding="utf-8")
+    Filtering, sorting and paging happen in SQL (see database.query_members);
+    pass the returned `next` back as `cursor` for the following page.
+    """
+    args = request.args
+    fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()] or None
+    try:
+        expires_within = args.get("expires_within", type=int)
+        rows, next_cursor, total = query_members(
+            status=args.get("status") or None,
+            origin=args.get("origin") or None,
+            q=args.get("q") or None,
+            expires_within=expires_within,
+            sort=args.get("sort", "name"),
+            desc=args.get("order", "asc").lower() == "desc",
+            limit=args.get("limit", 100, type=int),
+            cursor=args.get("cursor") or None,
+            fields=fields,
+            default_status=INITIAL_ROLE,
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({"ok": False, "error": f"Bad query: {e}"}), 400
+
+    for row in rows:
+        if "status" in row:
+            row["status"] = row["status"] or INITIAL_ROLE
+        if "origin" in row:
+            row["origin"] = row["origin"] or ""
+
+    return jsonify({"ok": True, "members": rows, "next": next_cursor, "total": total})
+
+@webui.route("/api/members/search", methods=["GET"])
+def api_members_search():
+    """Typeahead: ?q=<prefix words>&limit= → best matches by tag, name, email, mobile or Plex name."""
+    q = request.args.get("q", "").strip()
+    results = search_members(q, request.args.get("limit", 10, type=int)) if q else []
+    for m in results:
+        m["status"] = m["status"] or INITIAL_ROLE
+        m["label"] = " ".join(p for p in (m["first_name"], m["last_name"]) if p) or m["discord_tag"] or m["email"] or m["discord_id"]
+    return jsonify({"ok": True, "results": results})
 
-    INITIAL_ROLE  = cfg.get("Discord", "InitialRole",  fallback="Initial").strip()
-    TRIAL_ROLE    = cfg.get("Discord", "TrialRole",    fallback="Trial").strip()
-    PAYER_ROLE    = cfg.get("Discord", "PayerRole",    fallback="Payer").strip()
-    LIFETIME_ROLE = cfg.get("Discord", "LifetimeRole", fallback="Lifetime").strip()
+# ───────────────────────────────
+# Streaming exports (CSV / NDJSON)
+# ───────────────────────────────
+@webui.route("/api/export/<dataset>.<fmt>")
+def api_export(dataset, fmt):
+    """Stream members or payments as CSV/NDJSON.
 
-    # --- Load DB columns ---
-    conn = sqlite3.connect("data/members.db")
-    c = conn.cursor()
-    c.execute("PRAGMA table_info(members)")
-    colnames = [row[1] for row in c.fetchall()]
-    conn.close()
+    members:  same filters as /api/members (status, origin, q, expires_within, sort, order, fields)
+    payments: ?member=<discord_id> &since=<ISO time>
+    Add ?gzip=1 for a .gz download compressed on the fly.
+    """
+    args = request.args
+    compress = args.get("gzip", "").lower() in ("1", "true", "yes")
+    fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()] or None
+    if dataset == "members":
+        sort = args.get("sort", "discord_id")
+        if sort not in MEMBER_SORTS:
+            return jsonify({"ok": False, "error": f"unknown sort key '{sort}'"}), 400
+        filters = dict(
+            status=args.get("status") or None,
+            origin=args.get("origin") or None,
+            q=args.get("q") or None,
+            expires_within=args.get("expires_within", type=int),
+            sort=sort,
+            desc=args.get("order", "asc").lower() == "desc",
+            default_status=INITIAL_ROLE,
+        )
+    else:
+        filters = dict(discord_id=args.get("member") or None, since=args.get("since") or None)
+    try:
+        body = export_stream(dataset, fmt, fields=fields, compress=compress, **filters)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 404
+
+    filename = f"{dataset}_{datetime.now():%Y-%m-%d_%H-%M-%S}.{fmt}" + (".gz" if compress else "")
+    return Response(
+        body,
+        mimetype="application/gzip" if compress else EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"},
+    )
 
-    rows = get_all_members()
-    out = []
-
-    for raw in rows:
-        row = dict(zip(colnames, raw))   # ← FIXED: align properly
-
-        db_status = row.get("status") or INITIAL_ROLE
-
-        out.append({
-            "discord_id": row.get("discord_id"),
-            "discord_tag": row.get("discord_tag"),
-            "first_name": row.get("first_name"),
-            "last_name": row.get("last_name"),
-            "email": row.get("email"),
-            "mobile": row.get("mobile"),
-            "trial_start": row.get("trial_start"),
-            "trial_end": row.get("trial_end"),     # ← NOW CORRECT EVERY TIME
-            "paid_until": row.get("paid_until"),
-            "origin": row.get("origin") or "",
-            "status": db_status,
-            "referrer_id": row.get("referrer_id"),
-            "plex_username": row.get("plex_username")
-        })
 
-    return jsonify({"ok": True, "members": out})
+# ───────────────────────────────
+# Bulk member import (CSV / NDJSON)
+# ───────────────────────────────
+@webui.route("/api/import/members", methods=["POST"])
+def api_import_members():
+    """Import members from an uploaded file (multipart field "file") or the raw request body.
+
+    ?format=csv|ndjson (default: from the file name / content type), ?dry_run=1
+    to validate and count without writing. Returns the import report.
+    """
+    upload = request.files.get("file")
+    name = (upload.filename if upload else "") or ""
+    content_type = (upload.mimetype if upload else request.mimetype) or ""
+    fmt = request.args.get("format") or (
+        "ndjson" if name.endswith((".ndjson", ".jsonl")) or "ndjson" in content_type else "csv"
+    )
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({"ok": False, "error": f"unknown format '{fmt}'"}), 400
+    dry_run = request.args.get("dry_run", "").lower() in ("1", "true", "yes")
+    try:
+        report = import_members(upload.stream if upload else request.stream, fmt, dry_run=dry_run)
+    except Exception as e:
+        logger.error(f"⚠️ Member import failed: {e}")
+        return jsonify({"ok": False, "error": str(e)}), 500
+    logger.info(f"📥 Member import{' (dry run)' if dry_run else ''}: {report['rows']} rows, "
+                f"{report['inserted']} new, {report['updated']} updated, {report['unchanged']} unchanged, "
+                f"{report['failed']} failed")
+    return jsonify(report)
+
 
 @webui.route("/api/member/<discord_id>", methods=["POST"])
 def api_member_update(discord_id):
@@ -1109,17 +1153,13 @@ def api_member_delete(discord_id):
     # 2️⃣ Discord removal
     if discord_enabled and discord_id not in ("", "None", None, "noid"):
         try:
-            import main as bot_main
-            loop = asyncio.get_event_loop()
-            for g in bot_main.bot.guilds:
-                member_obj = g.get_member(int(discord_id))
-                if member_obj:
-                    asyncio.run_coroutine_threadsafe(
-                        member_obj.kick(reason="Removed via Casharr WebUI"), loop
-                    )
-                    removed.append("Discord")
-                    logger.info(f"✅ Kicked Discord user {member_obj.name} ({discord_id}) from {g.name}")
-                    break
+            g, member_obj = _find_member_across_guilds(discord_id)
+            if member_obj:
+                asyncio.run_coroutine_threadsafe(
+                    member_obj.kick(reason="Removed via Casharr WebUI"), bot.loop
+                )
+                removed.append("Discord")
+                logger.info(f"✅ Kicked Discord user {member_obj.name} ({discord_id}) from {g.name}")
         except Exception as e:
             logger.warning(f"⚠️ Discord removal failed for {discord_id}: {e}")
             errors.append(f"Discord: {e}")
@@ -1390,13 +1430,9 @@ def api_message(target):
         if not m:
             m = get_member_by_email(target)
 
-        # 4️⃣ Lookup by discord_id case-insensitive
+        # 4️⃣ Lookup by discord_id / Discord tag / Plex username, case-insensitive (search index)
         if not m:
-            t = str(target).strip().lower()
-            for row in get_all_members():
-                if str(row[0]).strip().lower() == t:
-                    m = row
-                    break
+            m = find_member(target)
 
         if m:
             recipients = [m]
@@ -1446,12 +1482,7 @@ def api_message(target):
         # Discord
         if discord_enabled and use_discord:
             try:
-                member_obj = None
-                for g in bot.guilds:
-                    m_obj = g.get_member(int(discord_id))
-                    if m_obj:
-                        member_obj = m_obj
-                        break
+                _, member_obj = _find_member_across_guilds(discord_id)
                 if member_obj:
                     asyncio.run_coroutine_threadsafe(
                         member_obj.send(f"**{subject}**\n\n{message_text}"), bot.loop
@@ -1511,87 +1542,50 @@ def reports():
     return render_template("reports.html", title="Reports | Casharr")
 
 @webui.route("/api/report/summary")
+@conditional(bucket=60)
 def api_report_summary():
-    rows = get_all_members()
-    now = datetime.now(timezone.utc)
+    s = member_stats()
+    return jsonify({
+        "total": s["total"], "trials": s["active_trials"], "payers": s["active_payers"],
+        "expired": s["expired"], "referrals": s["referrals"], "members": s["preview"],
+    })
 
-    def parse_iso_safe(dt):
-        if not dt: return None
-        try: return datetime.fromisoformat(dt)
-        except Exception: return None
+@webui.route("/api/report/ggenerate", methods=["GET", "POST"])  # (kept your route name typo out of caution)
+@webui.route("/api/report/generate", methods=["GET", "POST"])
+def api_generate_report():
+    """Queue a report build (worker process); poll /api/report/jobs/<id> for progress."""
+    if not member_stats()["total"]:
+        return jsonify({"success": False, "message": "No members found in database."})
+    job = report_runner.submit(session.get("user") or "WebUI")
+    return jsonify({"success": True, "message": f"🧾 Report job #{job.id} {job.status}.", "job": job.summary()})
 
-    total = len(rows)
-    trials = sum(1 for r in rows if parse_iso_safe(r[8]) and parse_iso_safe(r[8]) > now)
-    payers = sum(1 for r in rows if parse_iso_safe(r[10]) and parse_iso_safe(r[10]) > now)
-    expired = sum(
-        1 for r in rows
-        if (parse_iso_safe(r[8]) and parse_iso_safe(r[8]) < now)
-        or (parse_iso_safe(r[10]) and parse_iso_safe(r[10]) < now)
-    )
-    preview = sorted(rows, key=lambda r: str(r[0]))[-10:]
-    members = [{"tag": r[1], "email": r[4], "trial_end": r[8], "paid_until": r[10], "referrer": r[14]} for r in preview]
-    return jsonify({"total": total, "trials": trials, "payers": payers, "expired": expired, "members": members})
 
-@webui.route("/api/report/ggenerate")  # (kept your route name typo out of caution)
-@webui.route("/api/report/generate")
-def api_generate_report():
-    try:
-        rows = get_all_members()
-        if not rows:
-            return jsonify({"success": False, "message": "No members found in database."})
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-
-        pdf_path = os.path.join(EXPORTS_DIR, f"members_report_{timestamp}.pdf")
-        doc = SimpleDocTemplate(pdf_path, pagesize=letter)
-        styles = getSampleStyleSheet()
-        elements = [
-            Paragraph("Casharr Member Report", styles["Heading1"]),
-            Spacer(1, 12),
-            Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles["Normal"]),
-            Spacer(1, 12)
-        ]
+@webui.route("/api/report/jobs")
+def api_report_jobs():
+    return jsonify({"ok": True, "jobs": report_runner.snapshot()})
 
-        total = len(rows)
-        trials = sum(1 for r in rows if r[8])
-        payers = sum(1 for r in rows if r[10])
-        expired = total - trials - payers
-        elements += [
-            Paragraph(f"Total Members: <b>{total}</b>", styles["Normal"]),
-            Paragraph(f"Active Trials: <b>{trials}</b>", styles["Normal"]),
-            Paragraph(f"Active Payers: <b>{payers}</b>", styles["Normal"]),
-            Paragraph(f"Expired: <b>{expired}</b>", styles["Normal"]),
-            Spacer(1, 10), Paragraph("Details", styles["Heading2"]), Spacer(1, 6)
-        ]
 
-        data = [["Discord Tag", "Email", "Trial End", "Paid Until", "Referrer"]]
-        for r in rows:
-            data.append([r[1] or "-", r[4] or "-", r[8] or "-", r[10] or "-", r[14] or "-"])
-        table = Table(data, repeatRows=1)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
-        ]))
-        elements.append(table)
-        doc.build(elements)
-
-        xml_path = os.path.join(EXPORTS_DIR, f"members_report_{timestamp}.xml")
-        root = ET.Element("MembersReport")
-        ET.SubElement(root, "GeneratedAt").text = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        for r in rows:
-            m = ET.SubElement(root, "Member")
-            ET.SubElement(m, "DiscordTag").text = r[1] or ""
-            ET.SubElement(m, "Email").text = r[4] or ""
-            ET.SubElement(m, "TrialEnd").text = r[8] or ""
-            ET.SubElement(m, "PaidUntil").text = r[10] or ""
-            ET.SubElement(m, "Referrer").text = r[14] or ""
-        ET.ElementTree(root).write(xml_path, encoding="utf-8", xml_declaration=True)
-
-        return jsonify({"success": True, "message": "✅ Report generated successfully.",
-                        "pdf": os.path.basename(pdf_path), "xml": os.path.basename(xml_path)})
-    except Exception as e:
-        return jsonify({"success": False, "message": f"⚠️ Failed to generate report: {e}"})
+@webui.route("/api/report/jobs/<int:job_id>")
+def api_report_job(job_id):
+    job = report_runner.get(job_id)
+    if not job:
+        return jsonify({"ok": False, "error": "Unknown report job."}), 404
+    return jsonify({"ok": True, "job": job.summary()})
+
+
+@webui.route("/api/report/jobs/<int:job_id>/cancel", methods=["POST"])
+def api_report_job_cancel(job_id):
+    if not report_runner.cancel(job_id):
+        return jsonify({"ok": False, "error": "Job is not queued or running."}), 409
+    return jsonify({"ok": True, "job": report_runner.get(job_id).summary()})
+
+
+@webui.route("/api/report/jobs/<int:job_id>/download/<kind>")
+def api_report_job_download(job_id, kind):
+    job = report_runner.get(job_id)
+    if not job or job.status != "done" or kind not in job.files:
+        abort(404)
+    return send_from_directory(EXPORTS_DIR, os.path.basename(job.files[kind]), as_attachment=True)
 
 
 @webui.route("/api/report/latest")
@@ -1607,17 +1601,11 @@ def api_latest_report():
 # ─────────────────────────────
 @webui.route("/api/connection_status")
 def api_connection_status():
-    try:
-        discord_online = getattr(bot, "is_ready", lambda: False)()
-        plex_connected = False
-        try:
-            _ = plex.plex.friendlyName
-            plex_connected = True
-        except Exception:
-            plex_connected = False
-        return jsonify({"discord_online": discord_online, "plex_connected": plex_connected})
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    """Answered from the health prober's last cycle (no live Plex call)."""
+    return jsonify({
+        "discord_online": prober.ok("discord"),
+        "plex_connected": prober.ok("plex"),
+    })
 
 # ─────────────────────────────
 # Schema + Next Backup API
@@ -1634,14 +1622,13 @@ def _read_schema_version():
         return None
 
 def _compute_next_backup_time():
-    """Infer next backup as (latest auto_backup_*.db mtime + 24h)."""
+    """Infer next backup as (latest scheduled backup in the catalog + 24h)."""
     try:
-        files = sorted(glob.glob(os.path.join(EXPORTS_DIR, "auto_backup_*.db")))
-        if not files:
+        latest = get_backups(limit=1, status=None, origin="auto,daily,scheduler")
+        if not latest:
             return None
-        latest = max(files, key=lambda p: os.path.getmtime(p))
-        next_ts = os.path.getmtime(latest) + 24*3600
-        return datetime.fromtimestamp(next_ts).isoformat(sep=" ", timespec="seconds")
+        next_dt = datetime.fromisoformat(latest[0]["created_at"]).astimezone() + timedelta(hours=24)
+        return next_dt.replace(tzinfo=None).isoformat(sep=" ", timespec="seconds")
     except Exception:
         return None
 
@@ -1666,30 +1653,52 @@ def system_tasks():
 @webui.route("/system/backup")
 def system_backup():
     backups = []
-    for f in sorted(os.listdir(EXPORTS_DIR), reverse=True):
-        if f.endswith(".db") or f.endswith(".zip"):
-            path = os.path.join(EXPORTS_DIR, f)
-            stat = os.stat(path)
-            backups.append({
-                "name": f,
-                "size": f"{stat.st_size / (1024 * 1024):.1f} MiB",
-                "date": datetime.fromtimestamp(stat.st_mtime).strftime("%b %d %Y %H:%M"),
-            })
-    return render_template("system_backup.html", title="System | Backup", backups=backups)
+    for b in get_backups(limit=200):
+        stored = b["stored_bytes"] if b["stored_bytes"] is not None else b["size_bytes"] or 0
+        backups.append({
+            "name": b["file"],
+            "size": f"{stored / (1024 * 1024):.1f} MiB",
+            "db_size": f"{(b['size_bytes'] or 0) / (1024 * 1024):.1f} MiB",
+            "date": datetime.fromisoformat(b["created_at"]).astimezone().strftime("%b %d %Y %H:%M"),
+            "origin": b["origin"] or "-",
+            "schema": b["schema_version"] if b["schema_version"] is not None else "-",
+            "checksum": (b["checksum"] or "")[:12],
+        })
+    archive = wal_archive.archiver.status()
+    for key in ("restorable_from", "restorable_to"):
+        if archive[key]:
+            archive[key] = datetime.fromisoformat(archive[key]).astimezone().strftime("%b %d %Y %H:%M:%S")
+    return render_template("system_backup.html", title="System | Backup", backups=backups, archive=archive)
 
 @webui.route("/system/backup_now")
 def backup_now():
-    ts = datetime.now().strftime("%Y.%m.%d_%H.%M.%S")
-    out = os.path.join(EXPORTS_DIR, f"casharr_backup_{ts}.db")
-    shutil.copy2(DB_PATH, out)
+    try:
+        out = _create_manual_backup()
+    except Exception as e:
+        return f"❌ Backup failed: {e}", 500
     return f"✅ Backup created: {os.path.basename(out)}"
 
 @webui.route("/system/restore/<fname>", methods=["POST"])
 def restore_backup(fname):
-    path = os.path.join(EXPORTS_DIR, fname)
-    if not os.path.exists(path):
+    at = (request.form.get("at") or request.args.get("at") or "").strip()
+    if at:
+        # point in time: replayed from the WAL archive (base snapshot + shipped WAL)
+        if fname != "archive":
+            return "❌ Point-in-time restores come from the WAL archive: POST /system/restore/archive?at=…", 400
+        try:
+            result = wal_archive.restore_live(at)
+        except (wal_archive.ArchiveError, ValueError) as e:
+            return f"❌ Restore failed: {e}", 400
+        except Exception as e:
+            return f"❌ Restore failed: {e}", 500
+        return (f"✅ Database restored to {result['restored_to']} "
+                f"({result['segments']} WAL segment(s) replayed from {result['generation']})")
+    if not get_backup(file=fname):
         return "❌ File not found", 404
-    shutil.copy2(path, DB_PATH)
+    try:
+        backup_service.restore_backup(fname)
+    except Exception as e:
+        return f"❌ Restore failed: {e}", 500
     return f"✅ Database restored from {fname}"
 
 @webui.route("/system/restore_upload", methods=["POST"])
@@ -1697,35 +1706,36 @@ def restore_upload():
     file = request.files.get("file")
     if not file:
         return "❌ No file selected"
-    upload_path = os.path.join(EXPORTS_DIR, file.filename)
-    file.save(upload_path)
-    shutil.copy2(upload_path, DB_PATH)
+    suffix = ".db.gz" if file.filename.endswith(".gz") else ".db"
+    fd, upload_path = tempfile.mkstemp(suffix=suffix, dir=EXPORTS_DIR)
+    os.close(fd)
+    try:
+        file.save(upload_path)
+        backup_service.restore_file(upload_path)
+    except Exception as e:
+        return f"❌ Restore failed: {e}", 500
+    finally:
+        os.remove(upload_path)
     return f"✅ Database restored from uploaded file: {file.filename}"
 
 @webui.route("/system/delete/<fname>", methods=["POST"])
 def delete_backup(fname):
-    path = os.path.join(EXPORTS_DIR, fname)
-    if os.path.exists(path):
-        os.remove(path)
+    if backup_service.delete_backup(fname):
         return f"🗑 Deleted {fname}"
     return "❌ File not found"
 
 @webui.route("/system/logs")
 def system_logs():
-    logs = []
-    for file in sorted(os.listdir(LOG_DIR), key=lambda f: os.path.getmtime(os.path.join(LOG_DIR, f)), reverse=True):
-        if file.endswith(".log"):
-            path = os.path.join(LOG_DIR, file)
-            with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                content = f.read()
-            logs.append({
-                "name": file,
-                "content": content or "(empty file)",
-                "mtime": datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M"),
-            })
-    if not logs:
-        logs = [{"name": "No logs found", "content": "Logs will appear once Casharr runs."}]
-    return render_template("system_logs.html", title="System | Log Files", logs=logs)
+    # Metadata only; contents are range-loaded by the page when a file is opened
+    logs = [
+        {
+            "name": entry["name"],
+            "size": entry["size"],
+            "mtime": datetime.fromtimestamp(entry["mtime"]).strftime("%Y-%m-%d %H:%M"),
+        }
+        for entry in list_logs()
+    ]
+    return render_template("system_logs.html", title="System | Log Files", logs=logs, current=current_log())
 
 @webui.route("/system/logs/download/<filename>")
 def download_log(filename):
@@ -1793,61 +1803,85 @@ def system_events():
 # System Status API (used by /system/status)
 # ─────────────────────────────
 _start_time = time.time()
+prober.start()
+wal_archive.archiver.start()
 
 @webui.route("/api/status")
 def api_status():
-    try:
-        discord_online = getattr(bot, "is_ready", lambda: False)()
-        plex_connected = False
-        if plex is not None:
-            try:
-                plex_connected = plex.test_connection()
-            except AttributeError:
-                try:
-                    _ = plex.plex.friendlyName
-                    plex_connected = True
-                except Exception:
-                    plex_connected = False
-
-        disk = psutil.disk_usage("/")
-        disk_info = {
-            "total": f"{disk.total / (1024**3):.1f} GB",
-            "used": f"{disk.used / (1024**3):.1f} GB",
-            "percent": disk.percent,
-        }
-        uptime = str(timedelta(seconds=int(time.time() - _start_time)))
-        return jsonify({
-            "discord_online": discord_online,
-            "plex_connected": plex_connected,
-            "uptime": uptime,
-            "disk": disk_info
-        })
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    return jsonify(_status_payload())
+
+
+def _status_payload():
+    """System status from the health prober's snapshot plus in-memory bot stats."""
+    health = prober.snapshot()
+    disk = health["components"].get("disk", {}).get("detail")
+    uptime = str(timedelta(seconds=int(time.time() - _start_time)))
+    return {
+        "discord_online": prober.ok("discord"),
+        "plex_connected": prober.ok("plex"),
+        "uptime": uptime,
+        "disk": disk if isinstance(disk, dict) else {},
+        "health": health,
+        "member_cache": member_cache.stats(),
+        "shards": sharding.status(),
+    }
+
+def _status_change_key(data):
+    """The part of the status payload that counts as a change for /api/stream.
+
+    Uptime, RSS, LRU counters, disk usage and probe/shard latencies move
+    on every sample; they ride along with real changes and the 30s refresh.
+    """
+    volatile = {"rss_now_mb", "lru_hits", "lru_fetches"}
+    return {
+        "discord_online": data["discord_online"],
+        "plex_connected": data["plex_connected"],
+        "components": {name: c.get("ok") for name, c in data["health"]["components"].items()},
+        "member_cache": {k: v for k, v in data["member_cache"].items() if k not in volatile},
+        "shards": [{k: v for k, v in s.items() if k != "latency_ms"} for s in data["shards"]],
+    }
+
+# ─────────────────────────────
+# Liveness / readiness (container orchestration)
+# ─────────────────────────────
+@webui.route("/healthz")
+def healthz():
+    """Liveness: the web process is up and serving requests."""
+    return jsonify({"ok": True})
+
+@webui.route("/readyz")
+def readyz():
+    """Readiness: required components ([Health] ReadyRequires) passed the last probe."""
+    ready, failing = prober.ready()
+    return jsonify({"ready": ready, "failing": failing}), (200 if ready else 503)
+
+# ─────────────────────────────
+# Bot event-loop lag monitor (System > Status)
+# ─────────────────────────────
+@webui.route("/api/loop_monitor")
+def api_loop_monitor():
+    from bot.loop_monitor import monitor
+    return jsonify(monitor.snapshot())
 
 # ─────────────────────────────
-# Events API (log parse)
+# Events API (event journal)
 # ─────────────────────────────
 @webui.route("/api/events")
+@conditional()
 def api_events():
+    """Newest-first page of journal events.
+
+    ?before=<id cursor> &limit=50 &type=payment,trial_start &member=<discord_id> &since=<ISO time>
+    """
     try:
-        log_files = sorted(glob.glob(os.path.join(LOG_DIR, "*.log")), reverse=True)
-        if not log_files:
-            return jsonify({"events": []})
-        latest_log = log_files[0]
-        with open(latest_log, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()[-300:]
-        events = []
-        for line in lines:
-            if any(kw in line for kw in ["Joined", "Payment", "Removed", "Trial", "Referral", "Promo", "Error"]):
-                try:
-                    ts = line.split(" [")[0]
-                    msg = line.strip()
-                    events.append({"time": ts, "message": msg})
-                except Exception:
-                    continue
-        events = list(reversed(events[-100:]))
-        return jsonify({"events": events})
+        events, next_cursor = get_events(
+            before=request.args.get("before", type=int),
+            limit=request.args.get("limit", 50, type=int),
+            event_type=request.args.get("type") or None,
+            discord_id=request.args.get("member") or None,
+            since=request.args.get("since") or None,
+        )
+        return jsonify({"events": events, "next": next_cursor, "types": list(EVENT_TYPES)})
     except Exception as e:
         return jsonify({"error": str(e), "events": []})
 
@@ -1871,14 +1905,15 @@ def _maintenance_cleanup():
         return False, str(e)
 
 def _create_manual_backup():
-    ts = datetime.now().strftime("%Y.%m.%d_%H.%M.%S")
-    out = os.path.join(EXPORTS_DIR, f"casharr_backup_{ts}.db")
-    shutil.copy2(DB_PATH, out)
-    return out
+    return create_backup("webui", prefix="casharr_backup")["path"]
 
 @webui.route("/api/tasks")
 def api_tasks():
     """Return a simple task registry for the UI table."""
+    return body_etag(jsonify({"ok": True, "tasks": _task_rows()}))
+
+
+def _task_rows():
     # infer next backup time from latest auto backup + 24h
     next_backup = _compute_next_backup_time()
     tasks = [
@@ -1889,7 +1924,7 @@ def api_tasks():
         {"name": "Enforce Access", "interval": "Scheduled", "last_execution": None, "last_duration": None, "next_execution": None, "running": False},
         {"name": "Audit Plex", "interval": "Scheduled", "last_execution": None, "last_duration": None, "next_execution": None, "running": False},
     ]
-    return jsonify({"ok": True, "tasks": tasks})
+    return tasks
 
 @webui.route("/api/tasks/run", methods=["POST"])
 def api_tasks_run():
@@ -1909,6 +1944,44 @@ def api_tasks_run():
 
     return jsonify({"ok": False, "error": "Unknown task."})
 
+# ─────────────────────────────
+# Live updates (Server-Sent Events)
+# ─────────────────────────────
+LIVE_TOPICS = {"status", "stats", "tasks", "loop", "events", "logs"}
+
+_stats_conn = None
+
+def _db_data_version():
+    """Bumps whenever another connection commits; read on the publisher thread only."""
+    global _stats_conn
+    if _stats_conn is None:
+        _stats_conn = sqlite3.connect(DB_PATH)
+    return _stats_conn.execute("PRAGMA data_version").fetchone()[0]
+
+def _loop_snapshot():
+    from bot.loop_monitor import monitor
+    return monitor.snapshot()
+
+hub.add_source("status", _status_payload, interval=2, key=_status_change_key, refresh=30)
+hub.add_source("stats", _member_stats, interval=2, changed=_db_data_version)
+hub.add_source("events", lambda: {"latest": get_events(limit=20)[0]}, interval=2, changed=_db_data_version)
+hub.add_source("tasks", _task_rows, interval=5)
+hub.add_source("loop", _loop_snapshot, interval=5)
+install_log_handler()
+hub.start()
+
+@webui.route("/api/stream")
+def api_stream():
+    """One SSE stream per client; ?topics=status,stats,tasks,loop,events,logs"""
+    topics = {t.strip() for t in request.args.get("topics", "").split(",") if t.strip()} & LIVE_TOPICS
+    if not topics:
+        return jsonify({"ok": False, "error": f"topics must be any of {sorted(LIVE_TOPICS)}"}), 400
+    return Response(
+        hub.stream(topics),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ─────────────────────────────
 # SMTP Test Endpoint (plain text)
 # ─────────────────────────────
@@ -2061,17 +2134,13 @@ def api_member_extend_trial(discord_id):
         # Optional Discord sync
         if discord_enabled:
             try:
-                import main as bot_main
-                import asyncio
-                loop = asyncio.get_event_loop()
-                for g in bot_main.bot.guilds:
-                    member = g.get_member(int(discord_id))
-                    if member:
-                        trial_role = discord.utils.get(g.roles, name="Trial")
-                        if trial_role:
-                            asyncio.run_coroutine_threadsafe(
-                                member.add_roles(trial_role, reason="Trial extended via WebUI"), loop
-                            )
+                g, member = _find_member_across_guilds(discord_id)
+                if member:
+                    trial_role = guild_cache.role(g, TRIAL_ROLE)
+                    if trial_role:
+                        asyncio.run_coroutine_threadsafe(
+                            transition(member, add=[trial_role], reason="Trial extended via WebUI"), bot.loop
+                        )
             except Exception as e:
                 logger.warning(f"⚠️ Discord role sync failed: {e}")
 
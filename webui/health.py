@@ -0,0 +1,157 @@
+# webui/health.py
+import configparser
+import os
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import psutil
+from loghelper import logger
+from database import DB_PATH
+from bot import client as bot, plex
+
+# ─────────────────────────────
+# Background health prober
+# ─────────────────────────────
+# One daemon thread checks Plex, Discord, the DB, SMTP reachability and
+# disk every [Health] IntervalSeconds and keeps the latest result per
+# component (ok, detail, latency, timestamp). Status endpoints answer from
+# that snapshot, so open browser tabs never trigger a live Plex request.
+
+CONFIG_PATH = os.path.join("config", "config.ini")
+_cfg = configparser.ConfigParser()
+_cfg.read(CONFIG_PATH, encoding="utf-8")
+
+INTERVAL = max(5, _cfg.getint("Health", "IntervalSeconds", fallback=30))
+PROBE_TIMEOUT = _cfg.getfloat("Health", "TimeoutSeconds", fallback=5.0)
+# Components that must be healthy for /readyz to return 200
+READY_REQUIRES = [
+    c.strip().lower()
+    for c in _cfg.get("Health", "ReadyRequires", fallback="db").split(",") if c.strip()
+]
+
+
+def _probe_plex():
+    if plex is None:
+        return False, "not configured"
+    return (True, "reachable") if plex.test_connection() else (False, "unreachable")
+
+
+def _probe_discord():
+    if not bot.is_ready() or bot.is_closed():
+        return False, "not connected"
+    return True, f"gateway latency {round(bot.latency * 1000)} ms"
+
+
+def _probe_db():
+    conn = sqlite3.connect(DB_PATH, timeout=PROBE_TIMEOUT)
+    try:
+        conn.execute("SELECT 1 FROM members LIMIT 1").fetchall()
+    finally:
+        conn.close()
+    return True, "ok"
+
+
+def _probe_smtp():
+    cfg = configparser.ConfigParser()
+    cfg.read(CONFIG_PATH, encoding="utf-8")
+    if not cfg.has_section("SMTP") or not cfg["SMTP"].getboolean("Enabled", False):
+        return None, "disabled"
+    host = cfg["SMTP"].get("Server", "smtp.gmail.com")
+    # Same endpoint helpers/emailer.py sends through (implicit TLS on 465)
+    with socket.create_connection((host, 465), timeout=PROBE_TIMEOUT):
+        pass
+    return True, f"{host}:465 reachable"
+
+
+def _probe_disk():
+    disk = psutil.disk_usage("/")
+    info = {
+        "total": f"{disk.total / (1024**3):.1f} GB",
+        "used": f"{disk.used / (1024**3):.1f} GB",
+        "percent": disk.percent,
+    }
+    return disk.percent < 95, info
+
+
+PROBES = {
+    "plex": _probe_plex,
+    "discord": _probe_discord,
+    "db": _probe_db,
+    "smtp": _probe_smtp,
+    "disk": _probe_disk,
+}
+
+
+class HealthProber:
+    def __init__(self, interval: int = INTERVAL):
+        self.interval = interval
+        self.results: dict[str, dict] = {}
+        self.last_cycle = None
+        self._thread = None
+        self._wake = threading.Event()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="HealthProber")
+            self._thread.start()
+            logger.info(f"🩺 Health prober started (every {self.interval}s).")
+
+    def refresh(self):
+        """Ask the prober to run a cycle now (e.g. after saving settings)."""
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            self.run_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def run_once(self):
+        for name, probe in PROBES.items():
+            started = time.perf_counter()
+            try:
+                ok, detail = probe()
+            except Exception as e:
+                ok, detail = False, f"{type(e).__name__}: {e}"
+            previous = self.results.get(name, {})
+            if previous and previous.get("ok") is not False and ok is False:
+                logger.warning(f"🩺 {name} health check failing: {detail}")
+            elif previous.get("ok") is False and ok:
+                logger.info(f"🩺 {name} recovered.")
+            # Replace the whole entry so readers never see a half-written result
+            self.results[name] = {
+                "ok": ok,
+                "detail": detail,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                "checked_at": datetime.now().isoformat(sep=" ", timespec="seconds"),
+            }
+        self.last_cycle = time.time()
+
+    # ─────────────────────────────
+    # Readers (Flask threads)
+    # ─────────────────────────────
+    def ok(self, name: str) -> bool:
+        return bool(self.results.get(name, {}).get("ok"))
+
+    def stale(self) -> bool:
+        return self.last_cycle is None or time.time() - self.last_cycle > 3 * self.interval
+
+    def ready(self) -> tuple[bool, list[str]]:
+        failing = [name for name in READY_REQUIRES if not self.ok(name)]
+        if self.stale():
+            failing.append("prober")
+        return not failing, failing
+
+    def snapshot(self) -> dict:
+        return {
+            "interval": self.interval,
+            "last_cycle": datetime.fromtimestamp(self.last_cycle).isoformat(sep=" ", timespec="seconds")
+            if self.last_cycle else None,
+            "components": dict(self.results),
+        }
+
+
+prober = HealthProber()
@@ -0,0 +1,150 @@
+# webui/httpcache.py
+import configparser
+import gzip
+import hashlib
+import os
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import request, make_response
+from flask.json.provider import DefaultJSONProvider
+from loghelper import logger
+from database import get_generation
+
+try:
+    import orjson
+except ImportError:  # optional; only needed for [WebUI] FastJSON = true
+    orjson = None
+
+# ─────────────────────────────
+# Conditional GET, compression and JSON encoding for the API
+# ─────────────────────────────
+# Polled endpoints are validated against the DB change counter plus the
+# config file version: while neither moves, a request carrying the last
+# ETag gets an empty 304 before any query runs. Bodies that do go out are
+# gzip-compressed above COMPRESS_MIN_BYTES, and FastJSON swaps Flask's
+# encoder for orjson when it is installed.
+
+CONFIG_PATH = os.path.join("config", "config.ini")
+_cfg = configparser.ConfigParser()
+_cfg.read(CONFIG_PATH, encoding="utf-8")
+
+FAST_JSON = _cfg.getboolean("WebUI", "FastJSON", fallback=False)
+COMPRESS_MIN_BYTES = _cfg.getint("WebUI", "CompressMinBytes", fallback=1024)
+COMPRESS_LEVEL = 5  # level 6 spends ~40% more CPU for ~3% smaller JSON
+COMPRESS_MIMETYPES = {"application/json", "text/plain"}
+
+
+def config_version() -> str:
+    try:
+        st = os.stat(CONFIG_PATH)
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    except OSError:
+        return "0"
+
+
+def _last_modified(changed_at):
+    """Later of the last DB change and the config file mtime (whole seconds)."""
+    stamps = []
+    if changed_at:
+        stamps.append(datetime.strptime(changed_at, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc))
+    try:
+        stamps.append(datetime.fromtimestamp(int(os.path.getmtime(CONFIG_PATH)), timezone.utc))
+    except OSError:
+        pass
+    return max(stamps) if stamps else None
+
+
+def conditional(bucket: int | None = None):
+    """Answer 304 for unchanged data; ETag = path + query + DB generation + config version.
+
+    `bucket` (seconds) folds wall-clock time into the tag for payloads that
+    also age without a write (e.g. trials expiring); the tag then rolls over
+    at most once per bucket.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            generation, changed_at = get_generation()
+            parts = [request.full_path, str(generation), config_version()]
+            if bucket:
+                parts.append(str(int(datetime.now(timezone.utc).timestamp()) // bucket))
+            etag = hashlib.sha1("|".join(parts).encode()).hexdigest()[:20]
+            last_modified = None if bucket else _last_modified(changed_at)
+
+            if request.if_none_match:
+                fresh = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                fresh = bool(since and last_modified and last_modified <= since)
+            if fresh:
+                resp = make_response("", 304)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(etag, weak=True)
+            if last_modified:
+                resp.last_modified = last_modified
+            resp.headers["Cache-Control"] = "private, no-cache"
+            return resp
+        return wrapper
+    return decorator
+
+
+def body_etag(resp):
+    """Content-hash ETag for payloads not derived from the DB (tasks, timers); still saves the transfer."""
+    if resp.status_code == 200 and not resp.is_streamed:
+        resp.add_etag(weak=True)
+        resp.headers["Cache-Control"] = "private, no-cache"
+        resp.make_conditional(request)
+    return resp
+
+
+def compress(resp):
+    """after_request hook: gzip large JSON/text bodies for clients that accept it."""
+    if (
+        resp.status_code != 200
+        or resp.direct_passthrough
+        or resp.is_streamed
+        or "Content-Encoding" in resp.headers
+        or resp.mimetype not in COMPRESS_MIMETYPES
+        or "gzip" not in request.headers.get("Accept-Encoding", "").lower()
+    ):
+        return resp
+    body = resp.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return resp
+    resp.set_data(gzip.compress(body, COMPRESS_LEVEL, mtime=0))
+    resp.headers["Content-Encoding"] = "gzip"
+    resp.vary.add("Accept-Encoding")
+    return resp
+
+
+# ─────────────────────────────
+# Fast JSON (opt-in)
+# ─────────────────────────────
+class FastJSONProvider(DefaultJSONProvider):
+    """orjson-backed provider. Same data as Flask's encoder, but keys keep insertion
+    order, non-ASCII is written as UTF-8 and datetimes as ISO 8601; other
+    unknown types fall back to str()."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS),
+            mimetype=self.mimetype,
+        )
+
+
+def install_json_provider(app):
+    if not FAST_JSON:
+        return
+    if orjson is None:
+        logger.warning("⚠️ [WebUI] FastJSON is enabled but orjson is not installed — using Flask's encoder.")
+        return
+    app.json = FastJSONProvider(app)
+    logger.info("⚡ FastJSON enabled (orjson).")
@@ -0,0 +1,152 @@
+# webui/live.py
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+
+from loghelper import logger
+
+# ─────────────────────────────
+# Server-Sent Events hub
+# ─────────────────────────────
+# One publisher thread samples registered sources and publishes only when
+# a payload actually changed; log records are pushed straight from a
+# logging handler. Every /api/stream client gets its own bounded queue fed
+# by publish(), so the server does the same work whether zero or twenty
+# tabs are open. A client that stops reading is dropped (its EventSource
+# reconnects and receives the latest snapshots again).
+
+QUEUE_SIZE = 500
+KEEPALIVE = 15  # seconds between comment pings on an idle stream
+
+
+class _Subscriber:
+    def __init__(self, topics):
+        self.topics = set(topics)
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = False
+
+
+class LiveHub:
+    def __init__(self):
+        self._subs: list[_Subscriber] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._latest: dict[str, tuple[int, str]] = {}  # topic -> (id, json) for state topics
+        self._sources: dict[str, dict] = {}
+        self._thread = None
+
+    # ─────────────────────────────
+    # Publishing
+    # ─────────────────────────────
+    def publish(self, topic: str, data, retain: bool = False):
+        event_id = next(self._ids)
+        payload = json.dumps(data, default=str)
+        if retain:
+            self._latest[topic] = (event_id, payload)
+        with self._lock:
+            subs = [s for s in self._subs if topic in s.topics]
+        for sub in subs:
+            try:
+                sub.queue.put_nowait((event_id, topic, payload))
+            except queue.Full:
+                sub.dropped = True
+
+    def add_source(self, topic: str, fn, interval: float, changed=None, key=None, refresh=None):
+        """Sample `fn()` every `interval`s and publish when its result differs.
+
+        `changed()` is an optional cheap token (e.g. PRAGMA data_version);
+        when given, `fn` only runs after the token moves. `key(data)` picks
+        the part that counts as a change (leave out clocks and timings);
+        `refresh` republishes anyway after that many seconds so those
+        volatile fields don't go stale on the page.
+        """
+        self._sources[topic] = {"fn": fn, "interval": interval, "changed": changed,
+                                "key": key, "refresh": refresh, "published": 0.0,
+                                "token": object(), "last": None, "due": 0.0}
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, daemon=True, name="LiveHubPublisher")
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            now = time.monotonic()
+            for topic, src in self._sources.items():
+                if now < src["due"]:
+                    continue
+                src["due"] = now + src["interval"]
+                try:
+                    if src["changed"] is not None:
+                        token = src["changed"]()
+                        if token == src["token"]:
+                            continue
+                        src["token"] = token
+                    data = src["fn"]()
+                    marker = src["key"](data) if src["key"] else data
+                    encoded = json.dumps(marker, sort_keys=True, default=str)
+                    stale = src["refresh"] is not None and now - src["published"] >= src["refresh"]
+                    if encoded != src["last"] or stale:
+                        src["last"] = encoded
+                        src["published"] = now
+                        self.publish(topic, data, retain=True)
+                except Exception as e:
+                    logger.debug(f"Live source '{topic}' failed: {e}")
+            time.sleep(0.5)
+
+    # ─────────────────────────────
+    # Streaming (one generator per client, runs on a Flask worker thread)
+    # ─────────────────────────────
+    def stream(self, topics):
+        sub = _Subscriber(topics)
+        with self._lock:
+            self._subs.append(sub)
+        try:
+            yield "retry: 3000\n\n"
+            # Current state first, so a (re)connecting page renders at once
+            for topic in sub.topics:
+                if topic in self._latest:
+                    event_id, payload = self._latest[topic]
+                    yield f"id: {event_id}\nevent: {topic}\ndata: {payload}\n\n"
+            while not sub.dropped:
+                try:
+                    event_id, topic, payload = sub.queue.get(timeout=KEEPALIVE)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {event_id}\nevent: {topic}\ndata: {payload}\n\n"
+        finally:
+            with self._lock:
+                if sub in self._subs:
+                    self._subs.remove(sub)
+
+    def client_count(self) -> int:
+        with self._lock:
+            return len(self._subs)
+
+
+hub = LiveHub()
+
+
+# ─────────────────────────────
+# Log records → "logs" topic
+# ─────────────────────────────
+class _LiveLogHandler(logging.Handler):
+    def emit(self, record):
+        try:
+            line = self.format(record)
+            hub.publish("logs", {"line": line})
+        except Exception:
+            pass
+
+
+def install_log_handler():
+    casharr = logging.getLogger("casharr")
+    if any(isinstance(h, _LiveLogHandler) for h in casharr.handlers):
+        return
+    handler = _LiveLogHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+    casharr.addHandler(handler)
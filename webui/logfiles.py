@@ -0,0 +1,91 @@
+# webui/logfiles.py
+import os
+
+from loghelper import LOG_DIR
+
+# ─────────────────────────────
+# Seek-based log reading
+# ─────────────────────────────
+# Byte offsets are the cursors: nothing here reads more of a file than the
+# window asked for, so cost no longer grows with log size. Windows are
+# trimmed to whole lines; the returned offsets say exactly where the text
+# starts and ends so the next request continues without gaps or repeats.
+
+PAGE_BYTES = 64 * 1024
+TAIL_BYTES = 5000
+
+
+def log_path(name: str) -> str | None:
+    """Path inside LOG_DIR for a bare file name, or None if it isn't a log file."""
+    safe = os.path.basename(name or "")
+    path = os.path.join(LOG_DIR, safe)
+    return path if safe.endswith(".log") and os.path.isfile(path) else None
+
+
+def current_log() -> str | None:
+    """Real file name behind logs/latest.log (a symlink, or a redirect stub on Windows)."""
+    latest = os.path.join(LOG_DIR, "latest.log")
+    if os.path.islink(latest):
+        return os.path.basename(os.path.realpath(latest))
+    files = [f for f in os.listdir(LOG_DIR) if f.endswith(".log") and f != "latest.log"]
+    return max(files, key=lambda f: os.path.getmtime(os.path.join(LOG_DIR, f)), default=None)
+
+
+def list_logs() -> list[dict]:
+    """Metadata only (name, size, mtime), newest first; the symlink is skipped."""
+    out = []
+    for f in os.listdir(LOG_DIR):
+        path = os.path.join(LOG_DIR, f)
+        if f.endswith(".log") and f != "latest.log" and os.path.isfile(path):
+            st = os.stat(path)
+            out.append({"name": f, "size": st.st_size, "mtime": st.st_mtime})
+    return sorted(out, key=lambda x: x["mtime"], reverse=True)
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace")
+
+
+def read_forward(path: str, offset: int, limit: int = PAGE_BYTES) -> dict:
+    """Bytes from `offset` up to `limit`, ending on a line boundary unless at EOF."""
+    size = os.path.getsize(path)
+    offset = max(0, min(int(offset), size))
+    with open(path, "rb") as f:
+        f.seek(offset)
+        raw = f.read(limit)
+    end = offset + len(raw)
+    if end < size:
+        cut = raw.rfind(b"\n")
+        if cut >= 0:
+            raw = raw[:cut + 1]
+            end = offset + len(raw)
+    return {"text": _decode(raw), "start": offset, "end": end, "size": size, "eof": end >= size}
+
+
+def read_backward(path: str, before: int | None = None, limit: int = PAGE_BYTES) -> dict:
+    """The window ending at `before` (default EOF), starting on a line boundary."""
+    size = os.path.getsize(path)
+    end = size if before is None else max(0, min(int(before), size))
+    start = max(0, end - limit)
+    with open(path, "rb") as f:
+        f.seek(start)
+        raw = f.read(end - start)
+    if start > 0:
+        cut = raw.find(b"\n")
+        if cut >= 0:
+            raw = raw[cut + 1:]
+            start = end - len(raw)
+    return {"text": _decode(raw), "start": start, "end": end, "size": size, "bof": start == 0}
+
+
+def tail_lines(path: str, lines: int) -> str:
+    """Last `lines` lines, reading backwards in blocks from EOF."""
+    size = os.path.getsize(path)
+    block, data, pos = 8192, b"", size
+    with open(path, "rb") as f:
+        while pos > 0 and data.count(b"\n") <= lines:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    return _decode(b"".join(data.splitlines(keepends=True)[-lines:]))
@@ -1,6 +1,6 @@
 
 # webui/scheduler.py
-import threading, time, traceback, shutil, os
+import threading, time, traceback, os
 from datetime import datetime, timedelta, timezone
 from loghelper import logger
 from database import (
@@ -12,6 +12,7 @@ from database import (
 )
 from helpers.emailer import send_email
 from helpers.sms import send_sms
+from helpers.backups import create_backup
 
 def send_notification(email=None, subject=None, message=None):
     """Simplified notification using email + SMS"""
@@ -25,13 +26,8 @@ def send_notification(email=None, subject=None, message=None):
 
 def backup_database_daily():
     """Daily DB backup to /exports"""
-    ts = datetime.now().strftime("%Y.%m.%d_%H.%M.%S")
-    out_dir = "exports"
-    os.makedirs(out_dir, exist_ok=True)
-    dest = os.path.join(out_dir, f"auto_backup_{ts}.db")
     try:
-        shutil.copy2(DB_PATH, dest)
-        logger.info(f"💾 Auto-backup completed → {dest}")
+        create_backup("scheduler", prefix="auto_backup")
     except Exception as e:
         logger.error(f"⚠️ Auto-backup failed: {e}")
 
@@ -0,0 +1,19 @@
+// Casharr live updates — subscribe to /api/stream (Server-Sent Events).
+// Usage: casharrLive({ status: data => ..., logs: data => ... });
+// The browser reconnects on its own; state topics are replayed on connect.
+window.casharrLive = function (handlers) {
+  const topics = Object.keys(handlers);
+  if (!topics.length || !window.EventSource) return null;
+  const source = new EventSource('/api/stream?topics=' + encodeURIComponent(topics.join(',')));
+  topics.forEach(topic => {
+    source.addEventListener(topic, ev => {
+      try {
+        handlers[topic](JSON.parse(ev.data));
+      } catch (err) {
+        console.error(`Live update (${topic}) failed:`, err);
+      }
+    });
+  });
+  window.addEventListener('beforeunload', () => source.close());
+  return source;
+};